@@ -0,0 +1,35 @@
+"""Entry point for the mcpt command.
+
+Requests that need neither the registry nor any output formatting, namely
+`mcpt --version` and cached shell completions, are answered here before
+the Typer application (and with it Click and Rich) is imported.
+"""
+
+from __future__ import annotations
+
+import sys
+
+VERSION_FLAGS = ("--version", "-v")
+
+
+def main() -> None:
+    """Run the CLI, answering --version and cached completions without loading it."""
+    if len(sys.argv) == 2 and sys.argv[1] in VERSION_FLAGS:
+        from mcpt import __version__
+
+        print(f"mcpt {__version__}")
+        return
+
+    from mcpt.completion import serve_completion
+
+    status = serve_completion()
+    if status is not None:
+        sys.exit(status)
+
+    from mcpt.cli import app
+
+    app()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,10 @@ from __future__ import annotations
 import json
 import subprocess
 import sys
+from datetime import datetime
+from itertools import chain, islice
 from pathlib import Path
-from typing import Annotated, List, Optional
+from typing import Annotated, Any, Iterable, List, Mapping, Optional, Sequence
 
 import typer
 from rich.console import Console
@@ -14,12 +16,22 @@ from rich.panel import Panel
 from rich.table import Table
 
 from mcpt import __version__
+from mcpt.completion import BUNDLE, CAPABILITY, COLLECTION, TAG, TOOL, completer
+from mcpt.output import write_json, write_json_array, write_ndjson
 from mcpt.registry import (
     RegistryConfig,
+    cache_max_bytes,
+    cache_stats,
+    collect_garbage,
+    parse_size,
+    registry_cache_root,
     get_registry,
     get_registry_status,
     get_tool,
+    is_immutable_ref,
+    iter_tools,
     search_tools,
+    similar_tools,
     load_cached_artifact,
     get_featured,
     FeaturedData,
@@ -48,30 +60,19 @@ app = typer.Typer(
 
 def fuzzy_match_tools(query: str, limit: int = 5) -> list[dict]:
     """Find tools with similar names using simple fuzzy matching."""
-    from difflib import SequenceMatcher
-
-    registry = get_registry()
-    tools = registry.get("tools", [])
-    query_lower = query.lower()
-
-    scored = []
-    for tool in tools:
-        tool_id = tool.get("id", "")
-        # Score based on: substring match, sequence similarity, starts-with
-        score = 0
-        if query_lower in tool_id.lower():
-            score += 0.5
-        if tool_id.lower().startswith(query_lower):
-            score += 0.3
-        score += SequenceMatcher(None, query_lower, tool_id.lower()).ratio() * 0.5
-        if score > 0.2:
-            scored.append((score, tool))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [t for _, t in scored[:limit]]
+    return similar_tools(get_registry(), query, limit)
 
 
 console = Console()
+# Messages that must stay off stdout, such as errors during --json output
+err_console = Console(stderr=True)
+
+# Shell completion callbacks, served from the completion cache
+complete_tool_ids = completer(TOOL)
+complete_tags = completer(TAG)
+complete_capabilities = completer(CAPABILITY)
+complete_bundles = completer(BUNDLE)
+complete_collections = completer(COLLECTION)
 
 
 # ============================================================================
@@ -101,7 +102,6 @@ def main(
 # ============================================================================
 
 
-from mcpt.ui.render import render_search_table, render_tool_header
 from mcpt.ui.risk import calculate_risk_score, get_risk_tier, RISK_LEVEL_EXTREME, RISK_LEVEL_HIGH, RISK_LEVEL_MED, RISK_LEVEL_LOW
 from mcpt.ui.caps import get_cap_info, get_risk_color, RISK_CRITICAL, RISK_HIGH, RISK_MED, RISK_LOW, RISK_NONE
 from mcpt.workspace import (
@@ -117,10 +117,12 @@ from mcpt.workspace import (
     read_lock,
     get_ui_config,
 )
-from mcpt.registry.client import get_bundle_membership
+from mcpt.registry.client import RANKINGS, field_postings, get_bundle_membership, tool_index
+from mcpt.registry.model import as_hit
+from mcpt.registry.query import QueryError, bit_positions, parse_query, select
 
 def render_tools(
-    tools: list[dict[str, Any]], 
+    tools: Sequence[Mapping[str, Any]],
     title: str = "Search Results", 
     deprecated: bool = False,
     plain: bool = False,
@@ -129,17 +131,20 @@ def render_tools(
     explain: bool = False,
 ) -> None:
     """Helper to render tools using unified UI."""
-    
+    from mcpt.ui.render import render_search_table
+
     # Enrich tools with bundle info for trust calculation
-    # We do this here to keep it centralized for all lists/searches
+    # We do this here to keep it centralized for all lists/searches.
+    # Bundles go on the hits, so registry tools are never mutated.
     bundle_map = get_bundle_membership()
-    for tool in tools:
-        if "id" in tool and tool["id"] in bundle_map:
-            tool["_bundles"] = bundle_map[tool["id"]]
+    hits = [as_hit(tool) for tool in tools]
+    for hit in hits:
+        if hit.id in bundle_map:
+            hit.bundles = bundle_map[hit.id]
 
     console.print(
         render_search_table(
-            tools, 
+            hits, 
             title=title, 
             plain=plain, 
             show_badges=not no_badges,
@@ -152,12 +157,15 @@ def render_tools(
 @app.command("list")
 def list_tools(
     json_output: Annotated[bool, typer.Option("--json", help="Output as JSON")] = False,
+    ndjson: Annotated[bool, typer.Option("--ndjson", help="Output one JSON tool per line")] = False,
     refresh: Annotated[bool, typer.Option("--refresh", help="Force refresh from remote")] = False,
-    bundle: Annotated[Optional[str], typer.Option("--bundle", help="Filter by bundle")] = None,
-    tag: Annotated[Optional[str], typer.Option("--tag", help="Filter by tag")] = None,
-    collection: Annotated[Optional[str], typer.Option("--collection", "-c", help="Filter by collection")] = None,
+    force: Annotated[bool, typer.Option("--force", help="With --refresh, refetch even a pinned (immutable) ref")] = False,
+    bundle: Annotated[Optional[str], typer.Option("--bundle", help="Filter by bundle", autocompletion=complete_bundles)] = None,
+    tag: Annotated[Optional[str], typer.Option("--tag", help="Filter by tag", autocompletion=complete_tags)] = None,
+    collection: Annotated[Optional[str], typer.Option("--collection", "-c", help="Filter by collection", autocompletion=complete_collections)] = None,
     featured: Annotated[bool, typer.Option("--featured", help="Show featured tools only")] = False,
     include_deprecated: Annotated[bool, typer.Option("--include-deprecated", help="Show deprecated tools")] = False,
+    limit: Annotated[Optional[int], typer.Option("--limit", "-n", min=1, help="Show at most this many tools")] = None,
     plain: Annotated[bool, typer.Option("--plain", help="No color, no glyphs")] = False,
     no_badges: Annotated[bool, typer.Option("--no-badges", help="Hide risk badges")] = False,
     force_rich: Annotated[bool, typer.Option("--force-rich", help="Force rich output even if non-TTY")] = False,
@@ -172,90 +180,105 @@ def list_tools(
         elif not sys.stdout.isatty() and not force_rich:
             plain = True
 
-    try:
-        registry = get_registry(force_refresh=refresh)
-    except Exception as e:
-        console.print(f"[red]Error fetching registry:[/red] {e}")
-        raise typer.Exit(1)
-
-    tools = registry.get("tools", [])
-
-    # Filter deprecated
-    if not include_deprecated:
-        tools = [t for t in tools if not t.get("deprecated")]
-
-    # Filter by tag
-    if tag:
-        tools = [t for t in tools if tag.lower() in [x.lower() for x in t.get("tags", [])]]
+    # Keep notices out of machine-readable output
+    notices = err_console if json_output or ndjson else console
 
     # Filter by bundle
+    bundle_ids: set[str] | None = None
     if bundle:
         cfg = RegistryConfig()
         index = load_cached_artifact(cfg, "registry.index.json")
         if index and "bundles" in index and bundle in index["bundles"]:
-            allowed = set(index["bundles"][bundle])
-            tools = [t for t in tools if t.get("id") in allowed]
+            bundle_ids = set(index["bundles"][bundle])
         else:
             if index:
-                 console.print(f"[yellow]Bundle '{bundle}' not found.[/yellow]")
+                 notices.print(f"[yellow]Bundle '{bundle}' not found.[/yellow]")
             else:
-                 console.print("[yellow]Bundle index not available.[/yellow]")
-            tools = []
+                 notices.print("[yellow]Bundle index not available.[/yellow]")
+            bundle_ids = set()
 
     # Filter by featured / collection
+    allowed: set[str] | None = None
     if featured or collection:
         cfg = RegistryConfig()
         f_data = get_featured(cfg)
+        allowed = set()
         if f_data:
-            allowed = set()
+            # Featured means the canonical featured list plus any
+            # "Tools of the Week" / featured sections.
             if featured:
-                allowed.update(f_data.featured)
-                # Should featured flag strictly mean "tools in featured list" or "tools in any featured section"?
-                # Prompt says: "Show featured tools only" -- usually means the top level featured list.
-                # However, usually featured includes whatever is in 'sections' too.
-                # Let's stick to f_data.featured for now as that's the canonical 'featured' list.
-                
-                # Also include "Tools of the Week" if section exists?
-                for s in f_data.sections:
-                    if "week" in s.title.lower() or "featured" in s.title.lower():
-                        allowed.update(s.tool_ids)
+                allowed.update(f_data.featured_ids())
 
             if collection:
                 if collection in f_data.collections:
                     allowed.update(f_data.collections[collection].tool_ids)
                 else:
-                    console.print(f"[yellow]Collection '{collection}' not found.[/yellow]")
-                    tools = []
-            
-            # If both flags set, intersection or union?
-            # Typer typically implies cumulative filters narrow results (intersection), 
-            # BUT here we built an 'allowed' set which is additive.
-            # If 'tools' are filtered by 'allowed', it means tool MUST be in 'allowed'.
-            # So if usage is `list --featured --collection X`, user probably wants tools that are EITHER featured OR in collection X?
-            # Or tools that are in BOTH?
-            # Given the flags populate 'allowed', and we filter by 'allowed', it behaves as Union of criteria?
-            # Wait, allowed is initialized empty.
-            # If --featured, we add featured tools.
-            # If --collection, we add collection tools.
-            # Then we filter tools to only those in allowed.
-            # This is Union logic (Show me featured stuff AND collection stuff).
-            
-            if allowed:
-                tools = [t for t in tools if t.get("id") in allowed]
-            elif (featured or collection): 
-                # Filters were requested but nothing matched or data missing
-                tools = []
-        else:
-            if featured or collection:
-                 console.print("[yellow]Featured data not available.[/yellow]")
-                 tools = []
+                    notices.print(f"[yellow]Collection '{collection}' not found.[/yellow]")
+                    # An unknown collection matches nothing, even with --featured
+                    allowed = set()
 
-    if json_output:
+            # Both flags together show tools matching either (a union);
+            # an empty set means nothing matched.
+        else:
+            notices.print("[yellow]Featured data not available.[/yellow]")
+
+    tools: Iterable[dict]
+    if (json_output or ndjson) and not refresh:
+        # Stream tools from the cache; filters stay lazy
+        tools = iter_tools()
+        if not include_deprecated:
+            tools = (t for t in tools if not t.get("deprecated"))
+        if tag:
+            tools = (t for t in tools if tag.lower() in [x.lower() for x in t.get("tags", [])])
+        if bundle_ids is not None:
+            tools = (t for t in tools if t.get("id") in bundle_ids)
+        if allowed is not None:
+            tools = (t for t in tools if t.get("id") in allowed)
+    else:
+        try:
+            registry = get_registry(force_refresh=refresh, force=force)
+        except Exception as e:
+            notices.print(f"[red]Error fetching registry:[/red] {e}")
+            raise typer.Exit(1)
+        registry_tools = registry.get("tools", [])
+
+        # Filters are intersections of the registry's precomputed bitmaps
+        postings = field_postings(registry)
+        mask = postings.all
+        if not include_deprecated:
+            mask &= ~postings.is_.get("deprecated", 0)
+        if tag:
+            mask &= postings.tag.get(tag.lower(), 0)
+        if bundle_ids is not None:
+            mask &= postings.of_ids(bundle_ids)
+        if allowed is not None:
+            mask &= postings.of_ids(allowed)
+        tools = [registry_tools[pos] for pos in bit_positions(mask)]
+
+    if limit is not None:
+        tools = islice(tools, limit)
+
+    if json_output or ndjson:
         # Strip internal fields
-        clean_tools = [{k: v for k, v in t.items() if not k.startswith("_")} for t in tools]
-        console.print(json.dumps(clean_tools, indent=2))
+        clean_tools = ({k: v for k, v in t.items() if not k.startswith("_")} for t in tools)
+        # Read the first tool before writing anything, so a registry that
+        # cannot be fetched or parsed leaves stdout empty
+        try:
+            first = list(islice(clean_tools, 1))
+        except Exception as e:
+            err_console.print(f"[red]Error fetching registry:[/red] {e}")
+            raise typer.Exit(1)
+        try:
+            if ndjson:
+                write_ndjson(chain(first, clean_tools))
+            else:
+                write_json_array(chain(first, clean_tools))
+        except Exception as e:
+            err_console.print(f"[red]Error reading registry:[/red] {e}")
+            raise typer.Exit(1)
         return
 
+    tools = list(tools)
     if not tools:
         console.print("[dim]No tools found.[/dim]")
         return
@@ -294,10 +317,11 @@ def list_tools(
 
 @app.command("featured")
 def featured(
-    collection: Annotated[Optional[str], typer.Option("--collection", "-c", help="Show only a specific collection")] = None,
+    collection: Annotated[Optional[str], typer.Option("--collection", "-c", help="Show only a specific collection", autocompletion=complete_collections)] = None,
     json_output: Annotated[bool, typer.Option("--json", help="Output as JSON")] = False,
     plain: Annotated[bool, typer.Option("--plain", help="No color, no glyphs")] = False,
     refresh: Annotated[bool, typer.Option("--refresh", help="Force refresh registry")] = False,
+    force: Annotated[bool, typer.Option("--force", help="With --refresh, refetch even a pinned (immutable) ref")] = False,
     list_collections: Annotated[bool, typer.Option("--list", "--list-collections", help="List available collections")] = False,
     force_rich: Annotated[bool, typer.Option("--force-rich", help="Force rich output even if non-TTY")] = False,
 ) -> None:
@@ -319,8 +343,8 @@ def featured(
         
         # Load registry for tool details
         try:
-            full_registry = get_registry(cfg, force_refresh=refresh)
-            tools_map = {t["id"]: t for t in full_registry.get("tools", [])}
+            full_registry = get_registry(cfg, force_refresh=refresh, force=force)
+            tools_map = tool_index(full_registry)
         except Exception as e:
             console.print(f"[yellow]Warning: Could not fetch registry: {e}[/yellow]")
 
@@ -333,7 +357,7 @@ def featured(
         if list_collections:
             if json_output:
                 res = [{"slug": c.slug, "title": c.title, "description": c.description} for c in data.collections.values()]
-                console.print(json.dumps(res, indent=2))
+                write_json(res)
             else:
                 console.print(Panel("[bold]Available Collections[/bold]", style="blue"))
                 for c in data.collections.values():
@@ -365,7 +389,7 @@ def featured(
 
         if json_output:
             out = asdict(view_data)
-            console.print(json.dumps(out, indent=2))
+            write_json(out)
             return
 
         # Render
@@ -389,7 +413,7 @@ def featured(
 
 @app.command()
 def info(
-    tool_id: Annotated[str, typer.Argument(help="Tool ID to get info for")],
+    tool_id: Annotated[str, typer.Argument(help="Tool ID to get info for", autocompletion=complete_tool_ids)],
     json_output: Annotated[bool, typer.Option("--json", help="Output as JSON")] = False,
 ) -> None:
     """Show detailed information about a tool."""
@@ -401,12 +425,17 @@ def info(
         raise typer.Exit(1)
 
     if json_output:
-        console.print(json.dumps(tool, indent=2))
+        write_json(tool)
         return
 
+    from mcpt.ui.render import render_tool_header
+
+    # Bundle info from the index, kept apart from the (shared, read-only) tool
+    bundles = get_bundle_membership(RegistryConfig()).get(tool_id)
+
     console.print()
     # 2.3 Show big header with sigil
-    console.print(render_tool_header(tool))
+    console.print(render_tool_header(tool, bundles))
     console.print()
 
     if tool.get("deprecated"):
@@ -417,21 +446,6 @@ def info(
     table = Table(show_header=False, box=None, padding=(0, 2))
     table.add_column("Key", style="dim", width=15)
     table.add_column("Value")
-    
-    # Try to load bundle info from index
-
-    cfg = RegistryConfig()
-    try:
-        index = load_cached_artifact(cfg, "registry.index.json")
-        bundles = []
-        if index and "bundles" in index:
-            for b_name, b_tools in index["bundles"].items():
-                if tool_id in b_tools:
-                    bundles.append(b_name)
-        if bundles:
-             tool["_bundles"] = bundles
-    except Exception:
-        pass
 
     # Basic info
     table.add_row("Description", tool.get("description", ""))
@@ -446,8 +460,8 @@ def info(
         table.add_row("Installed Ref", installed.get("ref", "unknown"))
         table.add_row("Installed At", installed.get("installed_at", "unknown"))
     
-    if "_bundles" in tool:
-        table.add_row("Bundles", ", ".join(tool["_bundles"]))
+    if bundles:
+        table.add_row("Bundles", ", ".join(bundles))
 
     # Risk Analysis
     caps = tool.get("capabilities", [])
@@ -529,18 +543,25 @@ def icons(
 
 @app.command()
 def search(
-    query: Annotated[str, typer.Argument(help="Search query")] = "",
+    query: Annotated[
+        str,
+        typer.Argument(
+            help='Search query: free text plus filters such as tag:agents cap:network '
+            '-cap:exec bundle:core collection:starter is:featured -deprecated '
+            'risk<high trust>=verified; quote phrases ("file search")'
+        ),
+    ] = "",
     bundle: Annotated[
         Optional[str],
-        typer.Option("--bundle", help="Filter by bundle (e.g., core, productivity)"),
+        typer.Option("--bundle", help="Filter by bundle (e.g., core, productivity)", autocompletion=complete_bundles),
     ] = None,
     tag: Annotated[
         Optional[str],
-        typer.Option("--tag", help="Filter by tag (e.g., agents)"),
+        typer.Option("--tag", help="Filter by tag (e.g., agents)", autocompletion=complete_tags),
     ] = None,
     collection: Annotated[
         Optional[str],
-        typer.Option("--collection", "-c", help="Filter by collection (e.g., starter)"),
+        typer.Option("--collection", "-c", help="Filter by collection (e.g., starter)", autocompletion=complete_collections),
     ] = None,
     featured: Annotated[
         bool,
@@ -550,7 +571,16 @@ def search(
         bool,
         typer.Option("--explain", help="Show match reasons and scores"),
     ] = False,
+    limit: Annotated[
+        Optional[int],
+        typer.Option("--limit", "-n", min=1, help="Show only the best N matches"),
+    ] = None,
+    rank: Annotated[
+        str,
+        typer.Option("--rank", help="Ranking: classic (whole-query match) or bm25 (per-word relevance)"),
+    ] = "classic",
     json_output: Annotated[bool, typer.Option("--json", help="Output as JSON")] = False,
+    ndjson: Annotated[bool, typer.Option("--ndjson", help="Output one JSON tool per line")] = False,
     plain: Annotated[bool, typer.Option("--plain", help="No color, no glyphs")] = False,
     no_badges: Annotated[bool, typer.Option("--no-badges", help="Hide risk badges")] = False,
     force_rich: Annotated[bool, typer.Option("--force-rich", help="Force rich output even if non-TTY")] = False,
@@ -564,11 +594,25 @@ def search(
             plain = True
             
     # Pre-filter for collections/featured logic
-    # search_tools doesn't support featured/collection filters natively, 
-    # but we can filter the result set or pre-filter if we pass a allow-list.
-    # search_tools signature: (query, bundle, tag) -> list[dict]
+    # The --featured/--collection flags combine as a union, which the query
+    # language (is:featured, collection:<slug>) cannot express, so they
+    # still filter the result set afterwards.
+    # search_tools signature: (query, bundle, tag, limit) -> list[SearchHit]
+    # The limit applies after featured filtering, so only push it down
+    # when there is none.
     
-    tools = search_tools(query, bundle=bundle, tag=tag)
+    if rank not in RANKINGS:
+        console.print(f"[red]Unknown ranking '{rank}'.[/red] Choose from: {', '.join(RANKINGS)}")
+        raise typer.Exit(1)
+
+    try:
+        if featured or collection:
+            tools = search_tools(query, bundle=bundle, tag=tag, ranking=rank)
+        else:
+            tools = search_tools(query, bundle=bundle, tag=tag, limit=limit, ranking=rank)
+    except QueryError as e:
+        console.print(f"[red]Invalid query:[/red] {e}")
+        raise typer.Exit(1)
 
     # Apply featured filters
     if featured or collection:
@@ -577,11 +621,8 @@ def search(
         if f_data:
             allowed = set()
             if featured:
-                allowed.update(f_data.featured)
-                for s in f_data.sections:
-                    if "week" in s.title.lower() or "featured" in s.title.lower():
-                        allowed.update(s.tool_ids)
-            
+                allowed.update(f_data.featured_ids())
+
             if collection:
                 if collection in f_data.collections:
                     allowed.update(f_data.collections[collection].tool_ids)
@@ -597,11 +638,15 @@ def search(
         else:
             tools = []
             console.print("[dim]Featured data unavailable -- skipping filter results[/dim]")
+        tools = tools[:limit]
 
-    if json_output:
+    if json_output or ndjson:
         # Strip internal fields unless specifically requested, but for now output clean tools
-        clean_tools = [{k: v for k, v in t.items() if not k.startswith("_")} for t in tools]
-        console.print(json.dumps(clean_tools, indent=2))
+        clean_tools = ({k: v for k, v in t.items() if not k.startswith("_")} for t in tools)
+        if ndjson:
+            write_ndjson(clean_tools)
+        else:
+            write_json_array(clean_tools)
         return
 
     if not tools:
@@ -644,7 +689,7 @@ def bundles(
     bundle_data = index["bundles"]
     
     if json_output:
-        console.print(json.dumps(bundle_data, indent=2))
+        write_json(bundle_data)
         return
 
     table = Table(title="Tool Bundles")
@@ -662,26 +707,77 @@ def bundles(
     console.print(table)
 
 
+def _local_facets(query: str) -> dict[str, Any]:
+    """Facet counts computed from the registry's bitmaps, within query's filters."""
+    parsed = parse_query(query)
+    if parsed.text:
+        raise QueryError(f"facets takes only filters, not free text ({parsed.text!r})")
+    registry = get_registry()
+    postings = field_postings(registry)
+    mask = select(postings, parsed.filters)
+    selected = postings.all if mask is None else mask
+    counts = postings.facets(mask)
+    report: dict[str, Any] = {
+        "generated_at": "local",
+        "stats": {
+            "total_tools": selected.bit_count(),
+            "deprecated": counts["is"].get("deprecated", 0),
+            "featured": counts["is"].get("featured", 0),
+        },
+        "tags": counts["tag"],
+        "bundle_sizes": counts["bundle"],
+        "capabilities": counts["cap"],
+        "trust_tiers": counts["trust"],
+        "risk_tiers": counts["risk"],
+        "collections": counts["collection"],
+    }
+    if query:
+        report["query"] = query
+    return report
+
+
 @app.command()
 def facets(
+    query: Annotated[
+        str,
+        typer.Argument(help="Only count tools matching these filters (e.g. cap:network -deprecated)"),
+    ] = "",
     json_output: Annotated[bool, typer.Option("--json", help="Output as JSON")] = False,
 ) -> None:
-    """Show registry facets and statistics."""
+    """Show registry facets and statistics.
+
+    Uses the registry's report artifact when available; otherwise, or with
+    a filter, counts are computed locally.
+    """
     cfg = RegistryConfig()
-    try:
-        report = load_cached_artifact(cfg, "registry.report.json")
-    except Exception:
-        report = None
-    
+    report = None
+    if not query:
+        try:
+            report = load_cached_artifact(cfg, "registry.report.json")
+        except Exception:
+            report = None
+
     if not report:
-        console.print("[yellow]Registry report not available.[/yellow] Try 'mcpt list --refresh'")
-        return
+        try:
+            report = _local_facets(query)
+        except QueryError as e:
+            console.print(f"[red]Invalid query:[/red] {e}")
+            raise typer.Exit(1)
+        except Exception:
+            console.print("[yellow]Registry report not available.[/yellow] Try 'mcpt list --refresh'")
+            return
 
     if json_output:
-        console.print(json.dumps(report, indent=2))
+        write_json(report)
         return
     
-    console.print(Panel(f"[bold]Registry Facets[/bold] (generated {report.get('generated_at', 'unknown')})"))
+    if report.get("generated_at") == "local":
+        title = "[bold]Registry Facets[/bold] (computed locally)"
+        if report.get("query"):
+            title += f" for [cyan]{report['query']}[/cyan]"
+    else:
+        title = f"[bold]Registry Facets[/bold] (generated {report.get('generated_at', 'unknown')})"
+    console.print(Panel(title))
     
     # Stats
     stats = report.get("stats", {})
@@ -702,6 +798,18 @@ def facets(
         for bundle, size in report.get("bundle_sizes", {}).items():
             console.print(f"  - {bundle}: [dim]{size}[/dim]")
 
+    # Locally computed facets
+    for key, heading in (
+        ("capabilities", "Capabilities"),
+        ("trust_tiers", "Trust Tiers"),
+        ("risk_tiers", "Risk Tiers"),
+        ("collections", "Collections"),
+    ):
+        if report.get(key):
+            console.print(f"\n[bold]{heading}[/bold]")
+            for value, count in report[key].items():
+                console.print(f"  - {value}: [dim]{count}[/dim]")
+
 
 # ============================================================================
 # Workspace commands
@@ -739,7 +847,7 @@ def init(
 
 @app.command()
 def add(
-    tool_id: Annotated[str, typer.Argument(help="Tool ID to add")],
+    tool_id: Annotated[str, typer.Argument(help="Tool ID to add", autocompletion=complete_tool_ids)],
     ref: Annotated[Optional[str], typer.Option("--ref", help="Git ref to use")] = None,
     path: Annotated[
         Optional[Path],
@@ -821,8 +929,11 @@ def remove(
 
 @app.command()
 def grant(
-    tool_id: Annotated[str, typer.Argument(help="Tool ID")],
-    capability: Annotated[str, typer.Argument(help="Capability to grant (e.g. network, filesystem_write)")],
+    tool_id: Annotated[str, typer.Argument(help="Tool ID", autocompletion=complete_tool_ids)],
+    capability: Annotated[
+        str,
+        typer.Argument(help="Capability to grant (e.g. network, filesystem_write)", autocompletion=complete_capabilities),
+    ],
     path: Annotated[
         Optional[Path],
         typer.Option("--path", "-p", help="Path to mcp.yaml"),
@@ -873,7 +984,7 @@ def revoke(
 
 @app.command()
 def install(
-    tool_id: Annotated[str, typer.Argument(help="Tool ID to install")],
+    tool_id: Annotated[str, typer.Argument(help="Tool ID to install", autocompletion=complete_tool_ids)],
     ref: Annotated[Optional[str], typer.Option("--ref", help="Git ref to install")] = None,
     venv: Annotated[
         Optional[Path],
@@ -964,7 +1075,7 @@ def install(
 
 @app.command()
 def run(
-    tool_id: Annotated[str, typer.Argument(help="Tool ID to run")],
+    tool_id: Annotated[str, typer.Argument(help="Tool ID to run", autocompletion=complete_tool_ids)],
     args: Annotated[Optional[List[str]], typer.Argument(help="Arguments to pass to the tool")] = None,
     mode: Annotated[str, typer.Option("--mode", help="Execution mode: stub, restricted, real")] = "stub",
     real: Annotated[bool, typer.Option("--real", help="[Deprecated] Alias for --mode restricted")] = False,
@@ -1047,12 +1158,15 @@ def registry(
     status = get_registry_status()
     dist = status.cache_path.parent / "dist"
     
-    artifacts = {
-        "index": (dist / "registry.index.json").exists(),
-        "capabilities": (dist / "capabilities.json").exists(),
-        "report": (dist / "registry.report.json").exists(),
-        "llms": (dist / "registry.llms.txt").exists(),
+    artifact_files = {
+        "index": "registry.index.json",
+        "capabilities": "capabilities.json",
+        "featured": "featured.json",
+        "report": "registry.report.json",
+        "llms": "registry.llms.txt",
     }
+    artifacts = {art: (dist / filename).exists() for art, filename in artifact_files.items()}
+    unpublished = [art for art, filename in artifact_files.items() if filename in status.unpublished]
     
     if json_output:
         out = {
@@ -1060,10 +1174,12 @@ def registry(
             "ref": status.ref,
             "cache_path": str(status.cache_path),
             "artifacts": artifacts,
+            "unpublished": unpublished,
             "tool_count": status.tool_count,
+            "sha256": status.content_hash,
             "last_fetched": status.cache_mtime.isoformat() if status.cache_mtime else None,
         }
-        console.print(json.dumps(out, indent=2))
+        write_json(out)
         return
 
     console.print(Panel(f"[bold cyan]MCP Tool Registry[/bold cyan]", subtitle=f"Ref: {status.ref}"))
@@ -1076,20 +1192,148 @@ def registry(
         
     console.print("\n[bold]Artifacts[/bold]")
     for art, exists in artifacts.items():
-        state = "[green]✓[/green]" if exists else "[dim]missing[/dim]"
+        if exists:
+            state = "[green]✓[/green]"
+        elif art in unpublished:
+            state = "[dim]not published[/dim]"
+        else:
+            state = "[dim]missing[/dim]"
         console.print(f"  {state} {art}")
 
 
+cache_app = typer.Typer(help="Inspect and clean up the local registry cache.", no_args_is_help=True)
+app.add_typer(cache_app, name="cache")
+
+
+def _format_bytes(n: int) -> str:
+    """Human-readable byte count (binary units)."""
+    size = float(n)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{n} B" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+@cache_app.command("stats")
+def cache_stats_command(
+    json_output: Annotated[bool, typer.Option("--json", help="Output as JSON")] = False,
+) -> None:
+    """Show disk usage of cached refs and the shared blob store."""
+    stats = cache_stats(registry_cache_root(), cache_max_bytes())
+
+    if json_output:
+        out = {
+            "root": str(stats.root),
+            "total_bytes": stats.total_bytes,
+            "saved_bytes": stats.saved_bytes,
+            "max_bytes": stats.max_bytes,
+            "blobs": stats.blob_count,
+            "blob_bytes": stats.blob_bytes,
+            "orphan_blobs": stats.orphan_blobs,
+            "refs": [
+                {
+                    "ref": u.ref,
+                    "files": u.files,
+                    "own_bytes": u.own_bytes,
+                    "shared_bytes": u.shared_bytes,
+                    "last_used": datetime.fromtimestamp(u.last_used).isoformat(),
+                }
+                for u in stats.refs
+            ],
+        }
+        write_json(out)
+        return
+
+    limit = _format_bytes(stats.max_bytes) if stats.max_bytes else "unbounded"
+    console.print(Panel("[bold cyan]Registry Cache[/bold cyan]", subtitle=str(stats.root)))
+    console.print(f"  [bold]Size:[/bold]  {_format_bytes(stats.total_bytes)} of {limit}")
+    console.print(
+        f"  [bold]Blobs:[/bold] {stats.blob_count} ({_format_bytes(stats.blob_bytes)}, "
+        f"{_format_bytes(stats.saved_bytes)} saved by sharing)"
+    )
+    if stats.orphan_blobs:
+        console.print(f"  [yellow]Unreferenced blobs:[/yellow] {stats.orphan_blobs} (run [cyan]mcpt cache gc[/cyan])")
+
+    if not stats.refs:
+        console.print("\n[dim]No cached refs.[/dim]")
+        return
+
+    table = Table(title="Cached refs (most recently used first)")
+    table.add_column("Ref", style="cyan")
+    table.add_column("Files", justify="right")
+    table.add_column("Own", justify="right")
+    table.add_column("Shared", justify="right")
+    table.add_column("Last used")
+    for u in stats.refs:
+        table.add_row(
+            u.ref,
+            str(u.files),
+            _format_bytes(u.own_bytes),
+            _format_bytes(u.shared_bytes),
+            datetime.fromtimestamp(u.last_used).strftime("%Y-%m-%d %H:%M"),
+        )
+    console.print()
+    console.print(table)
+
+
+@cache_app.command("gc")
+def cache_gc(
+    max_size: Annotated[
+        Optional[str],
+        typer.Option("--max-size", help="Evict refs until the cache fits (e.g. 200M; default: MCPT_CACHE_MAX_BYTES or 256M)"),
+    ] = None,
+    keep: Annotated[
+        Optional[List[str]],
+        typer.Option("--keep", help="Ref to keep regardless of age (repeatable)"),
+    ] = None,
+    dry_run: Annotated[bool, typer.Option("--dry-run", help="Report what would be removed")] = False,
+    json_output: Annotated[bool, typer.Option("--json", help="Output as JSON")] = False,
+) -> None:
+    """Evict least recently used refs and remove unreferenced blobs."""
+    if max_size is not None:
+        try:
+            max_bytes: int | None = parse_size(max_size) or None
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            raise typer.Exit(1)
+    else:
+        max_bytes = cache_max_bytes()
+
+    # The default ref is what most commands read; never evict it implicitly
+    kept = set(keep or []) | {RegistryConfig().ref}
+    result = collect_garbage(registry_cache_root(), max_bytes, keep=kept, dry_run=dry_run)
+
+    if json_output:
+        out = {
+            "evicted": result.evicted,
+            "removed_blobs": result.removed_blobs,
+            "freed_bytes": result.freed_bytes,
+            "total_bytes": result.total_bytes,
+            "dry_run": result.dry_run,
+        }
+        write_json(out)
+        return
+
+    verb = "Would free" if dry_run else "Freed"
+    console.print(f"[bold]{verb}[/bold] {_format_bytes(result.freed_bytes)}")
+    for ref in result.evicted:
+        console.print(f"  [dim]evict[/dim] {ref}")
+    if result.removed_blobs:
+        console.print(f"  [dim]blobs[/dim] {result.removed_blobs} unreferenced")
+    console.print(f"[dim]Cache size: {_format_bytes(result.total_bytes)}[/dim]")
+
+
 @app.command()
 def check(
-    tool_id: Annotated[str, typer.Argument(help="Tool ID to check")],
+    tool_id: Annotated[str, typer.Argument(help="Tool ID to check", autocompletion=complete_tool_ids)],
     json_output: Annotated[bool, typer.Option("--json", help="Output as JSON")] = False,
 ) -> None:
     """Pre-flight check for tool execution."""
     tool = get_tool(tool_id)
     if not tool:
         if json_output:
-             console.print(json.dumps({"error": "Tool not found"}, indent=2))
+             write_json({"error": "Tool not found"})
         else:
              console.print(f"[red]Tool not found:[/red] {tool_id}")
         raise typer.Exit(1)
@@ -1140,7 +1384,7 @@ def check(
     checks["install_details"] = installed_record
     
     if json_output:
-        console.print(json.dumps(checks, indent=2))
+        write_json(checks)
         return
         
     console.print(Panel(f"[bold cyan]Preflight Check: {tool_id}[/bold cyan]"))
@@ -1209,7 +1453,9 @@ def check(
 
 
 @app.command()
-def doctor() -> None:
+def doctor(
+    force: Annotated[bool, typer.Option("--force", help="Check connectivity even for a pinned (immutable) ref")] = False,
+) -> None:
     """Check MCPT CLI configuration and connectivity."""
     console.print("[bold]MCPT Doctor[/bold]")
     console.print()
@@ -1243,15 +1489,18 @@ def doctor() -> None:
 
     # Check remote connectivity
     console.print()
-    console.print("[dim]Checking remote connectivity...[/dim]")
-    try:
-        registry = get_registry(force_refresh=True)
-        tool_count = len(registry.get("tools", []))
-        console.print(f"[green]Remote OK[/green] - {tool_count} tools fetched")
-    except Exception as e:
-        console.print(f"[red]Remote error:[/red] {e}")
-        if status.cache_exists:
-            console.print(f"[yellow]Using cached registry ({status.tool_count} tools)[/yellow]")
+    if status.cache_exists and is_immutable_ref(status.ref) and not force:
+        console.print("[dim]Pinned ref is cached and immutable - skipping remote check (use --force)[/dim]")
+    else:
+        console.print("[dim]Checking remote connectivity...[/dim]")
+        try:
+            registry = get_registry(force_refresh=True, force=force)
+            tool_count = len(registry.get("tools", []))
+            console.print(f"[green]Remote OK[/green] - {tool_count} tools fetched")
+        except Exception as e:
+            console.print(f"[red]Remote error:[/red] {e}")
+            if status.cache_exists:
+                console.print(f"[yellow]Using cached registry ({status.tool_count} tools)[/yellow]")
 
     # Check for mcp.yaml in current directory
     console.print()
@@ -0,0 +1,220 @@
+"""Shell completion served from a precomputed completion cache.
+
+Typer's own completion imports the whole CLI and would parse the registry
+on every keypress. Instead, whenever a registry is saved its tool ids,
+tags, capabilities, bundle names and collection slugs are written to a
+small sorted file in the cache root, one "<kind>\\t<value>" line each.
+Completing a value is then one read and a prefix scan of that file.
+
+The shell side is Typer's completion script (mcpt --install-completion):
+it runs mcpt with _MCPT_COMPLETE set. The mcpt entry point hands those
+requests to serve_completion before importing the CLI; it answers the
+arguments listed in ARGUMENT_KINDS and OPTION_KINDS and leaves commands,
+options and everything else to Typer.
+
+This module must stay importable without Rich, httpx or the registry
+package.
+"""
+
+from __future__ import annotations
+
+import os
+import shlex
+import sys
+from pathlib import Path
+from typing import Callable, Iterable, Mapping, TextIO
+
+COMPLETION_FILENAME = "completions.txt"
+
+# Environment variable Typer's completion scripts set for mcpt
+COMPLETE_VAR = "_MCPT_COMPLETE"
+
+# Kinds of completed values
+TOOL = "tool"
+TAG = "tag"
+CAPABILITY = "cap"
+BUNDLE = "bundle"
+COLLECTION = "collection"
+
+# Command -> kind of each of its positional arguments
+ARGUMENT_KINDS: dict[str, tuple[str, ...]] = {
+    "info": (TOOL,),
+    "add": (TOOL,),
+    "install": (TOOL,),
+    "run": (TOOL,),
+    "check": (TOOL,),
+    "grant": (TOOL, CAPABILITY),
+}
+
+# Option -> kind of its value
+OPTION_KINDS = {
+    "--bundle": BUNDLE,
+    "--tag": TAG,
+    "--collection": COLLECTION,
+    "-c": COLLECTION,
+}
+
+# Other options of the commands above that take a value, so the word after
+# them is not a positional argument
+VALUE_OPTIONS = frozenset({"--ref", "--path", "-p", "--venv", "--mode"})
+
+_SHELLS = {
+    "complete_bash": "bash",
+    "complete_zsh": "zsh",
+    "complete_fish": "fish",
+}
+
+
+def completion_cache_path() -> Path:
+    """Where the completion cache lives: the registry cache root."""
+    from platformdirs import user_cache_dir
+
+    return Path(user_cache_dir("mcp", "mcp-tool-shop")) / "registry" / COMPLETION_FILENAME
+
+
+def build_completions(
+    tools: Iterable[Mapping[str, object]],
+    bundles: Iterable[str] = (),
+    collections: Iterable[str] = (),
+) -> bytes:
+    """Contents of a completion cache for the given tools, bundles and collections."""
+    entries: set[tuple[str, object]] = set()
+    for tool in tools:
+        entries.add((TOOL, tool.get("id")))
+        for kind, key in ((TAG, "tags"), (CAPABILITY, "capabilities")):
+            values = tool.get(key)
+            if isinstance(values, list):
+                entries.update((kind, v) for v in values)
+    entries.update((BUNDLE, b) for b in bundles)
+    entries.update((COLLECTION, c) for c in collections)
+    lines = sorted(
+        f"{kind}\t{value}\n".encode("utf-8")
+        for kind, value in entries
+        if isinstance(value, str) and value and not any(c in value for c in "\t\r\n")
+    )
+    return b"".join(lines)
+
+
+def complete(path: Path, kind: str, prefix: str) -> list[str]:
+    """Cached values of a kind starting with prefix, in sorted order."""
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return []
+    key = f"{kind}\t{prefix}".encode("utf-8")
+    # Lines are sorted, so the matches are the lines from the first match on
+    if data.startswith(key):
+        start = 0
+    else:
+        start = data.find(b"\n" + key)
+        if start < 0:
+            return []
+        start += 1
+    head = len(kind) + 1
+    out: list[str] = []
+    for line in data[start:].split(b"\n"):
+        if not line.startswith(key):
+            break
+        out.append(line[head:].decode("utf-8"))
+    return out
+
+
+def completer(kind: str) -> Callable[[str], list[str]]:
+    """A Typer autocompletion callback completing values of a kind."""
+
+    def complete_values(incomplete: str) -> list[str]:
+        return complete(completion_cache_path(), kind, incomplete)
+
+    return complete_values
+
+
+def completion_kind(args: list[str], incomplete: str) -> str | None:
+    """Kind of value being completed after args, or None if it is not one
+    the completion cache serves."""
+    if incomplete.startswith("-"):
+        return None
+    if args and args[-1] in OPTION_KINDS:
+        return OPTION_KINDS[args[-1]]
+    command: str | None = None
+    position = 0
+    skip = False
+    for word in args:
+        if skip:
+            skip = False
+        elif word.startswith("-"):
+            skip = word in VALUE_OPTIONS or word in OPTION_KINDS
+        elif command is None:
+            command = word
+        else:
+            position += 1
+    if skip or command is None:
+        return None
+    kinds = ARGUMENT_KINDS.get(command, ())
+    return kinds[position] if position < len(kinds) else None
+
+
+def _split_args(line: str) -> list[str]:
+    """Split a command line like a shell, keeping an unterminated last word."""
+    lex = shlex.shlex(line, posix=True)
+    lex.whitespace_split = True
+    lex.commenters = ""
+    out: list[str] = []
+    try:
+        for token in lex:
+            out.append(token)
+    except ValueError:
+        out.append(lex.token)
+    return out
+
+
+def _zsh_escape(s: str) -> str:
+    return s.replace('"', '""').replace("'", "''").replace("$", "\\$").replace("`", "\\`").replace(":", r"\\:")
+
+
+def serve_completion(
+    environ: Mapping[str, str] | None = None,
+    out: TextIO | None = None,
+    path: Path | None = None,
+) -> int | None:
+    """Answer a shell completion request from the completion cache.
+
+    Returns the exit status once the request is answered, or None when
+    environ holds no completion request this module serves; the caller
+    then runs the CLI, and Typer handles it. Output follows Typer's
+    completion scripts for bash, zsh and fish.
+    """
+    if environ is None:
+        environ = os.environ
+    shell = _SHELLS.get(environ.get(COMPLETE_VAR, ""))
+    if shell is None:
+        return None
+    if shell == "bash":
+        words = _split_args(environ.get("COMP_WORDS", ""))
+        try:
+            cword = int(environ.get("COMP_CWORD", ""))
+        except ValueError:
+            return None
+        args = words[1:cword]
+        incomplete = words[cword] if cword < len(words) else ""
+    else:
+        line = environ.get("_TYPER_COMPLETE_ARGS", "")
+        args = _split_args(line)[1:]
+        incomplete = args.pop() if args and not line.endswith(" ") else ""
+    kind = completion_kind(args, incomplete)
+    if kind is None:
+        return None
+
+    values = complete(path or completion_cache_path(), kind, incomplete)
+    if out is None:
+        out = sys.stdout
+    if shell == "zsh":
+        if values:
+            listed = "\n".join(f'"{_zsh_escape(v)}"' for v in values)
+            out.write(f"_arguments '*: :(({listed}))'\n")
+        else:
+            out.write("_files\n")
+    elif shell == "fish" and environ.get("_TYPER_COMPLETE_FISH_ACTION") == "is-args":
+        return 0 if values else 1
+    elif values:
+        out.write("\n".join(values) + "\n")
+    return 0
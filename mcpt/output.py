@@ -0,0 +1,59 @@
+"""Machine-readable output written straight to stdout.
+
+--json and --ndjson output must not go through the Rich console: its
+markup parser would eat "[bracketed]" text inside strings, it wraps long
+lines at the terminal width, and on large outputs its highlighter is the
+bulk of the run time. These writers encode with the json module and write
+the text as is.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from typing import Any, Iterable, TextIO
+
+_PRETTY = json.JSONEncoder(indent=2)
+_COMPACT = json.JSONEncoder(separators=(",", ":"))
+
+
+def write_json(value: Any, out: TextIO | None = None, pretty: bool = True) -> None:
+    """Write value as one JSON document: indented, or compact if not pretty."""
+    if out is None:
+        out = sys.stdout
+    out.write((_PRETTY if pretty else _COMPACT).encode(value))
+    out.write("\n")
+    out.flush()
+
+
+def write_json_array(items: Iterable[Any], out: TextIO | None = None, pretty: bool = True) -> None:
+    """Write items as a JSON array, one element at a time.
+
+    The output matches write_json(list(items), pretty=pretty) without
+    building the list or the whole string in memory.
+    """
+    if out is None:
+        out = sys.stdout
+    if pretty:
+        encode, opening, separator, closing = _PRETTY.encode, "[\n  ", ",\n  ", "\n]\n"
+    else:
+        encode, opening, separator, closing = _COMPACT.encode, "[", ",", "]\n"
+    first = True
+    for item in items:
+        out.write(opening if first else separator)
+        text = encode(item)
+        out.write(text.replace("\n", "\n  ") if pretty else text)
+        first = False
+    out.write("[]\n" if first else closing)
+    out.flush()
+
+
+def write_ndjson(items: Iterable[Any], out: TextIO | None = None) -> None:
+    """Write each item as compact JSON on its own line, as it is produced."""
+    if out is None:
+        out = sys.stdout
+    encode = _COMPACT.encode
+    for item in items:
+        out.write(encode(item))
+        out.write("\n")
+    out.flush()
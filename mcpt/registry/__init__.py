@@ -1,33 +1,59 @@
 """Registry client for MCP tool registry."""
 
+from .cache import CacheStats, GcResult, cache_max_bytes, cache_stats, collect_garbage, parse_size
+
 from .client import (
+    FreshnessPolicy,
     RegistryConfig,
     RegistryFetchError,
     RegistryStatus,
+    clear_registry_memo,
     fetch_registry,
     get_registry,
     get_registry_status,
     get_tool,
+    is_immutable_ref,
+    iter_tools,
+    load_cache_meta,
     load_cached_registry,
+    registry_cache_root,
     save_cached_registry,
     search_tools,
+    similar_tools,
     load_cached_artifact,
     get_bundle_membership,
 )
 from .featured import get_featured, FeaturedData, Section, Collection
+from .query import Query, QueryError, parse_query
 
 __all__ = [
+    "CacheStats",
+    "GcResult",
+    "cache_max_bytes",
+    "cache_stats",
+    "collect_garbage",
+    "parse_size",
+    "FreshnessPolicy",
     "RegistryConfig",
     "RegistryFetchError",
     "RegistryStatus",
+    "clear_registry_memo",
     "fetch_registry",
     "get_registry",
     "get_registry_status",
     "get_tool",
+    "is_immutable_ref",
+    "iter_tools",
+    "load_cache_meta",
     "load_cached_registry",
+    "registry_cache_root",
     "save_cached_registry",
     "search_tools",
+    "similar_tools",
     "load_cached_artifact",
     "get_bundle_membership",
     "get_featured",
+    "Query",
+    "QueryError",
+    "parse_query",
 ]
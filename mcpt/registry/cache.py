@@ -0,0 +1,396 @@
+"""Content-addressed blob store and eviction for the registry cache.
+
+The cache root holds one directory per ref plus a shared blob store:
+
+    .blobs/<aa>/<sha256>       cached file bytes, stored once
+    <ref>/manifest.json        relative file name -> blob digest
+    <ref>/registry.json        hard link to its blob (a copy where links fail)
+    <ref>/registry.snapshot    likewise
+    <ref>/dist/<artifact>      likewise
+
+Ref directories keep their usual layout, so readers never look at the blob
+store. Files that are not in the manifest (the small metadata and validator
+sidecars, which hold per-ref state) belong to their ref alone.
+
+A blob's mtime says nothing about any one ref, since every ref linking it
+shares the inode. Per-ref times therefore live in the manifest, which no
+other ref shares: its "fetched_at" field records when the ref was last
+fetched, and its mtime when it was last used (see touch_ref).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from .storage import atomic_write_bytes, atomic_write_text, cache_lock
+
+BLOBS_DIRNAME = ".blobs"
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Default bound on the whole cache, overridden by MCPT_CACHE_MAX_BYTES
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Unreferenced blobs younger than this may belong to a refresh in progress
+BLOB_GRACE_PERIOD = 300.0
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """Parse a byte count such as "500000", "200M" or "1.5GiB"."""
+    match = _SIZE_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+def cache_max_bytes() -> int | None:
+    """Size bound for the cache from MCPT_CACHE_MAX_BYTES (0: unbounded)."""
+    value = os.environ.get("MCPT_CACHE_MAX_BYTES", "").strip()
+    if not value:
+        return DEFAULT_CACHE_MAX_BYTES
+    try:
+        limit = parse_size(value)
+    except ValueError:
+        return DEFAULT_CACHE_MAX_BYTES
+    return limit or None
+
+
+def blob_path(root: Path, digest: str) -> Path:
+    """Location of a blob in the store under root."""
+    return root / BLOBS_DIRNAME / digest[:2] / digest
+
+
+def _blob_intact(p: Path, data: bytes, digest: str) -> bool:
+    try:
+        if p.stat().st_size != len(data):
+            return False
+        return hashlib.sha256(p.read_bytes()).hexdigest() == digest
+    except OSError:
+        return False
+
+
+def store_blob(root: Path, data: bytes) -> str:
+    """Add data to the blob store and return its sha256 digest.
+
+    An existing blob is verified rather than trusted, since a hard-linked
+    cache file edited in place changes the blob too. An intact blob is left
+    untouched: other refs link it, and their files would change with it.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    p = blob_path(root, digest)
+    if not _blob_intact(p, data, digest):
+        atomic_write_bytes(p, data)
+    return digest
+
+
+def _link_blob(blob: Path, target: Path) -> None:
+    """Atomically make target a hard link to blob, copying if links fail."""
+    try:
+        if os.path.samefile(blob, target):
+            return
+    except OSError:
+        pass
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.parent / f".{target.name}.{os.urandom(6).hex()}.tmp"
+    try:
+        os.link(blob, tmp)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # No hard links here (e.g. another filesystem): keep a private copy
+        atomic_write_bytes(target, blob.read_bytes())
+        return
+    try:
+        os.replace(tmp, target)
+    finally:
+        # rename() is a no-op when both names already link the same file
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _read_manifest_payload(ref_dir: Path) -> dict:
+    try:
+        data = json.loads((ref_dir / MANIFEST_FILENAME).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data
+
+
+def read_manifest(ref_dir: Path) -> dict[str, str]:
+    """Map of file name (relative to ref_dir) -> blob digest."""
+    files = _read_manifest_payload(ref_dir).get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def read_fetched_at(ref_dir: Path) -> float | None:
+    """When the ref was last fetched (epoch seconds), if recorded."""
+    fetched_at = _read_manifest_payload(ref_dir).get("fetched_at")
+    return float(fetched_at) if isinstance(fetched_at, (int, float)) else None
+
+
+def write_manifest(ref_dir: Path, files: dict[str, str], fetched_at: float | None = None) -> None:
+    payload: dict = {"version": MANIFEST_VERSION}
+    if fetched_at is not None:
+        payload["fetched_at"] = fetched_at
+    payload["files"] = dict(sorted(files.items()))
+    atomic_write_text(ref_dir / MANIFEST_FILENAME, json.dumps(payload, indent=2) + "\n")
+
+
+def record_fetch(ref_dir: Path, when: float | None = None) -> None:
+    """Record that the ref was fetched at when (default: now)."""
+    write_manifest(ref_dir, read_manifest(ref_dir), time.time() if when is None else when)
+
+
+def store_files(root: Path, ref_dir: Path, files: dict[str, bytes]) -> None:
+    """Store files for one ref in the blob store and link them into ref_dir.
+
+    Keys are paths relative to ref_dir using "/" separators. The ref's
+    recorded fetch time is kept; see record_fetch.
+    """
+    if not files:
+        return
+    manifest = read_manifest(ref_dir)
+    fetched_at = read_fetched_at(ref_dir)
+    for name, data in files.items():
+        digest = store_blob(root, data)
+        try:
+            _link_blob(blob_path(root, digest), ref_dir / name)
+        except FileNotFoundError:
+            # A concurrent gc swept the blob between storing and linking
+            digest = store_blob(root, data)
+            _link_blob(blob_path(root, digest), ref_dir / name)
+        manifest[name] = digest
+    write_manifest(ref_dir, manifest, fetched_at)
+
+
+def touch_ref(ref_dir: Path) -> None:
+    """Record that a ref was used, for least-recently-used eviction."""
+    try:
+        os.utime(ref_dir / MANIFEST_FILENAME)
+    except OSError:
+        pass
+
+
+@dataclass
+class RefUsage:
+    """Disk usage of one cached ref.
+
+    own_bytes counts the files only this ref holds: its private files plus
+    blobs no other ref links. shared_bytes counts blobs linked by other refs
+    too, which evicting this ref would not free.
+    """
+
+    ref: str
+    path: Path
+    last_used: float
+    files: int = 0
+    own_bytes: int = 0
+    shared_bytes: int = 0
+    blobs: set[str] = field(default_factory=set)
+    private_bytes: int = 0
+
+
+@dataclass
+class CacheStats:
+    """Disk usage of the registry cache."""
+
+    root: Path
+    refs: list[RefUsage]
+    blob_count: int
+    blob_bytes: int
+    orphan_blobs: int
+    total_bytes: int
+    logical_bytes: int
+    max_bytes: int | None
+
+    @property
+    def saved_bytes(self) -> int:
+        """Bytes saved by storing artifacts shared between refs once."""
+        return max(0, self.logical_bytes - self.total_bytes)
+
+
+@dataclass
+class GcResult:
+    """What a garbage collection removed (or would remove, on a dry run)."""
+
+    evicted: list[str]
+    removed_blobs: int
+    freed_bytes: int
+    total_bytes: int
+    dry_run: bool = False
+
+
+def _ref_dirs(root: Path) -> list[Path]:
+    try:
+        entries = list(root.iterdir())
+    except OSError:
+        return []
+    return sorted(p for p in entries if p.is_dir() and not p.name.startswith("."))
+
+
+def _blob_sizes(root: Path) -> dict[str, tuple[int, float]]:
+    """digest -> (size, mtime) for every blob in the store."""
+    blobs: dict[str, tuple[int, float]] = {}
+    store = root / BLOBS_DIRNAME
+    if not store.is_dir():
+        return blobs
+    for shard in store.iterdir():
+        if not shard.is_dir():
+            continue
+        for p in shard.iterdir():
+            if p.name.startswith("."):
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            blobs[p.name] = (st.st_size, st.st_mtime)
+    return blobs
+
+
+def _scan_ref(root: Path, ref_dir: Path) -> RefUsage:
+    """Walk a ref directory, splitting its files into blob links and private files."""
+    manifest = read_manifest(ref_dir)
+    try:
+        last_used = (ref_dir / MANIFEST_FILENAME).stat().st_mtime
+    except OSError:
+        last_used = ref_dir.stat().st_mtime
+    usage = RefUsage(ref=ref_dir.name, path=ref_dir, last_used=last_used)
+    linked = {os.path.normpath(ref_dir / name): digest for name, digest in manifest.items()}
+    for dirpath, _dirnames, filenames in os.walk(ref_dir):
+        for filename in filenames:
+            p = os.path.join(dirpath, filename)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            usage.files += 1
+            digest = linked.get(os.path.normpath(p))
+            if digest is not None:
+                try:
+                    if os.path.samefile(p, blob_path(root, digest)):
+                        usage.blobs.add(digest)
+                        continue
+                except OSError:
+                    pass
+            usage.private_bytes += st.st_size
+    return usage
+
+
+def _scan(root: Path) -> tuple[list[RefUsage], dict[str, tuple[int, float]], dict[str, int]]:
+    """Scan the cache: per-ref usage, blob sizes and blob reference counts."""
+    refs = [_scan_ref(root, d) for d in _ref_dirs(root)]
+    blobs = _blob_sizes(root)
+    refcount: dict[str, int] = {}
+    for usage in refs:
+        for digest in usage.blobs:
+            refcount[digest] = refcount.get(digest, 0) + 1
+    for usage in refs:
+        usage.own_bytes = usage.private_bytes
+        for digest in usage.blobs:
+            size = blobs.get(digest, (0, 0.0))[0]
+            if refcount[digest] == 1:
+                usage.own_bytes += size
+            else:
+                usage.shared_bytes += size
+    return refs, blobs, refcount
+
+
+def cache_stats(root: Path, max_bytes: int | None = None) -> CacheStats:
+    """Report disk usage of the cache under root, most recently used ref first."""
+    refs, blobs, refcount = _scan(root)
+    blob_bytes = sum(size for size, _ in blobs.values())
+    logical = sum(
+        u.private_bytes + sum(blobs.get(d, (0, 0.0))[0] for d in u.blobs) for u in refs
+    )
+    return CacheStats(
+        root=root,
+        refs=sorted(refs, key=lambda u: u.last_used, reverse=True),
+        blob_count=len(blobs),
+        blob_bytes=blob_bytes,
+        orphan_blobs=sum(1 for d in blobs if d not in refcount),
+        total_bytes=blob_bytes + sum(u.private_bytes for u in refs),
+        logical_bytes=logical,
+        max_bytes=max_bytes,
+    )
+
+
+def collect_garbage(
+    root: Path,
+    max_bytes: int | None,
+    keep: Iterable[str] = (),
+    dry_run: bool = False,
+) -> GcResult:
+    """Evict least recently used refs until the cache fits in max_bytes.
+
+    Refs named in keep are never evicted, nor are refs whose cache lock is
+    held by a refresh in progress. Blobs no remaining ref links are removed
+    once they are older than BLOB_GRACE_PERIOD. max_bytes of None only
+    sweeps unreferenced blobs.
+    """
+    keep = set(keep)
+    refs, blobs, refcount = _scan(root)
+    total = sum(size for size, _ in blobs.values()) + sum(u.private_bytes for u in refs)
+    now = time.time()
+    # Unreferenced at scan time and old enough not to belong to a refresh
+    garbage = {
+        digest
+        for digest, (_size, mtime) in blobs.items()
+        if digest not in refcount and now - mtime >= BLOB_GRACE_PERIOD
+    }
+    evicted: list[str] = []
+    freed = 0
+
+    for usage in sorted(refs, key=lambda u: u.last_used):
+        if max_bytes is None or total - sum(blobs[d][0] for d in garbage) <= max_bytes:
+            break
+        if usage.ref in keep:
+            continue
+        if not dry_run:
+            with cache_lock(usage.path, timeout=0) as locked:
+                if not locked:
+                    continue
+                shutil.rmtree(usage.path, ignore_errors=True)
+        evicted.append(usage.ref)
+        total -= usage.private_bytes
+        freed += usage.private_bytes
+        for digest in usage.blobs:
+            refcount[digest] -= 1
+            if refcount[digest] == 0:
+                del refcount[digest]
+                if digest in blobs:
+                    garbage.add(digest)
+
+    removed = 0
+    for digest in sorted(garbage):
+        if not dry_run:
+            try:
+                blob_path(root, digest).unlink()
+            except OSError:
+                continue
+        removed += 1
+        total -= blobs[digest][0]
+        freed += blobs[digest][0]
+
+    return GcResult(
+        evicted=evicted,
+        removed_blobs=removed,
+        freed_bytes=freed,
+        total_bytes=total,
+        dry_run=dry_run,
+    )
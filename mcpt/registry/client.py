@@ -2,20 +2,106 @@
 
 from __future__ import annotations
 
+import hashlib
+import heapq
 import json
 import os
-from dataclasses import dataclass
-from datetime import datetime
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import chain, islice
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
 
-import httpx
 from platformdirs import user_cache_dir
 
+from mcpt.completion import COMPLETION_FILENAME, build_completions
+
+from .cache import (
+    cache_max_bytes,
+    collect_garbage,
+    read_fetched_at,
+    record_fetch,
+    store_files,
+    touch_ref,
+)
+from .index import (
+    NGRAM,
+    SearchIndex,
+    TrigramIndex,
+    lower_fields,
+    tokenize,
+)
+from .storage import (
+    atomic_write_bytes,
+    atomic_write_text,
+    cache_lock,
+    compress_for_cache,
+    open_cached,
+    read_cached_bytes,
+)
+from .model import SearchHit
+from .query import (
+    FieldPostings,
+    Query,
+    bit_positions,
+    bitmap,
+    normalize_capability,
+    parse_query,
+    select,
+)
+from .records import RecordStore, build_snapshot, load_registry, open_snapshot
+from .stream import iter_json_array
+
+if TYPE_CHECKING:
+    import httpx
+
 # Registry defaults - pin to stable release for new workspaces
 DEFAULT_REGISTRY_SOURCE = "https://github.com/mcp-tool-shop-org/mcp-tool-registry"
 DEFAULT_REF = "v0.3.0"
 
+REGISTRY_FILENAME = "registry.json"
+VALIDATORS_FILENAME = "validators.json"
+SNAPSHOT_FILENAME = "registry.snapshot"
+# Snapshot sections holding the precomputed field bitmaps (see field_postings)
+# and the packed search index (see get_search_index)
+POSTINGS_SECTION = "postings"
+SEARCH_SECTION = "search"
+# Search index file written next to the registry by earlier versions
+LEGACY_SEARCH_INDEX_FILENAME = "search.index.json"
+META_FILENAME = "meta.json"
+REFRESH_MARKER_FILENAME = "refresh.pending"
+
+# Seconds a dist/ artifact that answered 404 is not requested again
+# (forever for immutable refs)
+MISSING_ARTIFACT_TTL = 24 * 3600.0
+
+# Minimum seconds between background refreshes started for one ref
+REFRESH_MARKER_TTL = 60.0
+
+# Network budget for a refresh: per-request timeouts and an overall deadline
+REGISTRY_TIMEOUT = 20.0
+ARTIFACT_TIMEOUT = 10.0
+REFRESH_DEADLINE = 30.0
+
+# Seconds to wait for another process's refresh before fetching unlocked
+LOCK_TIMEOUT = REFRESH_DEADLINE + 15.0
+
+# Number of trigram candidates rescored for "Did you mean" suggestions
+FUZZY_CANDIDATES = 50
+
+# Supplementary artifacts published under <ref>/dist/
+DIST_ARTIFACTS = [
+    "registry.index.json",
+    "capabilities.json",
+    "featured.json",
+    "registry.report.json",
+    "registry.llms.txt",
+]
+
 
 def github_raw_registry_url(source: str, ref: str) -> str:
     """Convert GitHub repo URL to raw registry.json URL."""
@@ -32,10 +118,312 @@ class RegistryConfig:
     ref: str = DEFAULT_REF
 
 
+_COMMIT_SHA_RE = re.compile(r"^(?:[0-9a-f]{40}|[0-9a-f]{64})$")
+_VERSION_TAG_RE = re.compile(r"^v?\d+(?:\.\d+)+(?:[-+][0-9A-Za-z.-]+)?$")
+
+
+def immutable_tags_enabled() -> bool:
+    """Whether version tags count as immutable (MCPT_IMMUTABLE_TAGS=1)."""
+    return os.environ.get("MCPT_IMMUTABLE_TAGS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def is_immutable_ref(ref: str, immutable_tags: bool | None = None) -> bool:
+    """Whether a registry ref always names the same content.
+
+    Full commit SHAs are immutable. Version tags such as v0.3.0 are
+    immutable only when the tag policy allows it (immutable_tags, default
+    from MCPT_IMMUTABLE_TAGS); branches like main are always mutable.
+    """
+    if _COMMIT_SHA_RE.match(ref.lower()):
+        return True
+    if immutable_tags is None:
+        immutable_tags = immutable_tags_enabled()
+    return immutable_tags and bool(_VERSION_TAG_RE.match(ref))
+
+
+@dataclass(frozen=True)
+class FreshnessPolicy:
+    """How long a cached registry is served before it is refreshed.
+
+    max_age: seconds a cache is fresh and served as-is (None: forever).
+    stale_while_revalidate: seconds past max_age during which the stale
+        cache is still served immediately while a detached process
+        refreshes it (None: no upper bound). Older caches are refetched
+        before answering.
+    """
+
+    max_age: float | None = None
+    stale_while_revalidate: float | None = None
+
+    @classmethod
+    def from_env(cls) -> FreshnessPolicy:
+        """Read the policy from MCPT_REGISTRY_MAX_AGE / MCPT_REGISTRY_SWR."""
+
+        def seconds(name: str) -> float | None:
+            value = os.environ.get(name, "").strip()
+            if not value:
+                return None
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+
+        return cls(
+            max_age=seconds("MCPT_REGISTRY_MAX_AGE"),
+            stale_while_revalidate=seconds("MCPT_REGISTRY_SWR"),
+        )
+
+    def classify(self, age: float) -> str:
+        """Return "fresh", "stale" or "expired" for a cache of the given age."""
+        if self.max_age is None or age <= self.max_age:
+            return "fresh"
+        if self.stale_while_revalidate is None or age <= self.max_age + self.stale_while_revalidate:
+            return "stale"
+        return "expired"
+
+
 def registry_cache_path(cfg: RegistryConfig) -> Path:
     """Get the cache path for the registry."""
     base = Path(user_cache_dir("mcp", "mcp-tool-shop"))
-    return base / "registry" / cfg.ref / "registry.json"
+    return base / "registry" / cfg.ref / REGISTRY_FILENAME
+
+
+def registry_cache_root() -> Path:
+    """Directory holding every cached ref and the shared blob store."""
+    return registry_cache_path(RegistryConfig()).parent.parent
+
+
+def _store_cache_files(cfg: RegistryConfig, files: dict[str, bytes]) -> None:
+    """Write cache files for cfg through the content-addressed blob store."""
+    store_files(registry_cache_root(), registry_cache_path(cfg).parent, files)
+
+
+def _fetched_at(cfg: RegistryConfig) -> float | None:
+    """When cfg's cache was last fetched, in epoch seconds.
+
+    This is the time recorded in the ref's manifest. registry.json's mtime
+    is only a fallback for caches written before it was recorded: the file
+    is a hard link to a blob other refs share.
+    """
+    p = registry_cache_path(cfg)
+    fetched_at = read_fetched_at(p.parent)
+    if fetched_at is not None:
+        return fetched_at
+    stamp = _file_stamp(p)
+    return stamp[0] / 1e9 if stamp is not None else None
+
+
+def _cache_age(cfg: RegistryConfig) -> float:
+    fetched_at = _fetched_at(cfg)
+    return time.time() - fetched_at if fetched_at is not None else 0.0
+
+
+# Per-process memo of parsed cache files: (cfg, key, path) -> (stamp, value).
+# The stamp is the file's (mtime_ns, size, inode), so a refresh by this or
+# another process invalidates the entry on the next access.
+_MEMO: dict[tuple[RegistryConfig, str, str], tuple[tuple[int, int, int], Any]] = {}
+
+
+def _file_stamp(p: Path) -> tuple[int, int, int] | None:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _memo_get(cfg: RegistryConfig, key: str, p: Path) -> Any | None:
+    """Return the memoized value for a cache file if it is still current."""
+    stamp = _file_stamp(p)
+    hit = _MEMO.get((cfg, key, str(p)))
+    if stamp is not None and hit is not None and hit[0] == stamp:
+        return hit[1]
+    return None
+
+
+def _memo_put(cfg: RegistryConfig, key: str, p: Path, value: Any) -> None:
+    stamp = _file_stamp(p)
+    if stamp is not None and value is not None:
+        _MEMO[(cfg, key, str(p))] = (stamp, value)
+
+
+# Structures derived from a parsed registry (id index, search index, ...).
+# Only the registry most recently asked about keeps them: it is held here
+# and compared by identity, so a registry replaced by a refresh is released
+# (with everything derived from it) as soon as the new one is used.
+_DERIVED_FROM: dict[str, Any] | None = None
+_DERIVED: dict[str, Any] = {}
+
+
+def _derived_peek(registry: dict[str, Any], key: str) -> Any | None:
+    if registry is not _DERIVED_FROM:
+        return None
+    return _DERIVED.get(key)
+
+
+def _derived_put(registry: dict[str, Any], key: str, value: Any) -> None:
+    global _DERIVED_FROM, _DERIVED
+    if registry is not _DERIVED_FROM:
+        _DERIVED_FROM, _DERIVED = registry, {}
+    _DERIVED[key] = value
+
+
+def _derived(registry: dict[str, Any], key: str, build: Callable[[dict[str, Any]], Any]) -> Any:
+    """Return build(registry), computed once while registry stays current."""
+    if registry is _DERIVED_FROM and key in _DERIVED:
+        return _DERIVED[key]
+    value = build(registry)
+    _derived_put(registry, key, value)
+    return value
+
+
+def clear_registry_memo() -> None:
+    """Forget every registry artifact parsed by this process."""
+    global _DERIVED_FROM, _DERIVED
+    _MEMO.clear()
+    _DERIVED_FROM, _DERIVED = None, {}
+
+
+def snapshot_path(cfg: RegistryConfig) -> Path:
+    """Get the path of the compiled registry snapshot for a cached ref."""
+    return registry_cache_path(cfg).parent / SNAPSHOT_FILENAME
+
+
+def _write_snapshot(cfg: RegistryConfig, data: dict[str, Any], digest: str) -> None:
+    """Compile a record snapshot tied to the current registry.json stamp.
+
+    The field bitmaps filters and facets run on and the search index are
+    computed here, once per registry version, and stored in the snapshot
+    with the records. The snapshot goes through the blob store like the
+    fetched files: refs sharing a registry.json blob (and so its stamp)
+    compile identical snapshots and share one copy.
+    """
+    stamp = _file_stamp(registry_cache_path(cfg))
+    if stamp is None:
+        return
+    sindex = _derived(data, "search_index", lambda reg: SearchIndex.build(reg.get("tools", [])))
+    snapshot = build_snapshot(
+        data,
+        {
+            POSTINGS_SECTION: _registry_postings(data.get("tools", [])),
+            SEARCH_SECTION: sindex.pack(),
+        },
+        json_stamp=stamp[:2],
+        digest=digest,
+    )
+    _store_cache_files(cfg, {SNAPSHOT_FILENAME: snapshot})
+
+
+def _open_snapshot(cfg: RegistryConfig) -> RecordStore | None:
+    """Map the snapshot if it was compiled from the current registry.json.
+
+    The snapshot lives in the user's own cache directory and is only ever
+    written by mcpt; anything unexpected is treated as a miss.
+    """
+    stamp = _file_stamp(registry_cache_path(cfg))
+    if stamp is None:
+        return None
+    store = open_snapshot(snapshot_path(cfg))
+    if store is None or tuple(store.header.get("json_stamp", ())) != stamp[:2]:
+        return None
+    return store
+
+
+def _snapshot_of(registry: dict[str, Any], cfg: RegistryConfig) -> RecordStore | None:
+    """The snapshot compiled from registry, if it is cfg's cached registry.
+
+    A registry loaded from (or saved to) the cache is described by the
+    snapshot of the current registry.json; any other registry has none.
+    """
+    if registry is not _memo_get(cfg, REGISTRY_FILENAME, registry_cache_path(cfg)):
+        return None
+    store = _open_snapshot(cfg)
+    if store is None or store.count != len(registry.get("tools", [])):
+        return None
+    return store
+
+
+def _read_snapshot(cfg: RegistryConfig) -> tuple[dict[str, Any], str] | None:
+    """Load the registry from its snapshot."""
+    store = _open_snapshot(cfg)
+    if store is None:
+        return None
+    try:
+        return load_registry(store), store.header["digest"]
+    except Exception:
+        return None
+
+
+def _write_completions(cfg: RegistryConfig, data: dict[str, Any]) -> None:
+    """Regenerate the shell completion cache from a saved registry.
+
+    The completion cache is shared by every ref, and the CLI always reads
+    the default ref, so only saves of that ref write it: refreshing any
+    other ref leaves the candidates alone.
+
+    Bundle names and collection slugs come from the ref's cached dist/
+    artifacts, which a fetch stores before saving the registry.
+    """
+    if registry_cache_path(cfg) != registry_cache_path(RegistryConfig()):
+        return
+    index = load_cached_artifact(cfg, "registry.index.json")
+    bundles = index.get("bundles") if isinstance(index, dict) else None
+    featured = load_cached_artifact(cfg, "featured.json")
+    collections = featured.get("collections") if isinstance(featured, dict) else None
+    content = build_completions(
+        data.get("tools", []),
+        bundles if isinstance(bundles, dict) else (),
+        [c.get("id") for c in collections if isinstance(c, dict)] if isinstance(collections, list) else (),
+    )
+    atomic_write_bytes(registry_cache_root() / COMPLETION_FILENAME, content)
+
+
+def meta_path(cfg: RegistryConfig) -> Path:
+    """Get the path of the cache metadata sidecar for a cached ref."""
+    return registry_cache_path(cfg).parent / META_FILENAME
+
+
+def _write_meta(cfg: RegistryConfig, data: dict[str, Any], digest: str) -> dict[str, Any] | None:
+    """Record what get_registry_status needs without re-reading the registry."""
+    p = registry_cache_path(cfg)
+    stamp = _file_stamp(p)
+    if stamp is None:
+        return None
+    validators = load_validators(cfg)
+    artifacts: dict[str, dict[str, Any]] = {}
+    for name, art_path in [(REGISTRY_FILENAME, p)] + [
+        (art, p.parent / "dist" / art) for art in DIST_ARTIFACTS
+    ]:
+        art_stamp = _file_stamp(art_path)
+        if art_stamp is None:
+            continue
+        artifacts[name] = {"size": art_stamp[1], **validators.get(name, {})}
+    fetched_at = _fetched_at(cfg) or time.time()
+    meta = {
+        "source": cfg.source,
+        "ref": cfg.ref,
+        "tool_count": len(data.get("tools", [])),
+        "sha256": digest,
+        "fetched_at": datetime.fromtimestamp(fetched_at, timezone.utc).isoformat(),
+        "registry_stamp": stamp[:2],
+        "artifacts": artifacts,
+    }
+    atomic_write_text(meta_path(cfg), json.dumps(meta, indent=2) + "\n")
+    return meta
+
+
+def load_cache_meta(cfg: RegistryConfig) -> dict[str, Any] | None:
+    """Load the metadata sidecar if it describes the current registry.json."""
+    stamp = _file_stamp(registry_cache_path(cfg))
+    if stamp is None:
+        return None
+    try:
+        meta = json.loads(meta_path(cfg).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(meta, dict) or tuple(meta.get("registry_stamp", ())) != stamp[:2]:
+        return None
+    return meta
 
 
 def load_cached_registry(cfg: RegistryConfig) -> dict[str, Any] | None:
@@ -43,17 +431,33 @@ def load_cached_registry(cfg: RegistryConfig) -> dict[str, Any] | None:
 
     Returns None if cache doesn't exist or is corrupted.
     Corrupted cache files are automatically deleted for self-healing.
+    The compiled snapshot is preferred when it matches registry.json; the
+    JSON file stays the portable fallback. The parsed registry is memoized
+    per process; callers must treat it as read-only.
     """
     p = registry_cache_path(cfg)
+    memoized = _memo_get(cfg, REGISTRY_FILENAME, p)
+    if memoized is not None:
+        return memoized
     if not p.exists():
         return None
 
+    snapshot = _read_snapshot(cfg)
+    if snapshot is not None:
+        data, digest = snapshot
+        _derived_put(data, "digest", digest)
+        _memo_put(cfg, REGISTRY_FILENAME, p, data)
+        return data
+
     try:
-        data = json.loads(p.read_text(encoding="utf-8"))
+        raw = read_cached_bytes(p)
+        data = json.loads(raw)
         # Validate basic structure
         if not isinstance(data, dict) or "tools" not in data:
             raise ValueError("Invalid registry structure")
-        return data
+        digest = hashlib.sha256(raw).hexdigest()
+        _derived_put(data, "digest", digest)
+        _memo_put(cfg, REGISTRY_FILENAME, p, data)
     except (json.JSONDecodeError, ValueError, OSError) as e:
         # Corrupted cache - delete and return None for self-healing
         try:
@@ -62,12 +466,57 @@ def load_cached_registry(cfg: RegistryConfig) -> dict[str, Any] | None:
             pass
         return None
 
+    # Compile a snapshot so the next process can skip JSON parsing
+    try:
+        _write_snapshot(cfg, data, digest)
+    except OSError:
+        pass
+    return data
+
 
 def save_cached_registry(cfg: RegistryConfig, data: dict[str, Any]) -> None:
-    """Save registry to local cache."""
+    """Save registry to local cache.
+
+    The registry is stored as compact JSON, gzip-compressed when large; its
+    content hash is that of the uncompressed JSON. The metadata sidecar and
+    compiled snapshot (which holds the search index) for the saved registry
+    are written alongside it, and the shell completion cache is regenerated.
+    """
     p = registry_cache_path(cfg)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    _store_cache_files(cfg, {REGISTRY_FILENAME: compress_for_cache(raw)})
+    record_fetch(p.parent)
+    digest = hashlib.sha256(raw).hexdigest()
+    _derived_put(data, "digest", digest)
+    _memo_put(cfg, REGISTRY_FILENAME, p, data)
+
+    try:
+        _write_meta(cfg, data, digest)
+        _write_snapshot(cfg, data, digest)
+        _write_completions(cfg, data)
+        (p.parent / LEGACY_SEARCH_INDEX_FILENAME).unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def _record_revalidation(cfg: RegistryConfig, data: dict[str, Any]) -> None:
+    """Record a 304 answer for the cached registry data.
+
+    The cache is current as it is, so registry.json and its snapshot are
+    not written again; only the ref's fetch time and the
+    metadata sidecar are updated, and the completion cache if a dist/
+    artifact changed.
+    """
+    p = registry_cache_path(cfg)
+    record_fetch(p.parent)
+    try:
+        digest = _derived_peek(data, "digest") or hashlib.sha256(read_cached_bytes(p)).hexdigest()
+        previous = load_cache_meta(cfg)
+        meta = _write_meta(cfg, data, digest)
+        if meta is not None and (previous is None or previous.get("artifacts") != meta["artifacts"]):
+            _write_completions(cfg, data)
+    except OSError:
+        pass
 
 
 def load_local_registry(path: Path) -> dict[str, Any]:
@@ -75,51 +524,214 @@ def load_local_registry(path: Path) -> dict[str, Any]:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def validators_path(cfg: RegistryConfig) -> Path:
+    """Get the path of the HTTP validators sidecar for a cached ref."""
+    return registry_cache_path(cfg).parent / VALIDATORS_FILENAME
+
+
+def load_validators(cfg: RegistryConfig) -> dict[str, dict[str, str]]:
+    """Load stored ETag/Last-Modified validators, keyed by artifact name."""
+    p = validators_path(cfg)
+    try:
+        data = json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_validators(cfg: RegistryConfig, validators: dict[str, dict[str, str]]) -> None:
+    """Persist ETag/Last-Modified validators next to the cached registry."""
+    p = validators_path(cfg)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(p, json.dumps(validators, indent=2, sort_keys=True) + "\n")
+
+
+def conditional_headers(entry: dict[str, str] | None) -> dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from stored validators."""
+    headers: dict[str, str] = {}
+    if not entry:
+        return headers
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _record_validators(
+    validators: dict[str, dict[str, str]],
+    name: str,
+    resp: httpx.Response,
+) -> None:
+    """Remember the validators a 200 response carried (or forget stale ones)."""
+    entry = {}
+    if resp.headers.get("ETag"):
+        entry["etag"] = resp.headers["ETag"]
+    if resp.headers.get("Last-Modified"):
+        entry["last_modified"] = resp.headers["Last-Modified"]
+    if entry:
+        validators[name] = entry
+    else:
+        validators.pop(name, None)
+
+
+def _record_not_found(validators: dict[str, dict[str, str]], name: str) -> None:
+    """Remember that an artifact is not published for this ref."""
+    validators[name] = {"not_found_at": datetime.now(timezone.utc).isoformat()}
+
+
+def is_known_missing(entry: dict[str, str] | None, ttl: float | None = MISSING_ARTIFACT_TTL) -> bool:
+    """True if a validators entry records a 404 younger than ttl (None: no expiry)."""
+    if not entry or not entry.get("not_found_at"):
+        return False
+    if ttl is None:
+        return True
+    try:
+        checked = datetime.fromisoformat(entry["not_found_at"])
+    except (TypeError, ValueError):
+        return False
+    return (datetime.now(timezone.utc) - checked).total_seconds() < ttl
+
+
+def unpublished_artifacts(cfg: RegistryConfig) -> list[str]:
+    """dist/ artifacts the server last answered 404 for on this ref."""
+    validators = load_validators(cfg)
+    return [art for art in DIST_ARTIFACTS if is_known_missing(validators.get(art), ttl=None)]
+
+
+def _http_client() -> httpx.Client:
+    """Create the pooled keep-alive client shared by one registry refresh."""
+    import httpx
+
+    return httpx.Client(
+        timeout=httpx.Timeout(ARTIFACT_TIMEOUT),
+        limits=httpx.Limits(max_connections=len(DIST_ARTIFACTS) + 1),
+    )
+
+
 def fetch_registry(cfg: RegistryConfig) -> dict[str, Any]:
-    """Fetch registry from GitHub or local file."""
+    """Fetch registry from GitHub or local file.
+
+    Remote fetches are conditional: when a cached copy and its validators
+    exist, the server can answer 304 Not Modified and the cached data is
+    reused instead of being downloaded again.
+
+    registry.json and the dist/ artifacts are requested concurrently over a
+    single pooled client. The whole refresh is bounded by REFRESH_DEADLINE;
+    artifacts that have not arrived by then are skipped.
+
+    Artifacts that answered 404 are recorded and not requested again for
+    MISSING_ARTIFACT_TTL seconds, or ever on an immutable ref.
+    """
     # Support local file paths
     source_path = Path(cfg.source)
     if source_path.exists() and source_path.is_file():
         return load_local_registry(source_path)
 
-    url = github_raw_registry_url(cfg.source, cfg.ref)
-    r = httpx.get(url, timeout=20.0)
-    r.raise_for_status()
-    data = r.json()
+    # Network-only dependencies, kept off the cached-registry path
+    from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+
+    import httpx
 
-    # Fetch additional artifacts (best effort)
+    url = github_raw_registry_url(cfg.source, cfg.ref)
+    # registry.json is at .../ref/registry.json
+    # artifacts are at .../ref/dist/...
+    base_url = url.rsplit("/", 1)[0]
+    cache_path = registry_cache_path(cfg)
+    # Cache directory: .../registry/ref/dist/
+    cache_base = cache_path.parent / "dist"
+    validators = load_validators(cfg)
+
+    # name -> (url, timeout, conditional headers)
+    planned: dict[str, tuple[str, float, dict[str, str]]] = {}
+    planned[REGISTRY_FILENAME] = (
+        url,
+        REGISTRY_TIMEOUT,
+        conditional_headers(validators.get(REGISTRY_FILENAME)) if cache_path.exists() else {},
+    )
+    missing_ttl = None if is_immutable_ref(cfg.ref) else MISSING_ARTIFACT_TTL
+    for art in DIST_ARTIFACTS:
+        if is_known_missing(validators.get(art), missing_ttl):
+            continue
+        planned[art] = (
+            f"{base_url}/dist/{art}",
+            ARTIFACT_TIMEOUT,
+            conditional_headers(validators.get(art)) if (cache_base / art).exists() else {},
+        )
+
+    deadline = time.monotonic() + REFRESH_DEADLINE
+    client = _http_client()
+    pool = ThreadPoolExecutor(max_workers=len(planned))
     try:
-        # registry.json is at .../ref/registry.json
-        # artifacts are at .../ref/dist/...
-        base_url = url.rsplit("/", 1)[0]
-
-        # Cache directory: .../registry/ref/dist/
-        cache_base = registry_cache_path(cfg).parent / "dist"
-        cache_base.mkdir(parents=True, exist_ok=True)
-
-        artifacts = [
-            "registry.index.json",
-            "capabilities.json",
-            "featured.json",
-            "registry.report.json",
-            "registry.llms.txt",
-        ]
+        futures = {
+            name: pool.submit(client.get, art_url, timeout=timeout, headers=headers)
+            for name, (art_url, timeout, headers) in planned.items()
+        }
 
-        for art in artifacts:
-            try:
-                resp = httpx.get(f"{base_url}/dist/{art}", timeout=10.0)
+        try:
+            r = futures[REGISTRY_FILENAME].result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            raise httpx.TimeoutException(
+                f"Registry refresh exceeded {REFRESH_DEADLINE:.0f}s deadline"
+            ) from None
+
+        data = None
+        if r.status_code == 304:
+            data = load_cached_registry(cfg)
+            if data is None:
+                # Cache vanished or was corrupt - fall back to a full download
+                r = client.get(url, timeout=REGISTRY_TIMEOUT)
+        if data is None:
+            r.raise_for_status()
+            data = r.json()
+            _record_validators(validators, REGISTRY_FILENAME, r)
+
+        # Collect additional artifacts (best effort)
+        try:
+            fetched: dict[str, bytes] = {}
+            wait(
+                [f for name, f in futures.items() if name != REGISTRY_FILENAME],
+                timeout=max(0.0, deadline - time.monotonic()),
+            )
+            for art in DIST_ARTIFACTS:
+                future = futures.get(art)
+                if future is None or not future.done() or future.exception() is not None:
+                    continue
+                resp = future.result()
                 if resp.status_code == 200:
-                    (cache_base / art).write_bytes(resp.content)
-            except Exception:
-                pass
+                    fetched[f"dist/{art}"] = compress_for_cache(resp.content)
+                    _record_validators(validators, art, resp)
+                elif resp.status_code == 404:
+                    _record_not_found(validators, art)
+                # 304: the cached copy is still current
+            _store_cache_files(cfg, fetched)
+        except Exception:
+            # Ensure we return the main registry even if artifact fetching fails
+            pass
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        client.close()
 
-    except Exception:
-        # Ensure we return the main registry even if artifact fetching fails
+    try:
+        save_validators(cfg, validators)
+    except OSError:
         pass
 
     return data
 
 
+def _fetch_errors() -> tuple[type[Exception], ...]:
+    """httpx's request and status errors, or none if httpx was never loaded.
+
+    httpx is imported only when a refresh goes to the network, so a run
+    served from the cache never pays for it.
+    """
+    httpx = sys.modules.get("httpx")
+    if httpx is None:
+        return ()
+    return (httpx.RequestError, httpx.HTTPStatusError)
+
+
 class RegistryFetchError(Exception):
     """Error fetching registry from remote."""
 
@@ -128,29 +740,117 @@ class RegistryFetchError(Exception):
         self.cached_available = cached_available
 
 
+def _spawn_background_refresh(cfg: RegistryConfig) -> bool:
+    """Start a detached `python -m mcpt.registry.refresh` for cfg.
+
+    A marker file next to the cache keeps concurrent commands from starting
+    more than one refresh per REFRESH_MARKER_TTL. Returns True if a refresh
+    was started.
+    """
+    marker = registry_cache_path(cfg).parent / REFRESH_MARKER_FILENAME
+    stamp = _file_stamp(marker)
+    if stamp is not None and time.time() - stamp[0] / 1e9 < REFRESH_MARKER_TTL:
+        return False
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+        kwargs: dict[str, Any] = {
+            "stdin": subprocess.DEVNULL,
+            "stdout": subprocess.DEVNULL,
+            "stderr": subprocess.DEVNULL,
+            "close_fds": True,
+        }
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        subprocess.Popen(
+            [sys.executable, "-m", "mcpt.registry.refresh", cfg.source, cfg.ref],
+            **kwargs,
+        )
+        return True
+    except OSError:
+        return False
+
+
+def _fetch_and_save(cfg: RegistryConfig) -> dict[str, Any]:
+    """Fetch and cache the registry, coalescing with other processes.
+
+    Fetch-and-save runs under an advisory lock on the ref's cache directory.
+    A process that had to wait for the lock reuses the cache written by the
+    lock holder instead of fetching again.
+    """
+    cache_path = registry_cache_path(cfg)
+    observed = (_file_stamp(cache_path), read_fetched_at(cache_path.parent))
+    with cache_lock(cache_path.parent, timeout=LOCK_TIMEOUT):
+        current = (_file_stamp(cache_path), read_fetched_at(cache_path.parent))
+        if current[0] is not None and current != observed:
+            # Another process refreshed the cache while we waited
+            data = load_cached_registry(cfg)
+            if data is not None:
+                return data
+        data = fetch_registry(cfg)
+        if data is _memo_get(cfg, REGISTRY_FILENAME, cache_path):
+            # 304 Not Modified: fetch_registry returned the cached registry
+            _record_revalidation(cfg, data)
+        else:
+            save_cached_registry(cfg, data)
+    _enforce_cache_bound(cfg)
+    return data
+
+
+def _enforce_cache_bound(cfg: RegistryConfig) -> None:
+    """Evict least recently used refs other than cfg's past the size bound."""
+    root = registry_cache_root()
+    try:
+        ref_dir = registry_cache_path(cfg).parent.relative_to(root).parts[0]
+        collect_garbage(root, cache_max_bytes(), keep={ref_dir})
+    except (OSError, ValueError, IndexError):
+        pass
+
+
 def get_registry(
     cfg: RegistryConfig | None = None,
     force_refresh: bool = False,
+    policy: FreshnessPolicy | None = None,
+    force: bool = False,
 ) -> dict[str, Any]:
     """Get registry, using cache if available unless force_refresh is True.
 
+    A cached immutable ref (see is_immutable_ref) is returned without any
+    network access, even with force_refresh, unless force is True.
+
+    The freshness policy (default: FreshnessPolicy.from_env()) decides how
+    old a cache may get. A stale cache is returned immediately and refreshed
+    by a detached process; an expired one is refetched first.
+
     On network failure:
     - If cache exists, returns cached data (graceful degradation)
     - If no cache, raises RegistryFetchError with helpful message
     """
     if cfg is None:
         cfg = RegistryConfig()
+    if policy is None:
+        policy = FreshnessPolicy.from_env()
 
     cached = load_cached_registry(cfg)
 
-    if not force_refresh and cached is not None:
+    if cached is not None:
+        touch_ref(registry_cache_path(cfg).parent)
+
+    if cached is not None and not force and is_immutable_ref(cfg.ref):
         return cached
 
+    if not force_refresh and cached is not None:
+        state = policy.classify(_cache_age(cfg)) if policy.max_age is not None else "fresh"
+        if state == "stale":
+            _spawn_background_refresh(cfg)
+        if state != "expired":
+            return cached
+
     try:
-        data = fetch_registry(cfg)
-        save_cached_registry(cfg, data)
-        return data
-    except (httpx.RequestError, httpx.HTTPStatusError) as e:
+        return _fetch_and_save(cfg)
+    except _fetch_errors() as e:
         if cached is not None:
             # Graceful degradation - return stale cache
             return cached
@@ -161,33 +861,260 @@ def get_registry(
         ) from e
 
 
+def iter_tools(cfg: RegistryConfig | None = None) -> Iterator[dict[str, Any]]:
+    """Yield the registry's tools one at a time.
+
+    A registry already loaded in this process is iterated in memory.
+    Otherwise the cached registry.json is parsed incrementally, so only one
+    tool is held at a time however large the registry is. Without a usable
+    cache (missing, or expired under the freshness policy) this falls back
+    to get_registry. A cache found to be corrupt part-way raises ValueError.
+    """
+    if cfg is None:
+        cfg = RegistryConfig()
+    p = registry_cache_path(cfg)
+    memoized = _memo_get(cfg, REGISTRY_FILENAME, p)
+    if memoized is not None:
+        yield from memoized.get("tools", [])
+        return
+
+    stamp = _file_stamp(p)
+    if stamp is not None and not is_immutable_ref(cfg.ref):
+        policy = FreshnessPolicy.from_env()
+        state = policy.classify(_cache_age(cfg)) if policy.max_age is not None else "fresh"
+        if state == "stale":
+            _spawn_background_refresh(cfg)
+        elif state == "expired":
+            stamp = None
+    if stamp is None:
+        yield from get_registry(cfg).get("tools", [])
+        return
+
+    touch_ref(p.parent)
+    with open_cached(p) as f:
+        yield from iter_json_array(f, "tools")
+
+
+def _build_tool_index(registry: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    index: dict[str, dict[str, Any]] = {}
+    for tool in registry.get("tools", []):
+        tool_id = tool.get("id")
+        # First entry wins, matching the order a linear scan would see
+        if tool_id is not None and tool_id not in index:
+            index[tool_id] = tool
+    return index
+
+
+def tool_index(registry: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Return the id -> tool mapping for a registry, built once per registry."""
+    return _derived(registry, "tool_index", _build_tool_index)
+
+
+def _string_list(value: Any) -> list[str]:
+    """value if it is a list of strings, else an empty list."""
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return value
+    return []
+
+
+def _registry_postings(tools: list[dict[str, Any]]) -> dict[str, dict[Any, int]]:
+    """Field bitmaps that depend on the registry alone.
+
+    Tag, capability, deprecation and risk bitmaps, plus "trust_keys": tools
+    grouped by the (deprecated, maturity) pair that decides their trust tier
+    together with bundle membership.
+    """
+    # Imported here: the tier rules live with the UI, which imports this package
+    from mcpt.ui.risk import calculate_risk_score, get_risk_tier
+
+    count = len(tools)
+    lists: dict[str, dict[Any, list[int]]] = {name: {} for name in ("tag", "cap", "is_", "risk", "trust_keys")}
+    for pos, tool in enumerate(tools):
+        tags = _string_list(tool.get("tags"))
+        caps = _string_list(tool.get("capabilities"))
+        for tag in dict.fromkeys(t.lower() for t in tags):
+            lists["tag"].setdefault(tag, []).append(pos)
+        for cap in dict.fromkeys(normalize_capability(c) for c in caps):
+            lists["cap"].setdefault(cap, []).append(pos)
+        if tool.get("deprecated"):
+            lists["is_"].setdefault("deprecated", []).append(pos)
+        risk = get_risk_tier(calculate_risk_score(caps))
+        lists["risk"].setdefault(risk, []).append(pos)
+        key = (bool(tool.get("deprecated")), tool.get("maturity") or "")
+        lists["trust_keys"].setdefault(key, []).append(pos)
+    return {
+        name: {value: bitmap(positions, count) for value, positions in values.items()}
+        for name, values in lists.items()
+    }
+
+
+def _build_field_postings(
+    registry: dict[str, Any],
+    cfg: RegistryConfig,
+    base: dict[str, dict[Any, int]] | None = None,
+) -> FieldPostings:
+    """Assemble FieldPostings from the registry-only bitmaps in base
+    (computed here if not given) and the ref's bundle membership.
+
+    Only tool ids are read from the registry.
+    """
+    from mcpt.ui.trust import get_trust_tier
+
+    tools = registry.get("tools", [])
+    count = len(tools)
+    if base is None:
+        base = _registry_postings(tools)
+    ids: dict[str, list[int]] = {}
+    for pos, tool in enumerate(tools):
+        tid = tool.get("id")
+        if isinstance(tid, str):
+            ids.setdefault(tid, []).append(pos)
+
+    # Bundle bitmaps, and tools grouped by the bundles they are in
+    bundle_lists: dict[str, list[int]] = {}
+    groups: dict[tuple[str, ...], list[int]] = {}
+    for tid, bundles in get_bundle_membership(cfg).items():
+        positions = ids.get(tid)
+        if not positions or not bundles:
+            continue
+        for name in dict.fromkeys(b.lower() for b in bundles):
+            bundle_lists.setdefault(name, []).extend(positions)
+        groups.setdefault(tuple(bundles), []).extend(positions)
+
+    # Trust tiers per (deprecated, maturity) key and bundle group
+    trust: dict[str, int] = {}
+    grouped = 0
+    group_bits = [(list(bundles), bitmap(positions, count)) for bundles, positions in groups.items()]
+    for bundles, bits in group_bits:
+        grouped |= bits
+    group_bits.append((None, ((1 << count) - 1) & ~grouped))
+    for (deprecated, maturity), key_bits in base["trust_keys"].items():
+        for bundles, bits in group_bits:
+            if key_bits & bits:
+                tier = get_trust_tier({"deprecated": deprecated, "maturity": maturity}, bundles)
+                trust[tier] = trust.get(tier, 0) | (key_bits & bits)
+
+    def load_featured(postings: FieldPostings) -> None:
+        from .featured import get_featured
+
+        featured = get_featured(cfg)
+        if featured is not None:
+            postings.is_["featured"] = postings.of_ids(featured.featured_ids())
+            for slug, coll in featured.collections.items():
+                postings.collection[slug.lower()] = postings.of_ids(coll.tool_ids)
+
+    return FieldPostings(
+        count=count,
+        tag=dict(base["tag"]),
+        cap=dict(base["cap"]),
+        bundle={name: bitmap(positions, count) for name, positions in bundle_lists.items()},
+        is_=dict(base["is_"]),
+        risk=dict(base["risk"]),
+        trust=trust,
+        ids=ids,
+        load_featured=load_featured,
+    )
+
+
+def field_postings(registry: dict[str, Any], cfg: RegistryConfig | None = None) -> FieldPostings:
+    """Return the per-field bitmaps query filters run on, built once per registry.
+
+    For a cached registry the registry-only bitmaps come from its snapshot,
+    where they were computed when the snapshot was written.
+    """
+    if cfg is None:
+        cfg = RegistryConfig()
+
+    def build(reg: dict[str, Any]) -> FieldPostings:
+        store = _snapshot_of(reg, cfg)
+        base = None
+        if store is not None:
+            try:
+                base = store.load_section(POSTINGS_SECTION)
+            except Exception:
+                base = None
+        return _build_field_postings(reg, cfg, base)
+
+    return _derived(registry, "field_postings", build)
+
+
+def id_trigram_index(registry: dict[str, Any]) -> TrigramIndex:
+    """Return the id trigram index for a registry, built once per registry."""
+    return _derived(registry, "id_trigrams", lambda reg: TrigramIndex.build(reg.get("tools", [])))
+
+
+def similar_tools(registry: dict[str, Any], query: str, limit: int = 5) -> list[dict[str, Any]]:
+    """Find tools whose ids resemble query, best match first.
+
+    Candidates are the ids sharing the most trigrams with the query; only
+    those are rescored with SequenceMatcher. Queries shorter than a trigram
+    are compared against every id.
+    """
+    from difflib import SequenceMatcher
+
+    tools = registry.get("tools", [])
+    trigrams = id_trigram_index(registry)
+    query_lower = query.lower()
+
+    if len(query_lower) < NGRAM:
+        positions: Iterable[int] = range(len(tools))
+    else:
+        positions = trigrams.candidates(query_lower, max(limit * 10, FUZZY_CANDIDATES))
+
+    scored = []
+    for pos in positions:
+        tool_id = trigrams.ids[pos]
+        # Score based on: substring match, sequence similarity, starts-with
+        score = 0.0
+        if query_lower in tool_id:
+            score += 0.5
+        if tool_id.startswith(query_lower):
+            score += 0.3
+        score += SequenceMatcher(None, query_lower, tool_id).ratio() * 0.5
+        if score > 0.2:
+            scored.append((score, pos))
+
+    scored.sort(key=lambda x: (-x[0], x[1]))
+    return [tools[pos] for _, pos in scored[:limit]]
+
+
 def get_tool(tool_id: str, cfg: RegistryConfig | None = None) -> dict[str, Any] | None:
     """Get a specific tool by ID."""
     registry = get_registry(cfg)
-    for tool in registry.get("tools", []):
-        if tool.get("id") == tool_id:
-            return tool
-    return None
+    return tool_index(registry).get(tool_id)
 
 
 def load_cached_artifact(cfg: RegistryConfig, filename: str) -> Any | None:
-    """Load a cached artifact (JSON or text) if available."""
+    """Load a cached artifact (JSON or text) if available.
+
+    Parsed artifacts are memoized per process like the registry itself.
+    """
     p = registry_cache_path(cfg).parent / "dist" / filename
+    memoized = _memo_get(cfg, filename, p)
+    if memoized is not None:
+        return memoized
     if not p.exists():
         return None
     try:
-        content = p.read_text(encoding="utf-8")
-        if filename.endswith(".json"):
-            return json.loads(content)
-        return content
+        with open_cached(p) as f:
+            if filename.endswith(".json"):
+                value = json.load(f)
+            else:
+                value = f.read().decode("utf-8")
     except Exception:
         return None
+    _memo_put(cfg, filename, p, value)
+    return value
 
 
 def get_bundle_membership(cfg: RegistryConfig | None = None) -> dict[str, list[str]]:
     """Return a mapping of tool_id -> list[bundle_names] for all tools."""
     if cfg is None:
         cfg = RegistryConfig()
+    p = registry_cache_path(cfg).parent / "dist" / "registry.index.json"
+    memoized = _memo_get(cfg, "bundle_membership", p)
+    if memoized is not None:
+        return memoized
     try:
         index = load_cached_artifact(cfg, "registry.index.json")
         if not index or "bundles" not in index:
@@ -200,39 +1127,60 @@ def get_bundle_membership(cfg: RegistryConfig | None = None) -> dict[str, list[s
                 if tool_id not in mapping:
                     mapping[tool_id] = []
                 mapping[tool_id].append(bundle_name)
+        _memo_put(cfg, "bundle_membership", p, mapping)
         return mapping
     except Exception:
         return {}
 
 
+# Ranking modes accepted by search_tools
+RANKINGS = ("classic", "bm25")
+
+# score_fields bonuses (the id ones also apply on top of BM25)
+EXACT_ID_SCORE = 100
+ID_PREFIX_SCORE = 40
+EXACT_NAME_SCORE = 80
+EXACT_TAG_SCORE = 60
+TAG_SUBSTRING_SCORE = 5
+# Most a tool without an id prefix, exact name or exact tag match can score,
+# besides TAG_SUBSTRING_SCORE per tag: name and description substrings
+REST_SCORE_BOUND = 20 + 10
+
+
 def calculate_match_score(tool: dict[str, Any], query_lower: str) -> tuple[int, list[str]]:
     """Calculate match score and reasons for a tool."""
+    return score_fields(*lower_fields(tool), query_lower)
+
+
+def score_fields(
+    tid: str,
+    name: str,
+    desc: str,
+    tags: list[str],
+    query_lower: str,
+) -> tuple[int, list[str]]:
+    """Calculate match score and reasons from already-lowercased fields."""
     score = 0
     reasons = []
-    
-    tid = tool.get("id", "").lower()
-    name = tool.get("name", "").lower()
-    desc = tool.get("description", "").lower()
-    tags = [t.lower() for t in tool.get("tags", [])]
 
     # 1. Exact ID match (100)
     if tid == query_lower:
-        score += 100
+        score += EXACT_ID_SCORE
         reasons.append("exact id match")
     
     # 2. Exact keyword match in name (80)
     if query_lower == name:
-        score += 80
+        score += EXACT_NAME_SCORE
         reasons.append("exact name match")
 
     # 3. Exact tag match (60)
     if query_lower in tags:
-        score += 60
+        score += EXACT_TAG_SCORE
         reasons.append(f"exact tag match: {query_lower}")
 
     # 4. ID Prefix match (40)
     if tid.startswith(query_lower):
-        score += 40
+        score += ID_PREFIX_SCORE
         reasons.append("id prefix match")
 
     # 5. Name/Desc substring (20)
@@ -246,25 +1194,107 @@ def calculate_match_score(tool: dict[str, Any], query_lower: str) -> tuple[int,
     # 6. Tag substring (5 per tag)
     for tag in tags:
         if query_lower in tag:
-            score += 5
+            score += TAG_SUBSTRING_SCORE
             reasons.append(f"tag substring match: {tag}")
             
     return score, reasons
 
 
+def score_bm25(
+    sindex: SearchIndex,
+    pos: int,
+    terms: list[str],
+    query_lower: str,
+) -> tuple[float, list[str]]:
+    """BM25 score and reasons for the tool at pos, with the id bonuses on top.
+
+    Reasons list each query term's contribution, then the exact id and id
+    prefix bonuses of score_fields.
+    """
+    score = 0.0
+    reasons = []
+    for term, contribution in sindex.bm25(pos, terms):
+        score += contribution
+        reasons.append(f"term {term!r}: {contribution:.2f}")
+
+    tid = sindex.fields(pos)[0]
+    if tid == query_lower:
+        score += EXACT_ID_SCORE
+        reasons.append(f"exact id match: +{EXACT_ID_SCORE}")
+    if tid.startswith(query_lower):
+        score += ID_PREFIX_SCORE
+        reasons.append(f"id prefix match: +{ID_PREFIX_SCORE}")
+    return round(score, 4), reasons
+
+
+# Reasons shared by every hit of a filter-only search
+FILTER_MATCH_REASONS = ("filter match",)
+
+
+def get_search_index(registry: dict[str, Any], cfg: RegistryConfig | None = None) -> SearchIndex:
+    """Return the search index for a registry, built once per registry.
+
+    For a cached registry the index comes from its snapshot, where it was
+    stored packed when the snapshot was written; otherwise it is built in
+    memory.
+    """
+    if cfg is None:
+        cfg = RegistryConfig()
+
+    def build(reg: dict[str, Any]) -> SearchIndex:
+        tools = reg.get("tools", [])
+        store = _snapshot_of(reg, cfg)
+        if store is not None:
+            try:
+                return SearchIndex.unpack(store.load_section(SEARCH_SECTION), tools)
+            except Exception:
+                pass
+        return SearchIndex.build(tools)
+
+    return _derived(registry, "search_index", build)
+
+
 def search_tools(
-    query: str,
+    query: str | Query,
     cfg: RegistryConfig | None = None,
     bundle: str | None = None,
     tag: str | None = None,
-) -> list[dict[str, Any]]:
+    limit: int | None = None,
+    offset: int = 0,
+    ranking: str = "classic",
+) -> list[SearchHit]:
     """Search tools with ranking and filtering.
     
-    Returns tools with injected '_score' and '_reasons' fields.
+    Returns SearchHits, which reference the registry's tools and read like
+    them with '_score' and '_reasons' fields added; nothing is copied per
+    hit. Candidates come from the registry's search index, so only tools
+    whose fields can contain the query are scored.
+
+    With limit, only hits offset to offset + limit of the full ranking are
+    returned. They are selected with a bounded heap, and scoring stops
+    early once the index shows no remaining candidate can rank among them:
+    for classic ranking from the id, name and tag tiers, for bm25 from each
+    query word's score bound (SearchIndex.bm25_bound).
+
+    query may use the structured query language of .query (tag:, cap:,
+    bundle:, collection:, is:, risk and trust comparisons); its filters
+    select positions from per-field posting lists before any scoring, and
+    only the remaining free text is ranked. Raises QueryError for a
+    malformed query.
+
+    ranking is one of RANKINGS: "classic" scores whole-query matches with
+    fixed weights (score_fields); "bm25" scores each query word with BM25
+    over id, name, description and tags (score_bm25), so multi-word
+    queries match tools containing any of the words.
     """
+    if ranking not in RANKINGS:
+        raise ValueError(f"Unknown ranking {ranking!r}; expected one of {', '.join(RANKINGS)}")
+    parsed = query if isinstance(query, Query) else parse_query(query or "")
     registry = get_registry(cfg)
-    query_lower = query.lower() if query else ""
-    results = []
+    tools = registry.get("tools", [])
+    sindex = get_search_index(registry, cfg)
+    query = parsed.text
+    query_lower = query.lower()
 
     # Try to load index for better bundle/tag data, but fallback to registry.json
     index = load_cached_artifact(cfg or RegistryConfig(), "registry.index.json")
@@ -273,35 +1303,110 @@ def search_tools(
     allowed_ids = None
     if bundle and index and "bundles" in index:
         allowed_ids = set(index["bundles"].get(bundle, []))
-    
-    for tool in registry.get("tools", []):
-        # Filter by bundle
-        if allowed_ids is not None and tool.get("id") not in allowed_ids:
-            continue
-            
-        # Filter by tag
-        if tag and tag.lower() not in [t.lower() for t in tool.get("tags", [])]:
-            continue
-
-        if not query:
-            # If no query but filters matched, add with zero score
-            tool_copy = tool.copy()
-            tool_copy["_score"] = 0
-            tool_copy["_reasons"] = ["filter match"]
-            results.append(tool_copy)
-            continue
 
-        score, reasons = calculate_match_score(tool, query_lower)
-        if score > 0:
-            tool_copy = tool.copy()
-            tool_copy["_score"] = score
-            tool_copy["_reasons"] = reasons
-            results.append(tool_copy)
+    terms = list(dict.fromkeys(tokenize(query_lower)))
+    positions: Iterable[int] | None
+    if not query:
+        positions = None
+    elif ranking == "bm25":
+        positions = sorted(set(sindex.with_terms(terms)).union(sindex.with_id_prefix(query_lower)))
+    else:
+        positions = sindex.candidates(query_lower)
+    if tag:
+        tagged = sindex.with_tag(tag.lower())
+        if positions is None:
+            positions = tagged
+        else:
+            tagged_set = set(tagged)
+            positions = [pos for pos in positions if pos in tagged_set]
+    if parsed.filters:
+        selected = bit_positions(select(field_postings(registry, cfg), parsed.filters) or 0)
+        if positions is None:
+            positions = selected
+        else:
+            selected_set = set(selected)
+            positions = [pos for pos in positions if pos in selected_set]
+
+    if limit is not None and limit <= 0:
+        return []
+    stop = None if limit is None else offset + limit
+
+    def tool_id(pos: int) -> str:
+        tid = tools[pos].get("id")
+        return tid if isinstance(tid, str) else ""
+
+    def admitted(pos: int) -> bool:
+        # Filter by bundle
+        return allowed_ids is None or tools[pos].get("id") in allowed_ids
+
+    if not query:
+        # If no query but filters matched, list in id order with zero score
+        ordered = sindex.order if positions is None else sorted(positions, key=tool_id)
+        page = islice((pos for pos in ordered if admitted(pos)), offset, stop)
+        return [SearchHit(tools[pos], 0, FILTER_MATCH_REASONS) for pos in page]
+
+    candidates = None if positions is None else set(positions)
+
+    def scored(batch: Iterable[int]) -> Iterator[tuple[float, str, int, list[str]]]:
+        # Rank keys: score descending, then id ascending, then registry order
+        for pos in batch:
+            if (candidates is None or pos in candidates) and admitted(pos):
+                if ranking == "bm25":
+                    score, reasons = score_bm25(sindex, pos, terms, query_lower)
+                else:
+                    score, reasons = score_fields(*sindex.fields(pos), query_lower)
+                if score > 0:
+                    yield -score, tool_id(pos), pos, reasons
+
+    everything = range(len(tools)) if positions is None else positions
+    if stop is None:
+        ranked = sorted(scored(everything))
+    elif ranking == "bm25":
+        # Tools whose id starts with the query can earn the id bonuses, so
+        # they are scored first; then the tools holding each word, the word
+        # with the highest bound first. A tool not reached yet holds none of
+        # the words scored so far, so it scores at most the bounds of the
+        # rest; once the current page beats that, the search stops.
+        bounds = {term: sindex.bm25_bound(term) for term in terms}
+        remaining = sum(bounds.values())
+        tiers = [(sindex.with_id_prefix(query_lower), remaining)]
+        for term in sorted(terms, key=bounds.__getitem__, reverse=True):
+            remaining -= bounds[term]
+            tiers.append((sindex.terms.get(term, ()), remaining))
+        seen: set[int] = set()
+        ranked = []
+        for tier, bound in tiers:
+            fresh = [pos for pos in tier if pos not in seen]
+            seen.update(fresh)
+            ranked = heapq.nsmallest(stop, chain(ranked, scored(fresh)))
+            # Scores are rounded to 4 places, which may lift one past the bound
+            if len(ranked) == stop and -ranked[-1][0] > bound + 1e-4:
+                break
+    else:
+        # Tools whose id starts with the query, or whose name or a tag equals
+        # it, can earn the large bonuses; score them first, one tier at a
+        # time. Each bound is the most any tool outside the tiers scored so
+        # far can reach, so once the current page beats it the remaining
+        # candidates need not be scored.
+        tag_bound = TAG_SUBSTRING_SCORE * sindex.max_tags
+        tiers = [
+            (sindex.with_id_prefix(query_lower), EXACT_NAME_SCORE + EXACT_TAG_SCORE + REST_SCORE_BOUND),
+            (sindex.names.get(query_lower, []), EXACT_TAG_SCORE + REST_SCORE_BOUND),
+            (sindex.with_tag(query_lower), REST_SCORE_BOUND),
+        ]
+        seen: set[int] = set()
+        ranked = []
+        for tier, bound in tiers:
+            fresh = [pos for pos in tier if pos not in seen]
+            seen.update(fresh)
+            ranked = heapq.nsmallest(stop, chain(ranked, scored(fresh)))
+            if len(ranked) == stop and -ranked[-1][0] > bound + tag_bound:
+                break
+        else:
+            rest = (pos for pos in everything if pos not in seen)
+            ranked = heapq.nsmallest(stop, chain(ranked, scored(rest)))
 
-    # Sort by score descending, then ID ascending
-    results.sort(key=lambda x: (-x.get("_score", 0), x.get("id", "")))
-    
-    return results
+    return [SearchHit(tools[pos], -neg, reasons) for neg, _, pos, reasons in ranked[offset:stop]]
 
 
 @dataclass
@@ -315,10 +1420,18 @@ class RegistryStatus:
     cache_mtime: datetime | None
     tool_count: int
     provenance: str  # "cache", "remote", "local_file", "not_loaded"
+    content_hash: str | None = None
+    fetched_at: datetime | None = None
+    artifacts: dict[str, dict[str, Any]] = field(default_factory=dict)
+    unpublished: list[str] = field(default_factory=list)
 
 
 def get_registry_status(cfg: RegistryConfig | None = None) -> RegistryStatus:
-    """Get status information about the registry without fetching."""
+    """Get status information about the registry without fetching.
+
+    Answers from the metadata sidecar when it describes the current cache,
+    so the cached registry itself is not read.
+    """
     if cfg is None:
         cfg = RegistryConfig()
 
@@ -327,15 +1440,31 @@ def get_registry_status(cfg: RegistryConfig | None = None) -> RegistryStatus:
     cache_mtime = None
     tool_count = 0
     provenance = "not_loaded"
+    content_hash = None
+    fetched_at = None
+    artifacts: dict[str, dict[str, Any]] = {}
+    unpublished: list[str] = []
 
     if cache_exists:
-        cache_mtime = datetime.fromtimestamp(cache_path.stat().st_mtime)
-        try:
-            data = json.loads(cache_path.read_text(encoding="utf-8"))
-            tool_count = len(data.get("tools", []))
+        unpublished = unpublished_artifacts(cfg)
+        meta = load_cache_meta(cfg)
+        if meta is not None:
+            tool_count = meta.get("tool_count", 0)
+            content_hash = meta.get("sha256")
+            artifacts = meta.get("artifacts", {})
+            if meta.get("fetched_at"):
+                fetched_at = datetime.fromisoformat(meta["fetched_at"])
+                cache_mtime = fetched_at.astimezone().replace(tzinfo=None)
             provenance = "cache"
-        except Exception:
-            pass
+        if cache_mtime is None:
+            cache_mtime = datetime.fromtimestamp(_fetched_at(cfg) or cache_path.stat().st_mtime)
+        if meta is None:
+            try:
+                data = json.loads(read_cached_bytes(cache_path))
+                tool_count = len(data.get("tools", []))
+                provenance = "cache"
+            except Exception:
+                pass
 
     # Check if source is a local file
     source_path = Path(cfg.source)
@@ -350,4 +1479,8 @@ def get_registry_status(cfg: RegistryConfig | None = None) -> RegistryStatus:
         cache_mtime=cache_mtime,
         tool_count=tool_count,
         provenance=provenance,
+        content_hash=content_hash,
+        fetched_at=fetched_at,
+        artifacts=artifacts,
+        unpublished=unpublished,
     )
@@ -5,7 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any
 
-from mcpt.registry.client import RegistryConfig, get_registry, load_cached_artifact
+from mcpt.registry.client import RegistryConfig, get_registry, load_cached_artifact, tool_index
 
 
 @dataclass
@@ -32,6 +32,14 @@ class FeaturedData:
     collections: dict[str, Collection] = field(default_factory=dict)
     sections: list[Section] = field(default_factory=list)
 
+    def featured_ids(self) -> set[str]:
+        """Ids shown as featured: the top-level list plus featured sections."""
+        ids = set(self.featured)
+        for s in self.sections:
+            if "week" in s.title.lower() or "featured" in s.title.lower():
+                ids.update(s.tool_ids)
+        return ids
+
 
 def get_featured(
     cfg: RegistryConfig | None = None,
@@ -51,7 +59,7 @@ def get_featured(
     # Load main registry to validate IDs
     try:
         registry = get_registry(cfg)
-        known_ids = {t["id"] for t in registry.get("tools", [])}
+        known_ids = tool_index(registry).keys()
     except Exception:
         # If registry fetch fails, we can't validate IDs strict-mode,
         # but we should still return the structure if available locally.
@@ -0,0 +1,371 @@
+"""Search index over registry tools, stored in the registry snapshot."""
+
+from __future__ import annotations
+
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator
+
+INDEX_VERSION = 5
+NGRAM = 3
+
+# BM25 parameters and per-field boosts, in lower_fields order
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_BOOSTS = (2.0, 3.0, 1.0, 2.0)  # id, name, description, tags
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def ngrams(text: str, n: int = NGRAM) -> set[str]:
+    """Return the set of character n-grams in text."""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def padded_ngrams(text: str, n: int = NGRAM) -> set[str]:
+    """Return n-grams of text padded with boundary markers.
+
+    Padding lets short strings and word boundaries contribute n-grams, so
+    "tol" and "tool" still share "  t" and " to".
+    """
+    pad = " " * (n - 1)
+    return ngrams(f"{pad}{text} ", n)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split lowercased text into word tokens ("file-compass" -> file, compass)."""
+    return _TOKEN_RE.findall(text)
+
+
+def field_tokens(fields: tuple[str, str, str, list[str]]) -> list[list[str]]:
+    """Tokens of each of a tool's lowercased (id, name, description, tags)."""
+    tid, name, desc, tags = fields
+    return [tokenize(tid), tokenize(name), tokenize(desc), [t for tag in tags for t in tokenize(tag)]]
+
+
+def lower_fields(tool: dict[str, Any]) -> tuple[str, str, str, list[str]]:
+    """Lowercased (id, name, description, tags) of a tool, as search sees them."""
+    return (
+        (tool.get("id") or "").lower(),
+        (tool.get("name") or "").lower(),
+        (tool.get("description") or "").lower(),
+        [t.lower() for t in tool.get("tags") or []],
+    )
+
+
+class PackedPostings(Mapping[str, Sequence[int]]):
+    """Posting lists stored as packed arrays, unpacked on lookup."""
+
+    __slots__ = ("_packed", "_typecode")
+
+    def __init__(self, packed: dict[str, bytes], typecode: str) -> None:
+        self._packed = packed
+        self._typecode = typecode
+
+    def __getitem__(self, key: str) -> array:
+        postings = array(self._typecode)
+        postings.frombytes(self._packed[key])
+        return postings
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._packed
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._packed)
+
+    def __len__(self) -> int:
+        return len(self._packed)
+
+
+def _typecode(largest: int) -> str:
+    """Smallest unsigned array typecode holding values up to largest."""
+    for code in ("B", "H", "I", "L", "Q"):
+        if largest < 1 << (8 * array(code).itemsize):
+            return code
+    raise ValueError("value too large to pack")
+
+
+def _pack(values: Sequence[int], typecode: str) -> bytes:
+    return array(typecode, values).tobytes()
+
+
+def _unpack(data: bytes, typecode: str) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+@dataclass
+class SearchIndex:
+    """Inverted index over the searchable fields of a registry.
+
+    Positions refer to the order of `tools`, the registry's tool list. The
+    index keeps no copy of the fields: `fields(pos)` lowercases a tool's
+    fields when it is scored.
+
+    `terms` maps each word token of any field to the positions containing
+    it. Substring candidates come from the tokens too: every run of word
+    characters in a query lies inside a single token of any field that
+    contains the query. `vocab` lists the tokens in sorted order and
+    `vocab_grams` maps each trigram to the vocab indexes of the tokens
+    containing it, so the tokens holding a run are looked up rather than
+    scanned for. `tags` maps each lowercased tag to the positions
+    carrying it and `names` does the same for lowercased names.
+
+    `order` lists positions by tool id (the order results are listed in)
+    and `by_id` by lowercased id, for prefix lookups. `max_tags` is the
+    longest tag list, which bounds the score of a tool.
+
+    For BM25 ranking, a term's document frequency is the length of its
+    posting list, and `lengths` holds each tool's token count per field
+    (four per tool), with their averages in `avg_lengths`.
+
+    An index stored with the registry snapshot (see pack) keeps its posting
+    lists packed; they are unpacked one lookup at a time.
+    """
+
+    tools: Sequence[Mapping[str, Any]] = field(default_factory=list, repr=False)
+    terms: Mapping[str, Sequence[int]] = field(default_factory=dict)
+    tags: Mapping[str, Sequence[int]] = field(default_factory=dict)
+    names: Mapping[str, Sequence[int]] = field(default_factory=dict)
+    vocab: Sequence[str] = field(default_factory=list)
+    vocab_grams: Mapping[str, Sequence[int]] = field(default_factory=dict)
+    order: Sequence[int] = field(default_factory=list)
+    by_id: Sequence[int] = field(default_factory=list)
+    max_tags: int = 0
+    lengths: Sequence[int] = field(default_factory=list)
+    avg_lengths: tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)
+
+    @classmethod
+    def build(cls, tools: Sequence[Mapping[str, Any]]) -> SearchIndex:
+        """Build an index from registry tools."""
+        terms: dict[str, list[int]] = {}
+        tag_index: dict[str, list[int]] = {}
+        names: dict[str, list[int]] = {}
+        lengths: list[int] = []
+        ids: list[str] = []
+        lower_ids: list[str] = []
+        max_tags = 0
+        for pos, tool in enumerate(tools):
+            tid, name, desc, tags = lower_fields(tool)
+            raw_id = tool.get("id")
+            ids.append(raw_id if isinstance(raw_id, str) else "")
+            lower_ids.append(tid)
+            names.setdefault(name, []).append(pos)
+            max_tags = max(max_tags, len(tags))
+            for tag in tags:
+                postings = tag_index.setdefault(tag, [])
+                if not postings or postings[-1] != pos:
+                    postings.append(pos)
+            tokens = field_tokens((tid, name, desc, tags))
+            lengths.extend(len(toks) for toks in tokens)
+            for term in set().union(*tokens):
+                terms.setdefault(term, []).append(pos)
+        vocab = sorted(terms)
+        vocab_grams: dict[str, list[int]] = {}
+        for i, term in enumerate(vocab):
+            for gram in ngrams(term):
+                vocab_grams.setdefault(gram, []).append(i)
+        n = len(ids)
+        avg_lengths = (
+            tuple(sum(lengths[f::4]) / n for f in range(4)) if n else (0.0, 0.0, 0.0, 0.0)
+        )
+        return cls(
+            tools=tools,
+            terms=terms,
+            tags=tag_index,
+            names=names,
+            vocab=vocab,
+            vocab_grams=vocab_grams,
+            order=sorted(range(n), key=ids.__getitem__),
+            by_id=sorted(range(n), key=lower_ids.__getitem__),
+            max_tags=max_tags,
+            lengths=lengths,
+            avg_lengths=avg_lengths,  # type: ignore[arg-type]
+        )
+
+    def pack(self) -> dict[str, Any]:
+        """The index as compact arrays, for storing in the registry snapshot."""
+        positions = _typecode(max(len(self.tools) - 1, 0))
+        lengths = _typecode(max(self.lengths, default=0))
+        words = _typecode(max(len(self.vocab) - 1, 0))
+
+        def packed(postings: Mapping[str, Sequence[int]], typecode: str = positions) -> dict[str, bytes]:
+            return {key: _pack(values, typecode) for key, values in postings.items()}
+
+        return {
+            "version": INDEX_VERSION,
+            "count": len(self.tools),
+            "typecodes": (positions, lengths, words),
+            "terms": packed(self.terms),
+            "tags": packed(self.tags),
+            "names": packed(self.names),
+            "vocab": list(self.vocab),
+            "vocab_grams": packed(self.vocab_grams, words),
+            "order": _pack(self.order, positions),
+            "by_id": _pack(self.by_id, positions),
+            "max_tags": self.max_tags,
+            "lengths": _pack(self.lengths, lengths),
+            "avg_lengths": self.avg_lengths,
+        }
+
+    @classmethod
+    def unpack(cls, data: dict[str, Any], tools: Sequence[Mapping[str, Any]]) -> SearchIndex:
+        """Index for tools from pack() output; raises ValueError if it does not fit."""
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            raise ValueError("Unsupported search index version")
+        if data["count"] != len(tools):
+            raise ValueError("Search index does not match the registry")
+        positions, lengths, words = data["typecodes"]
+        return cls(
+            tools=tools,
+            terms=PackedPostings(data["terms"], positions),
+            tags=PackedPostings(data["tags"], positions),
+            names=PackedPostings(data["names"], positions),
+            vocab=data["vocab"],
+            vocab_grams=PackedPostings(data["vocab_grams"], words),
+            order=_unpack(data["order"], positions),
+            by_id=_unpack(data["by_id"], positions),
+            max_tags=data["max_tags"],
+            lengths=_unpack(data["lengths"], lengths),
+            avg_lengths=tuple(data["avg_lengths"]),  # type: ignore[arg-type]
+        )
+
+    def __len__(self) -> int:
+        return len(self.tools)
+
+    def fields(self, pos: int) -> tuple[str, str, str, list[str]]:
+        """Lowercased (id, name, description, tags) of the tool at pos."""
+        return lower_fields(self.tools[pos])
+
+    def field_lengths(self, pos: int) -> tuple[int, ...]:
+        """Token counts of the tool at pos, per field."""
+        return tuple(self.lengths[4 * pos:4 * pos + 4])
+
+    def _lower_id(self, pos: int) -> str:
+        return (self.tools[pos].get("id") or "").lower()
+
+    def candidates(self, query_lower: str) -> list[int] | None:
+        """Positions whose fields may contain query_lower as a substring.
+
+        Returns None when the query is too short to narrow down, meaning
+        every position is a candidate. Runs shorter than a trigram only
+        narrow the candidates when the query has no longer run; the result
+        may then hold positions that do not contain the query.
+        """
+        runs = set(tokenize(query_lower))
+        if len(query_lower) < NGRAM or not runs:
+            return None
+        long_runs = [run for run in runs if len(run) >= NGRAM]
+        result: set[int] | None = None
+        # Longest runs first: they match the fewest tokens
+        for run in sorted(long_runs or runs, key=len, reverse=True):
+            found: set[int] = set()
+            for term in self._terms_containing(run):
+                found.update(self.terms[term])
+            result = found if result is None else result & found
+            if not result:
+                return []
+        return sorted(result or ())
+
+    def _terms_containing(self, run: str) -> Iterator[str]:
+        """Tokens containing run, looked up by its trigrams."""
+        if len(run) < NGRAM:
+            # No trigram to look up: only queries made of short runs get here
+            return (term for term in self.vocab if run in term)
+        shared: set[int] | None = None
+        for gram in ngrams(run):
+            found = set(self.vocab_grams.get(gram, ()))
+            shared = found if shared is None else shared & found
+            if not shared:
+                return iter(())
+        return (self.vocab[i] for i in sorted(shared or ()) if run in self.vocab[i])
+
+    def with_tag(self, tag_lower: str) -> Sequence[int]:
+        """Positions of tools carrying the given (lowercased) tag."""
+        return self.tags.get(tag_lower, [])
+
+    def with_id_prefix(self, prefix_lower: str) -> Sequence[int]:
+        """Positions of tools whose lowercased id starts with prefix_lower."""
+        start = bisect_left(self.by_id, prefix_lower, key=self._lower_id)
+        end = start
+        while end < len(self.by_id) and self._lower_id(self.by_id[end]).startswith(prefix_lower):
+            end += 1
+        return self.by_id[start:end]
+
+    def with_terms(self, terms: Iterable[str]) -> list[int]:
+        """Positions of tools containing any of the given tokens."""
+        found: set[int] = set()
+        for term in terms:
+            found.update(self.terms.get(term, ()))
+        return sorted(found)
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency of term (0 if no tool has it)."""
+        df = len(self.terms.get(term, ()))
+        if not df:
+            return 0.0
+        n = len(self.tools)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def bm25_bound(self, term: str) -> float:
+        """Upper bound on term's bm25 contribution to any tool.
+
+        Saturation keeps weighted / (weighted + BM25_K1) below 1, so no
+        contribution reaches idf * (BM25_K1 + 1).
+        """
+        return self.idf(term) * (BM25_K1 + 1)
+
+    def bm25(self, pos: int, terms: Iterable[str]) -> list[tuple[str, float]]:
+        """BM25F contribution of each query token to the tool at pos.
+
+        Term frequencies are weighted by FIELD_BOOSTS and normalized by
+        field length before saturation, so a term repeated across fields
+        cannot outweigh a rarer term.
+        """
+        tokens = field_tokens(self.fields(pos))
+        lengths = self.field_lengths(pos)
+        out = []
+        for term in terms:
+            postings = self.terms.get(term)
+            if not postings:
+                continue
+            weighted = 0.0
+            for f, field_toks in enumerate(tokens):
+                tf = field_toks.count(term)
+                if tf:
+                    avg = self.avg_lengths[f] or 1.0
+                    weighted += FIELD_BOOSTS[f] * tf / (1 - BM25_B + BM25_B * lengths[f] / avg)
+            if weighted:
+                out.append((term, self.idf(term) * weighted * (BM25_K1 + 1) / (weighted + BM25_K1)))
+        return out
+
+
+@dataclass
+class TrigramIndex:
+    """Padded-trigram index over tool ids, used for "Did you mean" suggestions."""
+
+    ids: list[str] = field(default_factory=list)
+    grams: dict[str, list[int]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, tools: Iterable[dict[str, Any]]) -> TrigramIndex:
+        index = cls()
+        for pos, tool in enumerate(tools):
+            tid = (tool.get("id") or "").lower()
+            index.ids.append(tid)
+            for gram in padded_ngrams(tid):
+                index.grams.setdefault(gram, []).append(pos)
+        return index
+
+    def candidates(self, query_lower: str, limit: int) -> list[int]:
+        """Positions sharing the most trigrams with the query, best first."""
+        shared: Counter[int] = Counter()
+        for gram in padded_ngrams(query_lower):
+            shared.update(self.grams.get(gram, ()))
+        return [pos for pos, _ in shared.most_common(limit)]
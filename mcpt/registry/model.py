@@ -0,0 +1,76 @@
+"""Search results over registry tools."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import Any, Iterator
+
+
+class SearchHit(Mapping):
+    """A search result: a registry tool plus what the search found about it.
+
+    The hit references the registry's tool mapping instead of copying it.
+    As a mapping it reads like the dicts search used to return: the tool's
+    fields plus "_score", "_reasons" and, once known, "_bundles".
+    """
+
+    __slots__ = ("tool", "score", "reasons", "bundles")
+
+    def __init__(
+        self,
+        tool: Mapping[str, Any],
+        score: float | None = None,
+        reasons: Sequence[str] | None = None,
+        bundles: Sequence[str] | None = None,
+    ) -> None:
+        self.tool = tool
+        self.score = score
+        self.reasons = reasons
+        self.bundles = bundles
+
+    @property
+    def id(self) -> str | None:
+        tid = self.tool.get("id")
+        return tid if isinstance(tid, str) else None
+
+    def _own(self) -> dict[str, Any]:
+        own: dict[str, Any] = {}
+        for key, value in (("_score", self.score), ("_reasons", self.reasons), ("_bundles", self.bundles)):
+            if value is not None:
+                own[key] = value
+        return own
+
+    def __getitem__(self, key: str) -> Any:
+        value = None
+        if key == "_score":
+            value = self.score
+        elif key == "_reasons":
+            value = self.reasons
+        elif key == "_bundles":
+            value = self.bundles
+        if value is not None:
+            return value
+        return self.tool[key]
+
+    def __iter__(self) -> Iterator[str]:
+        own = self._own()
+        yield from (k for k in self.tool if k not in own)
+        yield from own
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> dict[str, Any]:
+        """The hit as a plain dict, as search results used to be."""
+        return {**dict(self.tool.items()), **self._own()}
+
+    def __repr__(self) -> str:
+        return f"SearchHit({self.to_dict()!r})"
+
+
+def as_hit(tool: Mapping[str, Any]) -> SearchHit:
+    """Return tool as a SearchHit; a dict's "_score", "_reasons" and
+    "_bundles" become the hit's own fields."""
+    if isinstance(tool, SearchHit):
+        return tool
+    return SearchHit(tool, tool.get("_score"), tool.get("_reasons"), tool.get("_bundles"))
@@ -0,0 +1,216 @@
+"""Structured search queries compiled to set operations over posting lists.
+
+A query mixes free text with field filters:
+
+    cap:network -cap:exec tag:agents risk<high trust>=verified "file search"
+
+    tag:<tag>            tools carrying the tag
+    cap:<capability>     tools requiring the capability
+    bundle:<name>        tools in the bundle
+    collection:<slug>    tools in the curated collection
+    is:deprecated        deprecated tools (also is:featured)
+    risk<op><level>      risk tier compared with low < medium < high < extreme
+    trust<op><tier>      trust tier compared with deprecated < experimental
+                         < neutral < verified < trusted
+
+<op> is one of : = < <= > >=. A leading "-" negates a filter, and
+"-deprecated" is short for "-is:deprecated". Everything else, with quoted
+phrases kept together, is the free-text part that search ranks.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+RISK_LEVELS = ("low", "medium", "high", "extreme")
+TRUST_LEVELS = ("deprecated", "experimental", "neutral", "verified", "trusted")
+IS_FLAGS = ("deprecated", "featured")
+
+# Filter field -> ordered levels for fields that support comparisons
+ORDERED_FIELDS = {"risk": RISK_LEVELS, "trust": TRUST_LEVELS}
+SET_FIELDS = ("tag", "cap", "bundle", "collection", "is")
+FIELDS = (*SET_FIELDS, *ORDERED_FIELDS)
+
+_TOKEN_RE = re.compile(r'(-?)(?:([a-z]+)(<=|>=|<|>|:|=))?("[^"]*"?|\S*)', re.IGNORECASE)
+
+
+class QueryError(ValueError):
+    """Raised for a malformed search query."""
+
+
+@dataclass(frozen=True)
+class Filter:
+    """One field filter, such as risk<high or -cap:exec."""
+
+    field: str
+    op: str
+    value: str
+    negate: bool = False
+
+
+@dataclass
+class Query:
+    """A parsed search query: free text plus field filters."""
+
+    text: str = ""
+    filters: list[Filter] = field(default_factory=list)
+
+
+def normalize_capability(cap: str) -> str:
+    """Capability key as filters compare it (lowercase, "-" -> "_")."""
+    return cap.lower().replace("-", "_")
+
+
+def parse_query(query: str) -> Query:
+    """Split a query into free text and validated field filters.
+
+    Tokens naming an unknown field (such as "http://x") are free text.
+    Raises QueryError for a known field with a bad operator or value.
+    """
+    text: list[str] = []
+    filters: list[Filter] = []
+    for match in _TOKEN_RE.finditer(query):
+        neg, name, op, value = match.groups()
+        name = (name or "").lower()
+        if not name and neg and value.lower() == "deprecated":
+            filters.append(Filter("is", ":", "deprecated", negate=True))
+            continue
+        if name not in FIELDS:
+            if not name and value.startswith('"'):
+                text.append(neg + value.strip('"'))
+            else:
+                text.append(match.group(0))
+            continue
+        value = value.strip('"').lower()
+        if not value:
+            raise QueryError(f"Missing value for {name}{op}")
+        if op == "=":
+            op = ":"
+        if name in ORDERED_FIELDS:
+            levels = ORDERED_FIELDS[name]
+            if value not in levels:
+                raise QueryError(f"Unknown {name} level {value!r}; expected one of {', '.join(levels)}")
+        elif op != ":":
+            raise QueryError(f"{name} does not support {op!r}; use {name}:<value>")
+        elif name == "is" and value not in IS_FLAGS:
+            raise QueryError(f"Unknown flag is:{value}; expected one of {', '.join(IS_FLAGS)}")
+        elif name == "cap":
+            value = normalize_capability(value)
+        filters.append(Filter(name, op, value, negate=bool(neg)))
+    return Query(text=" ".join(t for t in text if t), filters=filters)
+
+
+# Bit positions set in each byte value, for expanding bitmaps
+_BYTE_BITS = [tuple(i for i in range(8) if b >> i & 1) for b in range(256)]
+
+
+def bitmap(positions: Iterable[int], count: int) -> int:
+    """Int bitmap with the bits of the given positions set."""
+    buf = bytearray((count + 7) // 8)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, "little")
+
+
+def bit_positions(bits: int) -> list[int]:
+    """Positions of the set bits of a bitmap, ascending."""
+    out: list[int] = []
+    for i, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = i * 8
+            out.extend(base + b for b in _BYTE_BITS[byte])
+    return out
+
+
+@dataclass
+class FieldPostings:
+    """Per-field bitmaps of tool positions for one registry.
+
+    Each value maps to an int whose bit i is set when the tool at position
+    i has it, so filters combine with & | ~ and counts are bit counts.
+    ids maps each tool id to its positions. Featured and collection bitmaps
+    need the featured artifact and are built by load_featured the first
+    time a filter or facet asks for them.
+    """
+
+    count: int
+    tag: dict[str, int] = field(default_factory=dict)
+    cap: dict[str, int] = field(default_factory=dict)
+    bundle: dict[str, int] = field(default_factory=dict)
+    collection: dict[str, int] = field(default_factory=dict)
+    is_: dict[str, int] = field(default_factory=dict)
+    risk: dict[str, int] = field(default_factory=dict)
+    trust: dict[str, int] = field(default_factory=dict)
+    ids: dict[str, list[int]] = field(default_factory=dict, repr=False)
+    load_featured: Callable[[FieldPostings], None] | None = field(default=None, repr=False)
+
+    @property
+    def all(self) -> int:
+        """Bitmap of every position."""
+        return (1 << self.count) - 1
+
+    def postings(self, name: str) -> dict[str, int]:
+        if name in ("collection", "is") and self.load_featured is not None:
+            load, self.load_featured = self.load_featured, None
+            load(self)
+        return self.is_ if name == "is" else getattr(self, name)
+
+    def of_ids(self, ids: Iterable[str]) -> int:
+        """Bitmap of the tools with the given ids."""
+        return bitmap((pos for tid in ids for pos in self.ids.get(tid, ())), self.count)
+
+    def matching(self, f: Filter) -> int:
+        """Bitmap of the positions matching a filter, ignoring its negation."""
+        postings = self.postings(f.field)
+        if f.op == ":":
+            return postings.get(f.value, 0)
+        levels = ORDERED_FIELDS[f.field]
+        at = levels.index(f.value)
+        wanted = {
+            "<": levels[:at],
+            "<=": levels[:at + 1],
+            ">": levels[at + 1:],
+            ">=": levels[at:],
+        }[f.op]
+        bits = 0
+        for level in wanted:
+            bits |= postings.get(level, 0)
+        return bits
+
+    def facets(self, mask: int | None = None) -> dict[str, dict[str, int]]:
+        """Counts of tools per value of each field, within mask if given.
+
+        Values no selected tool has are left out; each field's values are
+        ordered by count, highest first.
+        """
+        out: dict[str, dict[str, int]] = {}
+        for name in FIELDS:
+            counts = {
+                value: (bits if mask is None else bits & mask).bit_count()
+                for value, bits in self.postings(name).items()
+            }
+            out[name] = dict(sorted(((v, n) for v, n in counts.items() if n), key=lambda vn: (-vn[1], vn[0])))
+        return out
+
+
+def select(postings: FieldPostings, filters: list[Filter]) -> int | None:
+    """Bitmap of the positions passing every filter, or None without filters.
+
+    Positive filters are intersected and negated ones masked out; only when
+    every filter is negated does the result start from all positions.
+    """
+    if not filters:
+        return None
+    result: int | None = None
+    for f in filters:
+        if not f.negate:
+            bits = postings.matching(f)
+            result = bits if result is None else result & bits
+    if result is None:
+        result = postings.all
+    for f in filters:
+        if f.negate and result:
+            result &= ~postings.matching(f)
+    return result
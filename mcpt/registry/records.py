@@ -0,0 +1,139 @@
+"""Memory-mapped registry snapshot with separately loaded sections.
+
+A snapshot file is laid out as:
+
+    magic (8 bytes) | header length (u64) | header pickle | sections
+
+The small header carries the cache stamps, the registry's top-level members
+other than "tools", and the (offset, length) of each section:
+
+    tools     pickle: the registry's tool dicts
+
+followed by any extra sections the writer passes in (such as the bitmap
+postings and search index the registry client precomputes), pickled and
+read back with load_section.
+
+Sections are only read when needed: loading a registry unpickles the tools
+as plain dicts, and an extra section is unpickled the first time it is
+asked for.
+"""
+
+from __future__ import annotations
+
+import mmap
+import pickle
+import struct
+from pathlib import Path
+from typing import Any
+
+SNAPSHOT_MAGIC = b"MCPTSNAP"
+SNAPSHOT_VERSION = 5
+
+_U64 = struct.Struct("<Q")
+
+
+def build_snapshot(
+    data: dict[str, Any],
+    extra_sections: dict[str, Any] | None = None,
+    **header: Any,
+) -> bytes:
+    """Compile data into snapshot bytes; header entries are stored verbatim."""
+    tools = data.get("tools", [])
+    sections = {
+        "tools": pickle.dumps(tools, protocol=5),
+        **{name: pickle.dumps(value, protocol=5) for name, value in (extra_sections or {}).items()},
+    }
+
+    # Section offsets are relative to the end of the header
+    layout: dict[str, tuple[int, int]] = {}
+    body: list[bytes] = []
+    at = 0
+    for name, blob in sections.items():
+        pad = -at % _U64.size
+        body.append(b"\0" * pad)
+        at += pad
+        layout[name] = (at, len(blob))
+        body.append(blob)
+        at += len(blob)
+
+    head = pickle.dumps(
+        {
+            **header,
+            "version": SNAPSHOT_VERSION,
+            "extra": {k: v for k, v in data.items() if k != "tools"},
+            "count": len(tools),
+            "sections": layout,
+        },
+        protocol=5,
+    )
+    head += b"\0" * (-(len(SNAPSHOT_MAGIC) + _U64.size + len(head)) % _U64.size)
+    return b"".join([SNAPSHOT_MAGIC, _U64.pack(len(head)), head, *body])
+
+
+class RecordStore:
+    """Read access to the sections of a mapped snapshot."""
+
+    def __init__(self, mapped: mmap.mmap, base: int, header: dict[str, Any]) -> None:
+        self.header = header
+        self.count: int = header["count"]
+        self._mapped = mapped
+        self._base = base
+        self._layout: dict[str, tuple[int, int]] = header["sections"]
+        for start, length in self._layout.values():
+            if base + start + length > len(mapped):
+                raise ValueError("truncated snapshot")
+
+    def _section(self, name: str) -> memoryview:
+        start, length = self._layout[name]
+        return memoryview(self._mapped)[self._base + start:self._base + start + length]
+
+    def _load_section(self, name: str) -> Any:
+        with self._section(name) as view:
+            return pickle.loads(view)
+
+    def load_section(self, name: str) -> Any | None:
+        """Unpickle an extra section, or None if the snapshot has none."""
+        if name not in self._layout:
+            return None
+        return self._load_section(name)
+
+    def tools(self) -> list[dict[str, Any]]:
+        tools = self._load_section("tools")
+        if not isinstance(tools, list) or len(tools) != self.count:
+            raise ValueError("corrupt snapshot tools")
+        return tools
+
+
+def open_snapshot(path: Path) -> RecordStore | None:
+    """Map a snapshot file and read its header, or None if unusable.
+
+    The mapping stays open for as long as the store is alive.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError("not a snapshot")
+        pos = len(SNAPSHOT_MAGIC)
+        (head_len,) = _U64.unpack_from(mapped, pos)
+        pos += _U64.size
+        header = pickle.loads(mapped[pos:pos + head_len])
+        if not isinstance(header, dict) or header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError("unsupported snapshot version")
+        return RecordStore(mapped, pos + head_len, header)
+    except Exception:
+        try:
+            mapped.close()
+        except BufferError:
+            pass
+        return None
+
+
+def load_registry(store: RecordStore) -> dict[str, Any]:
+    """The registry dict stored in a snapshot, with plain dict tools."""
+    registry = dict(store.header["extra"])
+    registry["tools"] = store.tools()
+    return registry
@@ -0,0 +1,27 @@
+"""Detached registry refresh, started by get_registry for stale caches.
+
+Usage: python -m mcpt.registry.refresh <source> <ref>
+"""
+
+from __future__ import annotations
+
+import sys
+
+from mcpt.registry.client import RegistryConfig, get_registry
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 2:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+        return 2
+    try:
+        get_registry(RegistryConfig(source=args[0], ref=args[1]), force_refresh=True)
+    except Exception:
+        # Best effort: the next command falls back to the cache it already has
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Filesystem helpers for the registry cache: atomic writes, compression and locking."""
+
+from __future__ import annotations
+
+import gzip
+import io
+import os
+import sys
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+LOCK_FILENAME = ".lock"
+LOCK_POLL_INTERVAL = 0.05
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Cached files smaller than this are stored as-is
+COMPRESS_MIN_BYTES = 8 * 1024
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write data to path so readers see either the old or the new file.
+
+    The bytes go to a temporary file in the same directory, which is then
+    renamed over the target.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Text counterpart of atomic_write_bytes (UTF-8)."""
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def compress_for_cache(data: bytes) -> bytes:
+    """Gzip data for the cache if it is large enough to be worth it.
+
+    The gzip header carries no timestamp, so equal inputs compress to equal
+    bytes and still share a blob.
+    """
+    if len(data) < COMPRESS_MIN_BYTES:
+        return data
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def open_cached(path: Path) -> BinaryIO:
+    """Open a cached file for streaming reads, decompressing gzip transparently.
+
+    Files are recognised by their content, so plain files written by older
+    versions stay readable.
+    """
+    f = open(path, "rb")
+    try:
+        is_gzip = f.read(2) == GZIP_MAGIC
+        f.seek(0)
+    except BaseException:
+        f.close()
+        raise
+    if is_gzip:
+        f.close()
+        return gzip.open(path, "rb")
+    return f
+
+
+def read_cached_bytes(path: Path) -> bytes:
+    """Read a cached file, decompressing it if it was stored compressed.
+
+    Raises ValueError for a truncated or corrupt compressed file.
+    """
+    raw = path.read_bytes()
+    if not raw.startswith(GZIP_MAGIC):
+        return raw
+    try:
+        with gzip.GzipFile(fileobj=io.BytesIO(raw), mode="rb") as f:
+            return f.read()
+    except (OSError, EOFError, zlib.error) as e:
+        raise ValueError(f"Corrupt compressed cache file: {path}") from e
+
+
+def _try_lock(f) -> bool:
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f) -> None:
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+@contextmanager
+def cache_lock(directory: Path, timeout: float) -> Iterator[bool]:
+    """Hold an advisory exclusive lock on a cache directory.
+
+    Waits up to timeout seconds. Yields True when the lock is held, or
+    False when it could not be taken in time (or locking is unsupported),
+    in which case the caller proceeds unlocked.
+    """
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        f = open(directory / LOCK_FILENAME, "a+b")
+    except OSError:
+        yield False
+        return
+
+    try:
+        deadline = time.monotonic() + timeout
+        locked = _try_lock(f)
+        while not locked and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            locked = _try_lock(f)
+        try:
+            yield locked
+        finally:
+            if locked:
+                _unlock(f)
+    finally:
+        f.close()
@@ -0,0 +1,126 @@
+"""Incremental JSON parsing for registries too large to load at once."""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+_WS = re.compile(r"[ \t\n\r]*")
+
+
+# Characters that can follow a prefix of a JSON number within the number
+_NUMBER_CONTINUATION = frozenset("0123456789.eE+-")
+
+
+def _number_may_continue(value: Any, buf: str, end: int) -> bool:
+    """Whether a number decoded up to end could be cut short by the buffer."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return end == len(buf) or buf[end] in _NUMBER_CONTINUATION
+
+
+class _Reader:
+    """Sliding text buffer over a binary stream, decoded as UTF-8."""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int | None = None) -> bool:
+        """Append the next chunk to the buffer; False at end of stream."""
+        if self.eof:
+            return False
+        chunk = self._stream.read(size or self._chunk_size)
+        if not chunk:
+            self.eof = True
+        text = self._utf8.decode(chunk, final=self.eof)
+        # Drop what has been consumed so the buffer stays about one chunk
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def skip_ws(self) -> None:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                return
+
+    def next_char(self) -> str:
+        self.skip_ws()
+        if self.pos >= len(self.buf):
+            raise ValueError("Unexpected end of JSON document")
+        c = self.buf[self.pos]
+        self.pos += 1
+        return c
+
+    def expect(self, expected: str) -> None:
+        c = self.next_char()
+        if c != expected:
+            raise ValueError(f"Expected {expected!r} in JSON document, found {c!r}")
+
+    def peek(self) -> str:
+        self.skip_ws()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more input as needed."""
+        self.skip_ws()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Incomplete value: read more, in growing steps so a single
+                # large value is not re-scanned once per chunk
+                if not self.fill(size):
+                    raise
+                size *= 2
+                continue
+            if not self.eof and _number_may_continue(value, self.buf, end):
+                # The number may continue in the next chunk ("1." + "5")
+                self.fill(size)
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(stream: BinaryIO, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of the array under key in a top-level JSON object.
+
+    Only one element (plus one chunk of input) is held in memory at a time.
+    Other top-level members are decoded and discarded. Raises ValueError if
+    the document is malformed or has no such array.
+    """
+    reader = _Reader(stream, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        raise ValueError(f"JSON document has no {key!r} member")
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key:
+            reader.expect("[")
+            if reader.peek() == "]":
+                return
+            while True:
+                yield reader.value()
+                c = reader.next_char()
+                if c == "]":
+                    return
+                if c != ",":
+                    raise ValueError(f"Expected ',' or ']' in JSON array, found {c!r}")
+        reader.value()
+        c = reader.next_char()
+        if c == "}":
+            raise ValueError(f"JSON document has no {key!r} member")
+        if c != ",":
+            raise ValueError(f"Expected ',' or '}}' in JSON object, found {c!r}")
@@ -1,6 +1,6 @@
 """Rendering components for tool display."""
 
-from typing import Any, List, Optional
+from typing import Any, Mapping, Sequence
 
 from rich.table import Table
 from rich.text import Text
@@ -202,12 +202,16 @@ def render_tool_line(
     return grid
 
 
-def render_tool_header(tool: dict[str, Any]) -> RenderableType:
-    """Render a prominent header for tool details."""
+def render_tool_header(tool: dict[str, Any], bundles: list[str] | None = None) -> RenderableType:
+    """Render a prominent header for tool details.
+
+    bundles defaults to the tool's "_bundles" field.
+    """
     tool_id = tool.get("id", "unknown")
     name = tool.get("name", "")
     desc = tool.get("description", "")
-    bundles = tool.get("_bundles")
+    if bundles is None:
+        bundles = tool.get("_bundles")
     tier = get_trust_tier(tool, bundles)
     
     glyph, id_color = get_sigil(tool_id)
@@ -237,7 +241,7 @@ def render_tool_header(tool: dict[str, Any]) -> RenderableType:
     return grid
 
 def render_search_table(
-    tools: List[dict[str, Any]], 
+    tools: Sequence[Mapping[str, Any]],
     title: str = "Search Results",
     plain: bool = False,
     show_badges: bool = True,
@@ -1,6 +1,6 @@
 """Trust model and tier definitions."""
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Mapping, Optional, Sequence
 from rich.style import Style
 
 # Trust Tiers
@@ -29,8 +29,8 @@ TIER_SYMBOLS = {
 }
 
 def get_trust_tier(
-    tool: Dict[str, Any], 
-    bundles: Optional[List[str]] = None
+    tool: Mapping[str, Any],
+    bundles: Optional[Sequence[str]] = None
 ) -> str:
     """Determine trust tier for a tool based on metadata precedence.
     
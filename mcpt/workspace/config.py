@@ -7,7 +7,6 @@ from typing import Any
 
 import json
 from datetime import datetime, timezone
-import yaml
 
 from mcpt.registry.client import DEFAULT_REGISTRY_SOURCE, DEFAULT_REF
 
@@ -98,11 +97,15 @@ def write_default(
 
 def read_config(path: Path) -> dict[str, Any]:
     """Read mcp.yaml configuration."""
+    import yaml
+
     return yaml.safe_load(path.read_text(encoding="utf-8"))
 
 
 def write_config(path: Path, config: dict[str, Any]) -> None:
     """Write configuration to mcp.yaml."""
+    import yaml
+
     path.write_text(
         yaml.dump(config, default_flow_style=False, sort_keys=False),
         encoding="utf-8",
@@ -239,6 +242,8 @@ def get_grants(path: Path, tool_id: str) -> list[str]:
 
 def read_lock(path: Path) -> dict[str, Any]:
     """Read mcp.lock.yaml configuration."""
+    import yaml
+
     lock_path = path.parent / MCP_LOCK_FILENAME
     if not lock_path.exists():
         return {"tools": {}}
@@ -251,6 +256,8 @@ def write_lock_record(
     record: dict[str, Any],
 ) -> None:
     """Update install record in mcp.lock.yaml."""
+    import yaml
+
     lock_path = path.parent / MCP_LOCK_FILENAME
     
     lock_data = {"tools": {}}
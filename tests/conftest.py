@@ -26,3 +26,15 @@ def _disable_network(monkeypatch):
             )
 
     monkeypatch.setattr(socket, "socket", GuardedSocket)
+
+
+@pytest.fixture(autouse=True)
+def _isolate_user_cache(tmp_path, monkeypatch):
+    """Point the user cache dir (registry cache, completion cache) at tmp_path."""
+    cache = tmp_path / "user-cache"
+
+    def user_cache_dir(appname=None, appauthor=None, *args, **kwargs):
+        return str(cache / appname) if appname else str(cache)
+
+    monkeypatch.setattr("platformdirs.user_cache_dir", user_cache_dir)
+    monkeypatch.setattr("mcpt.registry.client.user_cache_dir", user_cache_dir)
@@ -95,17 +95,102 @@ class TestListCommand:
         assert result.exit_code == 0
         assert "file-compass" in result.stdout or "File Compass" in result.stdout
 
+    @patch("mcpt.cli.iter_tools")
+    def test_list_json_output(self, mock_iter_tools):
+        """Test list command with JSON output (streamed from the cache)."""
+        mock_iter_tools.return_value = iter([
+            {"id": "file-compass", "name": "File Compass"},
+        ])
+        result = runner.invoke(app, ["list", "--json"])
+        assert result.exit_code == 0
+        assert "file-compass" in result.stdout
+
+    @patch("mcpt.cli.iter_tools")
+    def test_list_json_matches_json_dumps(self, mock_iter_tools):
+        """Streamed --json output is identical to dumping the filtered list."""
+        import json
+
+        tools = [
+            {"id": "a", "tags": ["x"], "_bundles": ["core"]},
+            {"id": "b", "deprecated": True},
+            {"id": "c", "tags": ["X", "y"], "meta": {"k": [1, 2]}},
+        ]
+        mock_iter_tools.return_value = iter(tools)
+        result = runner.invoke(app, ["list", "--json", "--tag", "x"])
+        assert result.exit_code == 0
+        expected = [{"id": "a", "tags": ["x"]}, {"id": "c", "tags": ["X", "y"], "meta": {"k": [1, 2]}}]
+        assert result.stdout == json.dumps(expected, indent=2) + "\n"
+
+    @patch("mcpt.cli.iter_tools")
+    def test_list_json_limit(self, mock_iter_tools):
+        """--limit stops after the first N tools."""
+        import json
+
+        mock_iter_tools.return_value = iter([{"id": f"t{i}"} for i in range(10)])
+        result = runner.invoke(app, ["list", "--json", "-n", "3"])
+        assert result.exit_code == 0
+        assert [t["id"] for t in json.loads(result.stdout)] == ["t0", "t1", "t2"]
+
+    @patch("mcpt.cli.iter_tools")
+    def test_list_ndjson(self, mock_iter_tools):
+        """--ndjson writes one compact tool per line, without internal fields."""
+        import json
+
+        mock_iter_tools.return_value = iter([{"id": "t0", "_bundles": ["core"]}, {"id": "t1", "tags": ["a"]}])
+        result = runner.invoke(app, ["list", "--ndjson"])
+        assert result.exit_code == 0
+        assert result.stdout.splitlines() == ['{"id":"t0"}', '{"id":"t1","tags":["a"]}']
+        assert [json.loads(line) for line in result.stdout.splitlines()] == [{"id": "t0"}, {"id": "t1", "tags": ["a"]}]
+
+    @patch("mcpt.cli.iter_tools")
+    def test_list_json_fetch_error(self, mock_iter_tools):
+        """A registry that cannot be loaded writes nothing to stdout."""
+        def tools():
+            raise RuntimeError("offline")
+            yield
+
+        mock_iter_tools.return_value = tools()
+        result = CliRunner(mix_stderr=False).invoke(app, ["list", "--json"])
+        assert result.exit_code == 1
+        assert result.stdout == ""
+        assert "offline" in result.stderr
+
+    @patch("mcpt.cli.iter_tools")
+    def test_list_json_error_mid_stream(self, mock_iter_tools):
+        """An error after output began goes to stderr and fails the command."""
+        def tools():
+            yield {"id": "t0"}
+            raise ValueError("corrupt cache")
+
+        mock_iter_tools.return_value = tools()
+        result = CliRunner(mix_stderr=False).invoke(app, ["list", "--json"])
+        assert result.exit_code == 1
+        assert "corrupt cache" not in result.stdout
+        assert "corrupt cache" in result.stderr
+
     @patch("mcpt.cli.get_registry")
-    def test_list_json_output(self, mock_get_registry):
-        """Test list command with JSON output."""
+    def test_list_tag_filter(self, mock_get_registry):
+        """Table output filters through the registry's bitmaps."""
         mock_get_registry.return_value = {
             "tools": [
-                {"id": "file-compass", "name": "File Compass"},
+                {"id": "alpha-tool", "tags": ["X"]},
+                {"id": "beta-tool", "tags": ["y"]},
+                {"id": "gamma-tool", "tags": ["x"], "deprecated": True},
             ]
         }
+        result = runner.invoke(app, ["list", "--tag", "x", "--plain"])
+        assert result.exit_code == 0
+        assert "alpha-tool" in result.stdout
+        assert "beta-tool" not in result.stdout
+        assert "gamma-tool" not in result.stdout
+
+    @patch("mcpt.cli.iter_tools")
+    def test_list_json_empty(self, mock_iter_tools):
+        """An empty result is still valid JSON."""
+        mock_iter_tools.return_value = iter([])
         result = runner.invoke(app, ["list", "--json"])
         assert result.exit_code == 0
-        assert "file-compass" in result.stdout
+        assert result.stdout == "[]\n"
 
     @patch("mcpt.cli.get_registry")
     def test_list_with_refresh(self, mock_get_registry):
@@ -118,6 +203,14 @@ class TestListCommand:
         result = runner.invoke(app, ["list", "--refresh"])
         assert result.exit_code == 0
 
+    @patch("mcpt.cli.get_registry")
+    def test_list_refresh_force(self, mock_get_registry):
+        """Test list --refresh --force passes force through."""
+        mock_get_registry.return_value = {"tools": []}
+        result = runner.invoke(app, ["list", "--refresh", "--force"])
+        assert result.exit_code == 0
+        mock_get_registry.assert_called_once_with(force_refresh=True, force=True)
+
     @patch("mcpt.cli.get_registry")
     def test_list_handles_error(self, mock_get_registry):
         """Test list command handles registry fetch errors."""
@@ -141,6 +234,18 @@ class TestInfoCommand:
         assert result.exit_code == 0
         assert "File Compass" in result.stdout
 
+    @patch("mcpt.cli.get_bundle_membership")
+    @patch("mcpt.cli.get_tool")
+    def test_info_does_not_modify_tool(self, mock_get_tool, mock_membership):
+        """Test bundles are shown without being written into the shared tool dict."""
+        tool = {"id": "file-compass", "description": "Find files"}
+        mock_get_tool.return_value = tool
+        mock_membership.return_value = {"file-compass": ["core"]}
+        result = runner.invoke(app, ["info", "file-compass"])
+        assert result.exit_code == 0
+        assert "core" in result.stdout
+        assert tool == {"id": "file-compass", "description": "Find files"}
+
     @patch("mcpt.cli.get_tool")
     def test_info_not_found(self, mock_get_tool):
         """Test info command when tool doesn't exist."""
@@ -148,6 +253,20 @@ class TestInfoCommand:
         result = runner.invoke(app, ["info", "nonexistent"])
         assert result.exit_code != 0
 
+    @patch("mcpt.cli.get_tool")
+    def test_info_json_is_raw(self, mock_get_tool):
+        """Test --json output is not touched by markup parsing or wrapping."""
+        import json
+
+        tool = {
+            "id": "file-compass",
+            "description": "Run [bold]this[/bold] with [red] brackets " + "and a very long line " * 20,
+        }
+        mock_get_tool.return_value = tool
+        result = runner.invoke(app, ["info", "file-compass", "--json"])
+        assert result.exit_code == 0
+        assert result.stdout == json.dumps(tool, indent=2) + "\n"
+
     @patch("mcpt.cli.get_tool")
     def test_info_json_output(self, mock_get_tool):
         """Test info command with JSON output."""
@@ -178,6 +297,59 @@ class TestSearchCommand:
         result = runner.invoke(app, ["search", "nonexistent"])
         assert result.exit_code == 0
 
+    @patch("mcpt.cli.search_tools")
+    def test_search_limit(self, mock_search):
+        """--limit is passed down to search_tools."""
+        mock_search.return_value = []
+        result = runner.invoke(app, ["search", "compass", "--limit", "5"])
+        assert result.exit_code == 0
+        assert mock_search.call_args.kwargs["limit"] == 5
+
+    @patch("mcpt.cli.search_tools")
+    def test_search_rank(self, mock_search):
+        """--rank selects the ranking; unknown names are rejected."""
+        mock_search.return_value = []
+        result = runner.invoke(app, ["search", "file search", "--rank", "bm25"])
+        assert result.exit_code == 0
+        assert mock_search.call_args.kwargs["ranking"] == "bm25"
+
+        result = runner.invoke(app, ["search", "x", "--rank", "fuzzy"])
+        assert result.exit_code == 1
+        assert "Unknown ranking" in result.stdout
+
+    def test_search_invalid_query(self):
+        """A malformed filter is reported instead of searched for."""
+        with patch("mcpt.registry.client.get_registry", return_value={"tools": []}):
+            result = runner.invoke(app, ["search", "risk<huge"])
+        assert result.exit_code == 1
+        assert "Invalid query" in result.stdout
+
+    @patch("mcpt.cli.search_tools")
+    def test_search_json_output_from_hits(self, mock_search):
+        """Search hits print as the plain tools, without internal fields."""
+        import json
+        from mcpt.registry.model import SearchHit
+
+        tool = {"id": "file-compass", "tags": ["files"], "_bundles": ["core"]}
+        mock_search.return_value = [SearchHit(tool, 12, ["id match"])]
+        result = runner.invoke(app, ["search", "compass", "--json"])
+        assert result.exit_code == 0
+        assert json.loads(result.stdout) == [{"id": "file-compass", "tags": ["files"]}]
+
+    @patch("mcpt.cli.search_tools")
+    def test_search_ndjson(self, mock_search):
+        """Test search --ndjson writes one hit per line."""
+        import json
+        from mcpt.registry.model import SearchHit
+
+        mock_search.return_value = [
+            SearchHit({"id": "file-compass"}, 12, ["id match"]),
+            SearchHit({"id": "file-scan"}, 5, ["name match"]),
+        ]
+        result = runner.invoke(app, ["search", "file", "--ndjson"])
+        assert result.exit_code == 0
+        assert [json.loads(line) for line in result.stdout.splitlines()] == [{"id": "file-compass"}, {"id": "file-scan"}]
+
     @patch("mcpt.cli.search_tools")
     def test_search_json_output(self, mock_search):
         """Test search command with JSON output."""
@@ -293,3 +465,310 @@ class TestDoctorCommand:
         """Test doctor command runs."""
         result = runner.invoke(app, ["doctor"])
         assert result.exit_code == 0
+
+
+class TestCacheCommand:
+    """Test cache stats / gc commands."""
+
+    def _populate(self, root):
+        from mcpt.registry import RegistryConfig, save_cached_registry
+
+        with patch(
+            "mcpt.registry.client.registry_cache_path",
+            side_effect=lambda cfg: root / cfg.ref / "registry.json",
+        ):
+            save_cached_registry(RegistryConfig(ref="v9.0.0"), {"tools": [{"id": "a"}]})
+            save_cached_registry(RegistryConfig(ref="v9.0.1"), {"tools": [{"id": "a"}]})
+
+    def test_cache_stats_json(self, tmp_path):
+        """Test cache stats --json reports refs and shared blobs."""
+        import json
+
+        self._populate(tmp_path)
+        with patch("mcpt.cli.registry_cache_root", return_value=tmp_path):
+            result = runner.invoke(app, ["cache", "stats", "--json"])
+        assert result.exit_code == 0
+        out = json.loads(result.stdout)
+        assert {r["ref"] for r in out["refs"]} == {"v9.0.0", "v9.0.1"}
+        # registry.json and its snapshot, each stored once
+        assert out["blobs"] == 2
+        assert out["saved_bytes"] > 0
+
+    def test_cache_gc_dry_run(self, tmp_path):
+        """Test cache gc --dry-run reports without deleting."""
+        self._populate(tmp_path)
+        with patch("mcpt.cli.registry_cache_root", return_value=tmp_path):
+            result = runner.invoke(app, ["cache", "gc", "--max-size", "1", "--dry-run"])
+        assert result.exit_code == 0
+        assert "Would free" in result.stdout
+        assert (tmp_path / "v9.0.0" / "registry.json").exists()
+
+    def test_cache_gc_rejects_bad_size(self):
+        """Test cache gc with an unparseable --max-size."""
+        result = runner.invoke(app, ["cache", "gc", "--max-size", "huge"])
+        assert result.exit_code == 1
+
+
+class TestRegistryCommand:
+    """Test registry command."""
+
+    @patch("mcpt.cli.get_registry_status")
+    def test_registry_reports_unpublished(self, mock_status, tmp_path):
+        """Artifacts the ref does not publish are not shown as missing."""
+        from mcpt.registry import RegistryStatus
+
+        mock_status.return_value = RegistryStatus(
+            source="https://example.com",
+            ref="v0.1.0",
+            cache_path=tmp_path / "registry.json",
+            cache_exists=True,
+            cache_mtime=None,
+            tool_count=0,
+            provenance="cache",
+            unpublished=["featured.json"],
+        )
+        result = runner.invoke(app, ["registry"])
+        assert result.exit_code == 0
+        assert "not published featured" in result.stdout
+        assert "missing index" in result.stdout
+
+
+class TestFacetsCommand:
+    """Test facets computed locally when the report artifact is missing."""
+
+    REGISTRY = {
+        "tools": [
+            {"id": "a", "tags": ["x"], "capabilities": ["network"]},
+            {"id": "b", "tags": ["x", "y"], "capabilities": ["exec"]},
+            {"id": "c", "deprecated": True},
+        ]
+    }
+
+    def invoke(self, *args):
+        from mcpt.registry import clear_registry_memo
+
+        clear_registry_memo()
+        with patch("mcpt.cli.load_cached_artifact", return_value=None), \
+             patch("mcpt.cli.get_registry", return_value=self.REGISTRY), \
+             patch("mcpt.registry.client.load_cached_artifact", return_value=None), \
+             patch("mcpt.registry.featured.load_cached_artifact", return_value=None):
+            return runner.invoke(app, ["facets", *args])
+
+    def test_local_facets_json(self):
+        import json
+
+        result = self.invoke("--json")
+        assert result.exit_code == 0
+        report = json.loads(result.stdout)
+        assert report["generated_at"] == "local"
+        assert report["stats"]["total_tools"] == 3
+        assert report["tags"] == {"x": 2, "y": 1}
+
+    def test_facets_under_filter(self):
+        import json
+
+        result = self.invoke("tag:x -cap:exec", "--json")
+        assert result.exit_code == 0
+        report = json.loads(result.stdout)
+        assert report["stats"]["total_tools"] == 1
+        assert report["capabilities"] == {"network": 1}
+        assert report["query"] == "tag:x -cap:exec"
+
+    def test_facets_rejects_free_text(self):
+        result = self.invoke("network")
+        assert result.exit_code == 1
+        assert "only filters" in result.stdout
+
+
+class TestShellCompletion:
+    """Test completion served from the completion cache."""
+
+    def _cache(self, tmp_path):
+        from mcpt.completion import build_completions
+
+        p = tmp_path / "completions.txt"
+        tools = [
+            {"id": "file-compass", "tags": ["files", "search"], "capabilities": ["filesystem_read"]},
+            {"id": "fetcher", "tags": ["web"], "capabilities": ["network"]},
+            {"id": "tool-scan"},
+        ]
+        p.write_bytes(build_completions(tools, {"core": [], "dev": []}, ["starter"]))
+        return p
+
+    def test_complete_prefix(self, tmp_path):
+        """Test values of a kind are matched by prefix, in sorted order."""
+        from mcpt.completion import complete
+
+        p = self._cache(tmp_path)
+        assert complete(p, "tool", "f") == ["fetcher", "file-compass"]
+        assert complete(p, "tool", "") == ["fetcher", "file-compass", "tool-scan"]
+        assert complete(p, "tag", "s") == ["search"]
+        assert complete(p, "bundle", "") == ["core", "dev"]
+        assert complete(p, "collection", "st") == ["starter"]
+        assert complete(p, "cap", "net") == ["network"]
+        assert complete(p, "tool", "x") == []
+        assert complete(tmp_path / "missing.txt", "tool", "") == []
+
+    def test_completion_kind(self):
+        """Test which argument the words typed so far point at."""
+        from mcpt.completion import completion_kind
+
+        assert completion_kind(["info"], "") == "tool"
+        assert completion_kind(["info", "--json"], "fi") == "tool"
+        assert completion_kind(["grant", "fetcher"], "") == "cap"
+        assert completion_kind(["install", "--venv", ".venv"], "") == "tool"
+        assert completion_kind(["search", "--bundle"], "") == "bundle"
+        assert completion_kind(["list", "-c"], "") == "collection"
+        assert completion_kind(["run", "fetcher"], "") is None
+        assert completion_kind(["add", "--path"], "") is None
+        assert completion_kind(["info"], "--") is None
+        assert completion_kind([], "in") is None
+
+    def test_value_options_match_cli(self):
+        """Test the options known to take values match the CLI's."""
+        import typer.main
+        from mcpt.completion import ARGUMENT_KINDS, OPTION_KINDS, VALUE_OPTIONS
+
+        group = typer.main.get_command(app)
+        for name in ARGUMENT_KINDS:
+            for param in group.commands[name].params:
+                if param.param_type_name == "option" and not param.is_flag:
+                    assert set(param.opts) <= VALUE_OPTIONS | set(OPTION_KINDS), (name, param.opts)
+
+    def test_serve_bash_zsh_fish(self, tmp_path):
+        """Test answers are formatted like Typer's for each shell."""
+        import io
+        from mcpt.completion import serve_completion
+
+        p = self._cache(tmp_path)
+        out = io.StringIO()
+        env = {"_MCPT_COMPLETE": "complete_bash", "COMP_WORDS": "mcpt info f", "COMP_CWORD": "2"}
+        assert serve_completion(env, out, p) == 0
+        assert out.getvalue() == "fetcher\nfile-compass\n"
+
+        out = io.StringIO()
+        env = {"_MCPT_COMPLETE": "complete_zsh", "_TYPER_COMPLETE_ARGS": "mcpt list --tag we"}
+        assert serve_completion(env, out, p) == 0
+        assert out.getvalue() == "_arguments '*: :((\"web\"))'\n"
+
+        env = {
+            "_MCPT_COMPLETE": "complete_fish",
+            "_TYPER_COMPLETE_ARGS": "mcpt check zz",
+            "_TYPER_COMPLETE_FISH_ACTION": "is-args",
+        }
+        assert serve_completion(env, io.StringIO(), p) == 1
+
+    def test_serve_leaves_other_requests_to_typer(self, tmp_path):
+        """Test commands, options and non-completion runs are not answered."""
+        from mcpt.completion import serve_completion
+
+        p = self._cache(tmp_path)
+        assert serve_completion({}, path=p) is None
+        assert serve_completion({"_MCPT_COMPLETE": "complete_bash", "COMP_WORDS": "mcpt in", "COMP_CWORD": "1"}, path=p) is None
+        assert serve_completion({"_MCPT_COMPLETE": "source_bash"}, path=p) is None
+
+    def test_typer_callback(self, tmp_path):
+        """Test the CLI's autocompletion callbacks read the same cache."""
+        from mcpt.cli import complete_bundles, complete_tool_ids
+
+        p = self._cache(tmp_path)
+        with patch("mcpt.completion.completion_cache_path", return_value=p):
+            assert complete_tool_ids("t") == ["tool-scan"]
+            assert complete_bundles("d") == ["dev"]
+
+    def test_saving_registry_writes_cache(self, tmp_path):
+        """Test saving a registry regenerates the cache with cached bundles."""
+        import json
+        from mcpt.completion import COMPLETION_FILENAME, complete
+        from mcpt.registry import RegistryConfig, save_cached_registry
+
+        cfg = RegistryConfig()
+        dist = tmp_path / cfg.ref / "dist"
+        dist.mkdir(parents=True)
+        (dist / "registry.index.json").write_text(json.dumps({"bundles": {"core": ["a"]}}))
+        (dist / "featured.json").write_text(json.dumps({"collections": [{"id": "starter", "name": "S", "tools": []}]}))
+        with patch(
+            "mcpt.registry.client.registry_cache_path",
+            side_effect=lambda c: tmp_path / c.ref / "registry.json",
+        ), patch("mcpt.registry.client.registry_cache_root", return_value=tmp_path):
+            save_cached_registry(cfg, {"tools": [{"id": "a", "tags": ["t"]}, {"id": "b"}]})
+
+        p = tmp_path / COMPLETION_FILENAME
+        assert complete(p, "tool", "") == ["a", "b"]
+        assert complete(p, "bundle", "") == ["core"]
+        assert complete(p, "collection", "") == ["starter"]
+
+    def test_other_refs_leave_cache_alone(self, tmp_path):
+        """Test saving a ref other than the default keeps the default's candidates."""
+        from mcpt.completion import COMPLETION_FILENAME, complete
+        from mcpt.registry import RegistryConfig, save_cached_registry
+
+        with patch(
+            "mcpt.registry.client.registry_cache_path",
+            side_effect=lambda c: tmp_path / c.ref / "registry.json",
+        ):
+            save_cached_registry(RegistryConfig(), {"tools": [{"id": "a"}]})
+            save_cached_registry(RegistryConfig(ref="main"), {"tools": [{"id": "other"}]})
+
+        assert complete(tmp_path / COMPLETION_FILENAME, "tool", "") == ["a"]
+
+    def test_fast_path_skips_heavy_imports(self, tmp_path):
+        """Test a completion request loads neither the CLI, Rich nor httpx."""
+        import os
+        import subprocess
+        import sys
+
+        p = self._cache(tmp_path)
+        code = (
+            "import sys\n"
+            "from unittest.mock import patch\n"
+            "from mcpt.__main__ import main\n"
+            f"with patch('mcpt.completion.completion_cache_path', return_value=__import__('pathlib').Path({str(p)!r})):\n"
+            "    try:\n"
+            "        main()\n"
+            "    except SystemExit:\n"
+            "        pass\n"
+            "print(sorted(m for m in ('mcpt.cli', 'rich', 'httpx') if m in sys.modules))\n"
+        )
+        env = {**os.environ, "_MCPT_COMPLETE": "complete_bash", "COMP_WORDS": "mcpt info fi", "COMP_CWORD": "2"}
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=Path(__file__).resolve().parents[1],
+        )
+        assert result.stdout.splitlines() == ["file-compass", "[]"]
+
+
+class TestOutputWriters:
+    """Test the machine-output writers."""
+
+    def test_json_array_matches_dumps(self):
+        """Test streamed arrays match json.dumps, pretty and compact."""
+        import io
+        import json
+        from mcpt.output import write_json_array
+
+        items = [{"id": "a", "tags": ["x", "[y]"]}, {"id": "b", "nested": {"k": [1, 2]}}]
+        for pretty, expected in ((True, json.dumps(items, indent=2)), (False, json.dumps(items, separators=(",", ":")))):
+            out = io.StringIO()
+            write_json_array(iter(items), out, pretty=pretty)
+            assert out.getvalue() == expected + "\n"
+            out = io.StringIO()
+            write_json_array(iter([]), out, pretty=pretty)
+            assert out.getvalue() == "[]\n"
+
+    def test_ndjson_lines(self):
+        """Test NDJSON writes each item as it comes, one per line."""
+        import io
+        from mcpt.output import write_ndjson
+
+        def produce():
+            yield {"id": "a"}
+            assert out.getvalue() == '{"id":"a"}\n'
+            yield {"id": "b"}
+
+        out = io.StringIO()
+        write_ndjson(produce(), out)
+        assert out.getvalue() == '{"id":"a"}\n{"id":"b"}\n'
@@ -136,3 +136,1524 @@ class TestCaching:
             save_cached_registry(cfg, test_data)
             loaded = load_cached_registry(cfg)
             assert loaded == test_data
+
+
+def mock_http_client(handler):
+    """Return an httpx.Client factory whose requests are answered by handler."""
+    import httpx
+
+    def factory():
+        return httpx.Client(transport=httpx.MockTransport(handler))
+
+    return factory
+
+
+class TestConditionalFetch:
+    """Test ETag / Last-Modified revalidation in fetch_registry."""
+
+    def test_first_fetch_stores_validators(self, tmp_path):
+        """A full download records the validators the server sent."""
+        import httpx
+        from mcpt.registry.client import fetch_registry, load_validators
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+
+        def handler(request):
+            if request.url.path.endswith("/registry.json"):
+                return httpx.Response(200, json={"tools": []}, headers={"ETag": '"abc"'})
+            return httpx.Response(404)
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client._http_client", mock_http_client(handler)):
+            data = fetch_registry(cfg)
+            validators = load_validators(cfg)
+
+        assert data == {"tools": []}
+        assert validators["registry.json"] == {"etag": '"abc"'}
+
+    def test_not_modified_reuses_cache(self, tmp_path):
+        """A 304 answer serves the cached registry and artifacts."""
+        import httpx
+        from mcpt.registry.client import fetch_registry, save_validators
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+        dist = cache_file.parent / "dist"
+        seen_headers = {}
+
+        def handler(request):
+            seen_headers[request.url.path.rsplit("/", 1)[-1]] = request.headers
+            return httpx.Response(304)
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": [{"id": "cached"}]})
+            dist.mkdir(parents=True)
+            (dist / "featured.json").write_text('{"featured": []}', encoding="utf-8")
+            save_validators(cfg, {
+                "registry.json": {"etag": '"abc"', "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+                "featured.json": {"etag": '"def"'},
+            })
+
+            with patch("mcpt.registry.client._http_client", mock_http_client(handler)):
+                data = fetch_registry(cfg)
+
+        assert data == {"tools": [{"id": "cached"}]}
+        assert seen_headers["registry.json"]["If-None-Match"] == '"abc"'
+        assert seen_headers["registry.json"]["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+        assert seen_headers["featured.json"]["If-None-Match"] == '"def"'
+        # Artifacts that were never cached are requested unconditionally
+        assert "If-None-Match" not in seen_headers["capabilities.json"]
+        assert (dist / "featured.json").read_text(encoding="utf-8") == '{"featured": []}'
+
+    def test_not_modified_keeps_snapshot_loaded_cache(self, tmp_path):
+        """A 304 for a registry loaded from its snapshot leaves the cache intact."""
+        import json
+        import httpx
+        from mcpt.registry.client import (
+            _file_stamp,
+            _open_snapshot,
+            clear_registry_memo,
+            load_cache_meta,
+            save_validators,
+        )
+        from mcpt.registry.storage import read_cached_bytes
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+        tools = [{"id": "a", "name": "A"}, {"id": "b", "name": "B"}]
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"schema_version": 1, "tools": tools})
+            save_validators(cfg, {"registry.json": {"etag": '"abc"'}})
+            clear_registry_memo()
+            assert load_cached_registry(cfg)["tools"] == tools
+            assert _open_snapshot(cfg) is not None
+            stamp = _file_stamp(cache_file)
+
+            with patch("mcpt.registry.client._http_client", mock_http_client(lambda r: httpx.Response(304))):
+                data = get_registry(cfg, force_refresh=True)
+
+            assert data["tools"][1]["name"] == "B"
+            assert _file_stamp(cache_file) == stamp
+            assert json.loads(read_cached_bytes(cache_file))["tools"] == tools
+            assert _open_snapshot(cfg) is not None
+            assert load_cache_meta(cfg)["tool_count"] == 2
+            # Saving snapshot-loaded tools writes them in full
+            save_cached_registry(cfg, data)
+            assert json.loads(read_cached_bytes(cache_file))["tools"] == tools
+
+    def test_no_conditional_request_without_cache(self, tmp_path):
+        """Stored validators are ignored when the cached file is gone."""
+        import httpx
+        from mcpt.registry.client import fetch_registry, save_validators
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+        seen_headers = {}
+
+        def handler(request):
+            seen_headers[request.url.path.rsplit("/", 1)[-1]] = request.headers
+            if request.url.path.endswith("/registry.json"):
+                return httpx.Response(200, json={"tools": []})
+            return httpx.Response(404)
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_validators(cfg, {"registry.json": {"etag": '"abc"'}})
+            with patch("mcpt.registry.client._http_client", mock_http_client(handler)):
+                fetch_registry(cfg)
+
+        assert "If-None-Match" not in seen_headers["registry.json"]
+
+
+class TestConcurrentFetch:
+    """Test concurrent artifact download in fetch_registry."""
+
+    def test_uses_one_client_for_all_artifacts(self, tmp_path):
+        """registry.json and every dist artifact go through one pooled client."""
+        import httpx
+        from mcpt.registry.client import DIST_ARTIFACTS, fetch_registry
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+        clients = []
+
+        def handler(request):
+            if request.url.path.endswith("/registry.json"):
+                return httpx.Response(200, json={"tools": []})
+            return httpx.Response(200, content=b"{}")
+
+        def factory():
+            client = mock_http_client(handler)()
+            clients.append(client)
+            return client
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client._http_client", factory):
+            fetch_registry(cfg)
+
+        assert len(clients) == 1
+        for art in DIST_ARTIFACTS:
+            assert (cache_file.parent / "dist" / art).exists()
+
+    def test_slow_artifact_does_not_exceed_deadline(self, tmp_path):
+        """Artifacts still pending at the deadline are skipped."""
+        import threading
+        import time
+        import httpx
+        from mcpt.registry.client import fetch_registry
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+        release = threading.Event()
+
+        def handler(request):
+            if request.url.path.endswith("/registry.llms.txt"):
+                release.wait(5)
+            if request.url.path.endswith("/registry.json"):
+                return httpx.Response(200, json={"tools": []})
+            return httpx.Response(200, content=b"{}")
+
+        try:
+            with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+                 patch("mcpt.registry.client._http_client", mock_http_client(handler)), \
+                 patch("mcpt.registry.client.REFRESH_DEADLINE", 0.5):
+                started = time.monotonic()
+                data = fetch_registry(cfg)
+                elapsed = time.monotonic() - started
+        finally:
+            release.set()
+
+        assert data == {"tools": []}
+        assert elapsed < 3
+        assert (cache_file.parent / "dist" / "featured.json").exists()
+        assert not (cache_file.parent / "dist" / "registry.llms.txt").exists()
+
+    def test_registry_error_propagates(self, tmp_path):
+        """A failed registry.json request surfaces as an httpx error."""
+        import httpx
+        from mcpt.registry.client import fetch_registry
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+
+        def handler(request):
+            raise httpx.ConnectError("offline", request=request)
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client._http_client", mock_http_client(handler)):
+            with pytest.raises(httpx.RequestError):
+                fetch_registry(cfg)
+
+
+class TestRegistryMemo:
+    """Test per-process memoization of parsed cache files."""
+
+    def test_registry_parsed_once(self, tmp_path):
+        """Repeated loads reuse the parsed registry while the file is unchanged."""
+        import json
+        cfg = RegistryConfig(source="https://example.com", ref="memo")
+        cache_file = tmp_path / "registry.json"
+        cache_file.write_text(json.dumps({"tools": [{"id": "a"}]}), encoding="utf-8")
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client.json.loads", wraps=json.loads) as spy:
+            first = load_cached_registry(cfg)
+            second = load_cached_registry(cfg)
+
+        assert first is second
+        assert spy.call_count == 1
+
+    def test_registry_reloaded_after_change(self, tmp_path):
+        """Rewriting the cache file invalidates the memo."""
+        import json
+        import os
+        cfg = RegistryConfig(source="https://example.com", ref="memo")
+        cache_file = tmp_path / "registry.json"
+        cache_file.write_text(json.dumps({"tools": [{"id": "a"}]}), encoding="utf-8")
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            first = load_cached_registry(cfg)
+            cache_file.write_text(json.dumps({"tools": [{"id": "b"}, {"id": "c"}]}), encoding="utf-8")
+            os.utime(cache_file, ns=(1, 1))
+            second = load_cached_registry(cfg)
+
+        assert [t["id"] for t in first["tools"]] == ["a"]
+        assert [t["id"] for t in second["tools"]] == ["b", "c"]
+
+    def test_save_primes_memo(self, tmp_path):
+        """A freshly saved registry is served without re-parsing."""
+        import json
+        cfg = RegistryConfig(source="https://example.com", ref="memo")
+        cache_file = tmp_path / "registry.json"
+        data = {"tools": [{"id": "a"}]}
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, data)
+            with patch("mcpt.registry.client.json.loads", wraps=json.loads) as spy:
+                assert load_cached_registry(cfg) is data
+            assert spy.call_count == 0
+
+    def test_artifact_and_bundles_memoized(self, tmp_path):
+        """Artifacts and bundle membership are parsed once per process."""
+        import json
+        from mcpt.registry import get_bundle_membership, load_cached_artifact
+
+        cfg = RegistryConfig(source="https://example.com", ref="memo")
+        cache_file = tmp_path / "registry.json"
+        dist = tmp_path / "dist"
+        dist.mkdir()
+        (dist / "registry.index.json").write_text(
+            json.dumps({"bundles": {"core": ["a", "b"], "ops": ["b"]}}), encoding="utf-8"
+        )
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client.json.loads", wraps=json.loads) as spy:
+            index = load_cached_artifact(cfg, "registry.index.json")
+            assert load_cached_artifact(cfg, "registry.index.json") is index
+            membership = get_bundle_membership(cfg)
+            assert get_bundle_membership(cfg) is membership
+
+        assert membership == {"a": ["core"], "b": ["core", "ops"]}
+        assert spy.call_count == 1
+
+
+class TestToolIndex:
+    """Test the id -> tool index behind get_tool."""
+
+    @patch("mcpt.registry.client.get_registry")
+    def test_index_built_once_per_registry(self, mock_get_registry):
+        """Repeated lookups against one registry reuse its index."""
+        mock_get_registry.return_value = {
+            "tools": [{"id": f"tool-{i}"} for i in range(100)]
+        }
+        from mcpt.registry import client
+
+        with patch.object(client, "_build_tool_index", wraps=client._build_tool_index) as spy:
+            for i in range(100):
+                assert get_tool(f"tool-{i}")["id"] == f"tool-{i}"
+            assert get_tool("missing") is None
+
+        assert spy.call_count == 1
+
+    @patch("mcpt.registry.client.get_registry")
+    def test_index_follows_new_registry(self, mock_get_registry):
+        """A different registry object gets its own index."""
+        mock_get_registry.return_value = {"tools": [{"id": "old"}]}
+        assert get_tool("old") is not None
+        mock_get_registry.return_value = {"tools": [{"id": "new"}]}
+        assert get_tool("old") is None
+        assert get_tool("new") is not None
+
+    @patch("mcpt.registry.client.get_registry")
+    def test_replaced_registry_released(self, mock_get_registry):
+        """Indexes are kept for the current registry only, not for ones it replaced."""
+        import gc
+        import weakref
+
+        class Tools(list):
+            pass
+
+        old_tools = Tools([{"id": "old"}])
+        watch = weakref.ref(old_tools)
+        mock_get_registry.return_value = {"tools": old_tools}
+        assert get_tool("old") is not None
+        del old_tools
+        mock_get_registry.return_value = {"tools": [{"id": "new"}]}
+        assert get_tool("new") is not None
+        gc.collect()
+
+        assert watch() is None
+
+    @patch("mcpt.registry.client.get_registry")
+    def test_duplicate_ids_first_wins(self, mock_get_registry):
+        """Duplicate ids resolve to the first entry, as a linear scan would."""
+        mock_get_registry.return_value = {
+            "tools": [{"id": "dup", "name": "first"}, {"id": "dup", "name": "second"}]
+        }
+        assert get_tool("dup")["name"] == "first"
+
+
+class _NoScan(list):
+    """A list that fails when iterated over."""
+
+    def __iter__(self):
+        raise AssertionError("vocabulary scanned")
+
+
+class TestSearchIndex:
+    """Test the inverted search index behind search_tools."""
+
+    TOOLS = [
+        {"id": "file-compass", "name": "File Compass", "description": "Find files fast", "tags": ["Files", "search"]},
+        {"id": "tool-scan", "name": "Tool Scan", "description": "Scan tools for compass data", "tags": ["audit"]},
+        {"id": "fs", "name": "FS", "description": "", "tags": []},
+        {"id": "voice", "name": "Voice Synthesis", "description": "Speak text", "tags": ["audio", "files"]},
+    ]
+
+    def _brute_force(self, query, tag=None):
+        from mcpt.registry.client import calculate_match_score
+        hits = []
+        for tool in self.TOOLS:
+            if tag and tag.lower() not in [t.lower() for t in tool.get("tags", [])]:
+                continue
+            if not query:
+                hits.append((0, tool["id"]))
+                continue
+            score, _ = calculate_match_score(tool, query.lower())
+            if score > 0:
+                hits.append((score, tool["id"]))
+        return [tid for _, tid in sorted(hits, key=lambda h: (-h[0], h[1]))]
+
+    @patch("mcpt.registry.client.get_registry")
+    def test_matches_full_scan(self, mock_get_registry):
+        """Index-backed search returns exactly what a full scan would."""
+        mock_get_registry.return_value = {"tools": self.TOOLS}
+        for query in ["", "f", "fs", "compass", "FILE", "scan", "files", "zzz", "ast fi", "e-co", "ss da", "s."]:
+            for tag in [None, "files", "AUDIO", "missing"]:
+                got = [t["id"] for t in search_tools(query, tag=tag)]
+                assert got == self._brute_force(query, tag), (query, tag)
+
+    def test_persisted_index_reused(self, tmp_path):
+        """A registry loaded from cache uses the index stored in its snapshot."""
+        from mcpt.registry import clear_registry_memo
+        from mcpt.registry.index import SearchIndex
+
+        cfg = RegistryConfig(source="https://example.com", ref="search")
+        cache_file = tmp_path / "registry.json"
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            (tmp_path / "search.index.json").write_text("{}", encoding="utf-8")
+            save_cached_registry(cfg, {"tools": self.TOOLS})
+            assert not (tmp_path / "search.index.json").exists()
+            clear_registry_memo()
+            with patch.object(SearchIndex, "build", wraps=SearchIndex.build) as spy:
+                results = search_tools("compass", cfg=cfg)
+
+        assert [t["id"] for t in results] == ["file-compass", "tool-scan"]
+        assert spy.call_count == 0
+
+    def test_packed_index_matches_built(self):
+        """An index restored from pack() answers like the one it was packed from."""
+        import pickle
+        from mcpt.registry.index import SearchIndex
+
+        built = SearchIndex.build(self.TOOLS)
+        packed = built.pack()
+        restored = SearchIndex.unpack(pickle.loads(pickle.dumps(packed)), self.TOOLS)
+
+        for query in ["compass", "ast fi", "e-co", "zzz"]:
+            assert restored.candidates(query) == built.candidates(query)
+        assert list(restored.with_terms(["files", "scan"])) == built.with_terms(["files", "scan"])
+        assert list(restored.with_id_prefix("f")) == list(built.with_id_prefix("f"))
+        assert list(restored.with_tag("files")) == list(built.with_tag("files"))
+        assert restored.bm25(0, ["files"]) == built.bm25(0, ["files"])
+        # Fields are read from the tools, not stored in the index
+        assert b"Scan tools for compass data" not in pickle.dumps(packed)
+
+    def test_candidates_looked_up_by_trigram(self):
+        """Substring candidates match a vocabulary scan without doing one."""
+        from mcpt.registry.index import SearchIndex, tokenize
+
+        index = SearchIndex.build(self.TOOLS)
+
+        def scanned(query):
+            result = None
+            for run in set(tokenize(query)):
+                found = {pos for term, postings in index.terms.items() if run in term for pos in postings}
+                result = found if result is None else result & found
+            return sorted(result or ())
+
+        queries = ["compass", "omp", "ast fi", "files scan", "zzz", "ile-com"]
+        expected = {query: scanned(query) for query in queries}
+        index.vocab = _NoScan(index.vocab)
+        for query in queries:
+            assert index.candidates(query) == expected[query], query
+
+    def test_packed_index_rejects_other_registry(self):
+        """pack() output only fits the tools it was built from."""
+        from mcpt.registry.index import SearchIndex
+
+        packed = SearchIndex.build(self.TOOLS).pack()
+        with pytest.raises(ValueError):
+            SearchIndex.unpack(packed, self.TOOLS[:2])
+        with pytest.raises(ValueError):
+            SearchIndex.unpack({**packed, "version": 0}, self.TOOLS)
+
+    def test_stale_index_ignored(self, tmp_path):
+        """An index saved for other registry contents is rebuilt."""
+        import json
+        from mcpt.registry import clear_registry_memo
+
+        cfg = RegistryConfig(source="https://example.com", ref="search")
+        cache_file = tmp_path / "registry.json"
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": self.TOOLS})
+            cache_file.write_text(json.dumps({"tools": [{"id": "fresh-compass"}]}), encoding="utf-8")
+            clear_registry_memo()
+            results = search_tools("fresh", cfg=cfg)
+
+        assert [t["id"] for t in results] == ["fresh-compass"]
+
+
+class TestSimilarTools:
+    """Test trigram-backed "Did you mean" suggestions."""
+
+    def test_rescoring_limited_to_candidates(self):
+        """Only trigram candidates are rescored, not the whole registry."""
+        import difflib
+        from mcpt.registry import similar_tools
+        from mcpt.registry.client import FUZZY_CANDIDATES
+
+        registry = {"tools": [{"id": f"unrelated-{i:04d}"} for i in range(500)]}
+        registry["tools"].append({"id": "file-compass"})
+
+        with patch.object(difflib, "SequenceMatcher", wraps=difflib.SequenceMatcher) as spy:
+            results = similar_tools(registry, "file-compas")
+
+        assert results[0]["id"] == "file-compass"
+        assert spy.call_count <= FUZZY_CANDIDATES
+
+    def test_typo_found_without_substring(self):
+        """Misspelled ids still surface through shared trigrams."""
+        from mcpt.registry import similar_tools
+
+        registry = {"tools": [{"id": "voice-soundboard"}, {"id": "file-compass"}]}
+        results = similar_tools(registry, "voice-sondboard")
+        assert results[0]["id"] == "voice-soundboard"
+
+    def test_short_query_scans_all_ids(self):
+        """Queries shorter than a trigram still match by substring."""
+        from mcpt.registry import similar_tools
+
+        registry = {"tools": [{"id": "abc-fs-tool"}, {"id": "other"}]}
+        results = similar_tools(registry, "fs")
+        assert [t["id"] for t in results] == ["abc-fs-tool"]
+
+
+class TestRegistrySnapshot:
+    """Test the compiled registry snapshot."""
+
+    def test_snapshot_used_on_cold_load(self, tmp_path):
+        """A fresh process loads the snapshot instead of parsing JSON."""
+        import json
+        from mcpt.registry import clear_registry_memo
+
+        cfg = RegistryConfig(source="https://example.com", ref="snap")
+        cache_file = tmp_path / "registry.json"
+        data = {"tools": [{"id": "a", "tags": ["x"]}]}
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, data)
+            assert (tmp_path / "registry.snapshot").exists()
+            clear_registry_memo()
+            with patch("mcpt.registry.client.json.loads", wraps=json.loads) as spy:
+                loaded = load_cached_registry(cfg)
+
+        assert loaded == data
+        assert spy.call_count == 0
+
+    def test_snapshot_ignored_when_json_changes(self, tmp_path):
+        """JSON rewritten after the snapshot wins over the snapshot."""
+        import json
+        import os
+        from mcpt.registry import clear_registry_memo
+
+        cfg = RegistryConfig(source="https://example.com", ref="snap")
+        cache_file = tmp_path / "registry.json"
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": [{"id": "old"}]})
+            cache_file.write_text(json.dumps({"tools": [{"id": "new"}]}), encoding="utf-8")
+            os.utime(cache_file, ns=(1, 1))
+            clear_registry_memo()
+            loaded = load_cached_registry(cfg)
+            # The JSON load recompiles the snapshot for the next process
+            clear_registry_memo()
+            with patch("mcpt.registry.client.json.loads", wraps=json.loads) as spy:
+                reloaded = load_cached_registry(cfg)
+
+        assert loaded == {"tools": [{"id": "new"}]}
+        assert reloaded == loaded
+        assert spy.call_count == 0
+
+    def test_corrupt_snapshot_falls_back_to_json(self, tmp_path):
+        """An unreadable snapshot is treated as a miss."""
+        from mcpt.registry import clear_registry_memo
+
+        cfg = RegistryConfig(source="https://example.com", ref="snap")
+        cache_file = tmp_path / "registry.json"
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": [{"id": "a"}]})
+            (tmp_path / "registry.snapshot").write_bytes(b"not a pickle")
+            clear_registry_memo()
+            assert load_cached_registry(cfg) == {"tools": [{"id": "a"}]}
+
+
+class TestCacheMeta:
+    """Test the metadata sidecar behind get_registry_status."""
+
+    def test_status_from_sidecar(self, tmp_path):
+        """Status comes from meta.json without parsing registry.json."""
+        import hashlib
+        import json
+
+        cfg = RegistryConfig(source="https://example.com", ref="meta")
+        cache_file = tmp_path / "registry.json"
+        dist = tmp_path / "dist"
+        dist.mkdir()
+        (dist / "featured.json").write_text("{}", encoding="utf-8")
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": [{"id": "a"}, {"id": "b"}]})
+            with patch("mcpt.registry.client.json.loads", wraps=json.loads) as spy:
+                status = get_registry_status(cfg)
+
+        assert status.tool_count == 2
+        assert status.provenance == "cache"
+        assert status.content_hash == hashlib.sha256(cache_file.read_bytes()).hexdigest()
+        assert status.artifacts["registry.json"]["size"] == cache_file.stat().st_size
+        assert status.artifacts["featured.json"]["size"] == 2
+        assert status.fetched_at is not None
+        # Only the sidecar was parsed
+        assert spy.call_count == 1
+
+    def test_stale_sidecar_ignored(self, tmp_path):
+        """A sidecar describing an older registry.json is not trusted."""
+        import json
+        import os
+
+        cfg = RegistryConfig(source="https://example.com", ref="meta")
+        cache_file = tmp_path / "registry.json"
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": [{"id": "a"}]})
+            cache_file.write_text(json.dumps({"tools": [{"id": "a"}, {"id": "b"}, {"id": "c"}]}), encoding="utf-8")
+            os.utime(cache_file, ns=(1, 1))
+            status = get_registry_status(cfg)
+
+        assert status.tool_count == 3
+        assert status.content_hash is None
+
+
+class TestFreshnessPolicy:
+    """Test max-age / stale-while-revalidate handling in get_registry."""
+
+    def _aged_cache(self, tmp_path, cfg, age):
+        import time
+        from mcpt.registry.cache import record_fetch
+
+        cache_file = tmp_path / "registry.json"
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": [{"id": "cached"}]})
+        record_fetch(tmp_path, time.time() - age)
+        return cache_file
+
+    def test_classify(self):
+        """Ages map to fresh, stale and expired."""
+        from mcpt.registry import FreshnessPolicy
+
+        assert FreshnessPolicy().classify(10**9) == "fresh"
+        policy = FreshnessPolicy(max_age=60, stale_while_revalidate=60)
+        assert policy.classify(30) == "fresh"
+        assert policy.classify(90) == "stale"
+        assert policy.classify(200) == "expired"
+        assert FreshnessPolicy(max_age=60).classify(10**9) == "stale"
+
+    def test_from_env(self, monkeypatch):
+        """The policy is configurable through environment variables."""
+        from mcpt.registry import FreshnessPolicy
+
+        monkeypatch.setenv("MCPT_REGISTRY_MAX_AGE", "3600")
+        monkeypatch.setenv("MCPT_REGISTRY_SWR", "bogus")
+        assert FreshnessPolicy.from_env() == FreshnessPolicy(max_age=3600.0)
+
+    @patch("mcpt.registry.client.fetch_registry")
+    def test_stale_cache_served_and_refreshed_in_background(self, mock_fetch, tmp_path):
+        """A stale cache answers immediately and spawns one refresh."""
+        from mcpt.registry import FreshnessPolicy
+
+        cfg = RegistryConfig(source="https://example.com", ref="swr")
+        cache_file = self._aged_cache(tmp_path, cfg, age=120)
+        policy = FreshnessPolicy(max_age=60)
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client.subprocess.Popen") as mock_popen:
+            first = get_registry(cfg, policy=policy)
+            second = get_registry(cfg, policy=policy)
+
+        assert first["tools"][0]["id"] == "cached"
+        assert second is first
+        mock_fetch.assert_not_called()
+        # The pending marker suppresses a second spawn
+        assert mock_popen.call_count == 1
+        assert mock_popen.call_args[0][0][-3:] == ["mcpt.registry.refresh", cfg.source, cfg.ref]
+
+    @patch("mcpt.registry.client.fetch_registry")
+    def test_expired_cache_refetched(self, mock_fetch, tmp_path):
+        """Past the stale-while-revalidate window the fetch blocks."""
+        from mcpt.registry import FreshnessPolicy
+
+        cfg = RegistryConfig(source="https://example.com", ref="swr")
+        cache_file = self._aged_cache(tmp_path, cfg, age=1000)
+        mock_fetch.return_value = {"tools": [{"id": "fresh"}]}
+        policy = FreshnessPolicy(max_age=60, stale_while_revalidate=60)
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client.subprocess.Popen") as mock_popen:
+            data = get_registry(cfg, policy=policy)
+
+        assert data["tools"][0]["id"] == "fresh"
+        mock_popen.assert_not_called()
+
+    def test_refresh_entry_point(self):
+        """python -m mcpt.registry.refresh forces a refetch for source/ref."""
+        from mcpt.registry import refresh
+
+        with patch("mcpt.registry.refresh.get_registry") as mock_get:
+            assert refresh.main(["https://example.com", "main"]) == 0
+        mock_get.assert_called_once_with(
+            RegistryConfig(source="https://example.com", ref="main"), force_refresh=True
+        )
+        assert refresh.main([]) == 2
+
+
+class TestCacheLock:
+    """Test cross-process fetch coalescing and atomic cache writes."""
+
+    def test_waiting_refresh_reuses_lock_holders_result(self, tmp_path):
+        """A refresh that waited for the lock reuses the holder's cache."""
+        import threading
+        from mcpt.registry.storage import cache_lock
+
+        cfg = RegistryConfig(source="https://example.com", ref="lock")
+        cache_file = tmp_path / "registry.json"
+        results = {}
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client.fetch_registry") as mock_fetch:
+            with cache_lock(tmp_path, timeout=1) as locked:
+                assert locked
+                waiter = threading.Thread(
+                    target=lambda: results.setdefault("data", get_registry(cfg, force_refresh=True))
+                )
+                waiter.start()
+                waiter.join(0.3)
+                assert waiter.is_alive()
+                # The lock holder finishes its own refresh
+                save_cached_registry(cfg, {"tools": [{"id": "from-holder"}]})
+            waiter.join(5)
+
+        assert results["data"]["tools"][0]["id"] == "from-holder"
+        mock_fetch.assert_not_called()
+
+    def test_lock_timeout_proceeds_unlocked(self, tmp_path):
+        """A lock that cannot be taken in time does not block forever."""
+        from mcpt.registry.storage import cache_lock
+
+        with cache_lock(tmp_path, timeout=1) as outer:
+            with cache_lock(tmp_path, timeout=0.1) as inner:
+                assert outer
+                assert not inner
+
+    def test_atomic_write_replaces_whole_file(self, tmp_path):
+        """Atomic writes leave no temporary files and keep old data on failure."""
+        from mcpt.registry.storage import atomic_write_bytes
+
+        target = tmp_path / "registry.json"
+        atomic_write_bytes(target, b"old")
+        with patch("mcpt.registry.storage.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                atomic_write_bytes(target, b"new")
+
+        assert target.read_bytes() == b"old"
+        assert [p.name for p in tmp_path.iterdir()] == ["registry.json"]
+
+
+class TestImmutableRefs:
+    """Test the zero-network fast path for pinned refs."""
+
+    SHA = "0123456789abcdef0123456789abcdef01234567"
+
+    def test_classification(self, monkeypatch):
+        """SHAs are immutable; tags only under the tag policy; branches never."""
+        from mcpt.registry import is_immutable_ref
+
+        monkeypatch.delenv("MCPT_IMMUTABLE_TAGS", raising=False)
+        assert is_immutable_ref(self.SHA)
+        assert not is_immutable_ref(self.SHA[:12])
+        assert not is_immutable_ref("v0.3.0")
+        assert not is_immutable_ref("main")
+
+        monkeypatch.setenv("MCPT_IMMUTABLE_TAGS", "1")
+        assert is_immutable_ref("v0.3.0")
+        assert is_immutable_ref("1.2.3-rc.1")
+        assert not is_immutable_ref("main")
+        assert not is_immutable_ref("release-branch")
+
+    @patch("mcpt.registry.client.fetch_registry")
+    def test_cached_sha_never_refetched(self, mock_fetch, tmp_path):
+        """--refresh on a cached SHA ref performs no fetch."""
+        cfg = RegistryConfig(source="https://example.com", ref=self.SHA)
+        cache_file = tmp_path / "registry.json"
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": [{"id": "pinned"}]})
+            data = get_registry(cfg, force_refresh=True)
+
+        assert data["tools"][0]["id"] == "pinned"
+        mock_fetch.assert_not_called()
+
+    @patch("mcpt.registry.client.fetch_registry")
+    def test_force_refetches_immutable_ref(self, mock_fetch, tmp_path):
+        """force=True bypasses the fast path."""
+        cfg = RegistryConfig(source="https://example.com", ref=self.SHA)
+        cache_file = tmp_path / "registry.json"
+        mock_fetch.return_value = {"tools": [{"id": "refetched"}]}
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": [{"id": "pinned"}]})
+            data = get_registry(cfg, force_refresh=True, force=True)
+
+        assert data["tools"][0]["id"] == "refetched"
+
+    @patch("mcpt.registry.client.fetch_registry")
+    def test_mutable_ref_still_refreshed(self, mock_fetch, tmp_path):
+        """Branches keep normal --refresh behaviour."""
+        cfg = RegistryConfig(source="https://example.com", ref="main")
+        cache_file = tmp_path / "registry.json"
+        mock_fetch.return_value = {"tools": []}
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, {"tools": [{"id": "old"}]})
+            get_registry(cfg, force_refresh=True)
+
+        mock_fetch.assert_called_once()
+
+
+class TestContentAddressedCache:
+    """Test the shared blob store, per-ref manifests and eviction."""
+
+    @staticmethod
+    def cache_paths(root):
+        return patch(
+            "mcpt.registry.client.registry_cache_path",
+            side_effect=lambda cfg: root / cfg.ref / "registry.json",
+        )
+
+    def test_identical_registries_share_one_blob(self, tmp_path):
+        """Refs with the same registry.json are linked to a single blob."""
+        import os
+
+        from mcpt.registry.cache import read_manifest
+
+        root = tmp_path / "registry"
+        with self.cache_paths(root):
+            save_cached_registry(RegistryConfig(ref="v1.0.0"), {"tools": [{"id": "a"}]})
+            save_cached_registry(RegistryConfig(ref="v1.0.1"), {"tools": [{"id": "a"}]})
+            loaded = load_cached_registry(RegistryConfig(ref="v1.0.1"))
+
+        assert loaded["tools"][0]["id"] == "a"
+        digest = read_manifest(root / "v1.0.0")["registry.json"]
+        assert read_manifest(root / "v1.0.1")["registry.json"] == digest
+        assert os.path.samefile(root / "v1.0.0" / "registry.json", root / "v1.0.1" / "registry.json")
+        assert len(list((root / ".blobs").rglob(digest))) == 1
+
+    def test_refresh_leaves_sibling_refs_alone(self, tmp_path):
+        """Refreshing one ref does not age, freshen or invalidate a ref sharing its blob."""
+        import time
+
+        from mcpt.registry import FreshnessPolicy
+        from mcpt.registry.cache import read_fetched_at, record_fetch
+        from mcpt.registry.client import _file_stamp, _open_snapshot, load_cache_meta
+
+        root = tmp_path / "registry"
+        old, new = RegistryConfig(ref="old"), RegistryConfig(ref="new")
+        with self.cache_paths(root):
+            save_cached_registry(old, {"tools": [{"id": "a"}]})
+            record_fetch(root / "old", time.time() - 1000)
+            stamp = _file_stamp(root / "old" / "registry.json")
+            save_cached_registry(new, {"tools": [{"id": "a"}]})
+
+            assert _file_stamp(root / "old" / "registry.json") == stamp
+            assert load_cache_meta(old) is not None
+            assert _open_snapshot(old) is not None
+            assert time.time() - read_fetched_at(root / "old") >= 1000
+            with patch("mcpt.registry.client.fetch_registry") as mock_fetch:
+                mock_fetch.return_value = {"tools": [{"id": "b"}]}
+                data = get_registry(old, policy=FreshnessPolicy(max_age=60, stale_while_revalidate=60))
+
+        # The old ref was still expired, so it was refetched
+        assert data["tools"][0]["id"] == "b"
+
+    def test_stats_report_sharing(self, tmp_path):
+        """cache_stats counts shared blobs once."""
+        import os
+
+        from mcpt.registry import cache_stats
+
+        root = tmp_path / "registry"
+        with self.cache_paths(root):
+            for i, ref in enumerate(("a", "b", "c")):
+                save_cached_registry(RegistryConfig(ref=ref), {"tools": [{"id": "same"}]})
+                os.utime(root / ref / "manifest.json", (1000 + i, 1000 + i))
+
+        stats = cache_stats(root)
+        assert [u.ref for u in stats.refs] == ["c", "b", "a"]
+        # registry.json and its snapshot, each stored once
+        assert stats.blob_count == 2
+        assert os.path.samefile(root / "a" / "registry.snapshot", root / "c" / "registry.snapshot")
+        assert stats.orphan_blobs == 0
+        assert stats.saved_bytes == 2 * stats.blob_bytes
+        assert all(u.shared_bytes == stats.blob_bytes for u in stats.refs)
+
+    def test_gc_evicts_least_recently_used(self, tmp_path):
+        """gc drops the oldest refs and the blobs only they used."""
+        import os
+
+        from mcpt.registry import cache_stats, collect_garbage
+
+        root = tmp_path / "registry"
+        with self.cache_paths(root):
+            for i, ref in enumerate(["old", "mid", "new"]):
+                save_cached_registry(
+                    RegistryConfig(ref=ref), {"tools": [{"id": ref, "description": "x" * 2000}]}
+                )
+                os.utime(root / ref / "manifest.json", (1000 + i, 1000 + i))
+        sizes = {u.ref: u.own_bytes for u in cache_stats(root).refs}
+
+        result = collect_garbage(root, max_bytes=sizes["mid"] + sizes["new"], keep={"mid"})
+
+        assert result.evicted == ["old"]
+        # Its registry.json and snapshot
+        assert result.removed_blobs == 2
+        assert not (root / "old").exists()
+        assert (root / "mid").exists() and (root / "new").exists()
+        assert cache_stats(root).blob_count == 4
+
+    def test_gc_dry_run_removes_nothing(self, tmp_path):
+        from mcpt.registry import collect_garbage
+
+        root = tmp_path / "registry"
+        with self.cache_paths(root):
+            save_cached_registry(RegistryConfig(ref="a"), {"tools": []})
+
+        result = collect_garbage(root, max_bytes=1, dry_run=True)
+
+        assert result.evicted == ["a"]
+        assert (root / "a" / "registry.json").exists()
+
+    def test_edited_cache_file_does_not_poison_blob(self, tmp_path):
+        """A blob modified through a hard link is rewritten on the next save."""
+        from mcpt.registry import clear_registry_memo
+
+        root = tmp_path / "registry"
+        data = {"tools": [{"id": "a"}]}
+        with self.cache_paths(root):
+            save_cached_registry(RegistryConfig(ref="x"), data)
+            (root / "x" / "registry.json").write_text('{"tools": []}', encoding="utf-8")
+            save_cached_registry(RegistryConfig(ref="y"), data)
+            clear_registry_memo()
+            loaded = load_cached_registry(RegistryConfig(ref="y"))
+
+        assert loaded == data
+
+    def test_parse_size(self):
+        from mcpt.registry import parse_size
+
+        assert parse_size("512") == 512
+        assert parse_size("2K") == 2048
+        assert parse_size("1.5MiB") == int(1.5 * 1024 * 1024)
+        assert parse_size("1g") == 1024**3
+        with pytest.raises(ValueError):
+            parse_size("lots")
+
+
+class TestMissingArtifacts:
+    """Test negative caching of dist/ artifacts a ref does not publish."""
+
+    @staticmethod
+    def handler(requested):
+        import httpx
+
+        def handle(request):
+            requested.append(request.url.path.rsplit("/", 1)[-1])
+            if request.url.path.endswith("/registry.json"):
+                return httpx.Response(200, json={"tools": []})
+            if request.url.path.endswith("/featured.json"):
+                return httpx.Response(404)
+            return httpx.Response(200, content=b"{}")
+
+        return handle
+
+    def test_404_is_not_requested_again(self, tmp_path):
+        """A 404 artifact is skipped on the next refresh."""
+        from mcpt.registry.client import fetch_registry, unpublished_artifacts
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="main")
+        cache_file = tmp_path / "main" / "registry.json"
+        requested = []
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client._http_client", mock_http_client(self.handler(requested))):
+            fetch_registry(cfg)
+            assert "featured.json" in requested
+            requested.clear()
+            fetch_registry(cfg)
+            unpublished = unpublished_artifacts(cfg)
+
+        assert "featured.json" not in requested
+        assert "capabilities.json" in requested
+        assert unpublished == ["featured.json"]
+
+    def test_404_expires_after_ttl(self, tmp_path):
+        """Mutable refs retry a missing artifact once the TTL has passed."""
+        from mcpt.registry.client import fetch_registry
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="main")
+        cache_file = tmp_path / "main" / "registry.json"
+        requested = []
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client._http_client", mock_http_client(self.handler(requested))):
+            fetch_registry(cfg)
+            requested.clear()
+            with patch("mcpt.registry.client.MISSING_ARTIFACT_TTL", 0.0):
+                fetch_registry(cfg)
+
+        assert "featured.json" in requested
+
+    def test_immutable_ref_never_retries(self):
+        """A 404 on an immutable ref never expires."""
+        from mcpt.registry.client import is_known_missing
+
+        entry = {"not_found_at": "2000-01-01T00:00:00+00:00"}
+        assert not is_known_missing(entry)
+        assert is_known_missing(entry, ttl=None)
+        assert not is_known_missing({"etag": '"abc"'}, ttl=None)
+
+    def test_status_reports_unpublished(self, tmp_path):
+        """get_registry_status lists unpublished artifacts."""
+        from mcpt.registry.client import fetch_registry
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="main")
+        cache_file = tmp_path / "main" / "registry.json"
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client._http_client", mock_http_client(self.handler([]))):
+            save_cached_registry(cfg, fetch_registry(cfg))
+            status = get_registry_status(cfg)
+
+        assert status.unpublished == ["featured.json"]
+
+
+class TestCompressedCache:
+    """Test compressed transfer and compressed cache files."""
+
+    LARGE = {"tools": [{"id": f"tool-{i}", "description": "x" * 100} for i in range(200)]}
+
+    def test_large_registry_stored_compressed(self, tmp_path):
+        """A large registry is gzipped on disk and read back transparently."""
+        import hashlib
+        import json
+        from mcpt.registry import clear_registry_memo
+
+        cfg = RegistryConfig(ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, self.LARGE)
+            clear_registry_memo()
+            (cache_file.parent / "registry.snapshot").unlink()
+            loaded = load_cached_registry(cfg)
+            status = get_registry_status(cfg)
+
+        raw = json.dumps(self.LARGE, separators=(",", ":")).encode("utf-8")
+        assert cache_file.read_bytes()[:2] == b"\x1f\x8b"
+        assert cache_file.stat().st_size < len(raw) // 5
+        assert loaded == self.LARGE
+        assert status.content_hash == hashlib.sha256(raw).hexdigest()
+
+    def test_corrupt_compressed_registry_self_heals(self, tmp_path):
+        """A truncated gzip cache is discarded like corrupt JSON."""
+        cfg = RegistryConfig(ref="v1")
+        cache_file = tmp_path / "registry.json"
+        cache_file.write_bytes(b"\x1f\x8b\x08\x00garbage")
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            assert load_cached_registry(cfg) is None
+        assert not cache_file.exists()
+
+    def test_artifacts_negotiated_and_stored_compressed(self, tmp_path):
+        """Artifacts are requested with Accept-Encoding and cached compressed."""
+        import gzip
+        import httpx
+        from mcpt.registry.client import fetch_registry, load_cached_artifact
+
+        cfg = RegistryConfig(source="https://github.com/org/repo", ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+        llms = ("line of text\n" * 2000).encode("utf-8")
+        encodings = []
+
+        def handler(request):
+            encodings.append(request.headers.get("Accept-Encoding", ""))
+            if request.url.path.endswith("/registry.json"):
+                return httpx.Response(200, json={"tools": []})
+            if request.url.path.endswith("/registry.llms.txt"):
+                return httpx.Response(
+                    200, content=gzip.compress(llms), headers={"Content-Encoding": "gzip"}
+                )
+            return httpx.Response(200, content=b"{}")
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file), \
+             patch("mcpt.registry.client._http_client", mock_http_client(handler)):
+            fetch_registry(cfg)
+            text = load_cached_artifact(cfg, "registry.llms.txt")
+
+        assert all("gzip" in e for e in encodings)
+        stored = cache_file.parent / "dist" / "registry.llms.txt"
+        assert stored.read_bytes()[:2] == b"\x1f\x8b"
+        assert text == llms.decode("utf-8")
+        assert (cache_file.parent / "dist" / "featured.json").read_bytes() == b"{}"
+
+
+class TestStreamingParse:
+    """Test incremental parsing of the tools array."""
+
+    def parse(self, text, chunk_size=7):
+        import io
+        from mcpt.registry.stream import iter_json_array
+
+        return list(iter_json_array(io.BytesIO(text.encode("utf-8")), "tools", chunk_size=chunk_size))
+
+    def test_matches_json_loads(self):
+        """Small chunks split keys, strings, numbers and multibyte characters."""
+        import json
+
+        doc = {
+            "schema_version": 12345,
+            "meta": {"nested": ["tools", {"tools": []}]},
+            "tools": [
+                {"id": "a", "n": 1.25e3, "desc": "café ☃ \" quoted"},
+                {"id": "b", "tags": [], "n": 1234567890},
+                7,
+                "x",
+            ],
+            "after": True,
+        }
+        for indent in (None, 2):
+            assert self.parse(json.dumps(doc, indent=indent, ensure_ascii=False)) == doc["tools"]
+
+    def test_numbers_split_across_chunks(self):
+        """A number cut at a chunk boundary after a valid prefix ("1." + "5") is read whole."""
+        text = '{"tools": [1.5, 2e10, -0.25, 30E-1, {"n": 12}]}'
+        for chunk_size in range(1, len(text) + 1):
+            assert self.parse(text, chunk_size) == [1.5, 2e10, -0.25, 3.0, {"n": 12}]
+
+    def test_empty_and_missing(self):
+        assert self.parse('{"tools": []}') == []
+        with pytest.raises(ValueError):
+            self.parse('{"other": 1}')
+        with pytest.raises(ValueError):
+            self.parse("{}")
+
+    def test_truncated_document_raises(self):
+        with pytest.raises(ValueError):
+            self.parse('{"tools": [{"id": "a"}, {"id": ')
+
+    def test_iter_tools_streams_cache(self, tmp_path):
+        """iter_tools reads the cached (compressed) file without loading it whole."""
+        from mcpt.registry import clear_registry_memo, iter_tools
+
+        cfg = RegistryConfig(ref="v1")
+        cache_file = tmp_path / "v1" / "registry.json"
+        data = {"tools": [{"id": f"tool-{i}", "description": "x" * 100} for i in range(300)]}
+
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, data)
+            clear_registry_memo()
+            with patch("mcpt.registry.client.json.loads") as loads:
+                streamed = list(iter_tools(cfg))
+            loads.assert_not_called()
+
+        assert streamed == data["tools"]
+
+    @patch("mcpt.registry.client.fetch_registry")
+    def test_iter_tools_without_cache_fetches(self, mock_fetch, tmp_path):
+        from mcpt.registry import iter_tools
+
+        mock_fetch.return_value = {"tools": [{"id": "remote"}]}
+        cfg = RegistryConfig(ref="v1")
+        with patch("mcpt.registry.client.registry_cache_path", return_value=tmp_path / "registry.json"):
+            assert [t["id"] for t in iter_tools(cfg)] == ["remote"]
+
+
+class TestSnapshotRecords:
+    """Test tools loaded from the mapped snapshot."""
+
+    DATA = {
+        "schema_version": 1,
+        "tools": [
+            {"id": "a", "name": "A", "description": "first", "tags": ["x"], "capabilities": ["network"]},
+            {"id": "b", "name": "B", "description": "second", "deprecated": True},
+        ],
+    }
+
+    def load(self, tmp_path):
+        from mcpt.registry import clear_registry_memo
+        from mcpt.registry.client import _open_snapshot
+
+        cfg = RegistryConfig(ref="snap")
+        cache_file = tmp_path / "registry.json"
+        with patch("mcpt.registry.client.registry_cache_path", return_value=cache_file):
+            save_cached_registry(cfg, self.DATA)
+            clear_registry_memo()
+            assert _open_snapshot(cfg) is not None
+            return load_cached_registry(cfg)
+
+    def test_tools_are_plain_dicts(self, tmp_path):
+        registry = self.load(tmp_path)
+
+        assert registry == self.DATA
+        assert all(type(tool) is dict for tool in registry["tools"])
+
+    def test_json_round_trip(self, tmp_path):
+        """Snapshot-loaded registries and tools serialize in full."""
+        import json
+        from mcpt.registry import iter_tools
+
+        self.load(tmp_path)
+        cfg = RegistryConfig(ref="snap")
+        with patch("mcpt.registry.client.registry_cache_path", return_value=tmp_path / "registry.json"):
+            registry = get_registry(cfg)
+            tool = get_tool("b", cfg)
+            streamed = list(iter_tools(cfg))
+
+        assert json.loads(json.dumps(registry)) == self.DATA
+        assert json.loads(json.dumps(tool)) == self.DATA["tools"][1]
+        assert json.loads(json.dumps(streamed)) == self.DATA["tools"]
+
+    def test_truncated_snapshot_is_a_miss(self, tmp_path):
+        from mcpt.registry import clear_registry_memo
+
+        self.load(tmp_path)
+        snapshot = tmp_path / "registry.snapshot"
+        snapshot.write_bytes(snapshot.read_bytes()[:-10])
+        cfg = RegistryConfig(ref="snap")
+        with patch("mcpt.registry.client.registry_cache_path", return_value=tmp_path / "registry.json"):
+            clear_registry_memo()
+            assert load_cached_registry(cfg) == self.DATA
+
+
+class TestSearchHits:
+    """Test that search results reference registry tools instead of copying them."""
+
+    REGISTRY = {
+        "tools": [
+            {"id": "compass", "description": "finds north", "tags": ["nav"]},
+            {"id": "map", "description": "compass rose", "_bundles": ["core"]},
+        ]
+    }
+
+    def search(self, query):
+        with patch("mcpt.registry.client.get_registry", return_value=self.REGISTRY), \
+             patch("mcpt.registry.client.load_cached_artifact", return_value=None):
+            return search_tools(query)
+
+    def test_hits_reference_tools(self):
+        hits = self.search("compass")
+
+        assert [h.id for h in hits] == ["compass", "map"]
+        assert hits[0].tool is self.REGISTRY["tools"][0]
+        assert self.REGISTRY["tools"][0] == {"id": "compass", "description": "finds north", "tags": ["nav"]}
+
+    def test_hits_read_like_dicts(self):
+        hits = self.search("compass")
+        hit = hits[0]
+
+        assert hit["_score"] == hit.score > 0
+        assert hit["tags"] == ["nav"]
+        assert hit.get("_bundles") is None
+        assert hit.to_dict() == {
+            "id": "compass",
+            "description": "finds north",
+            "tags": ["nav"],
+            "_score": hit.score,
+            "_reasons": hit.reasons,
+        }
+        hit.bundles = ["ops"]
+        assert dict(hit)["_bundles"] == ["ops"]
+        assert list(hits[1]).count("_bundles") == 1
+
+    def test_empty_query_hits(self):
+        hits = self.search("")
+
+        assert [h["_reasons"] for h in hits] == [("filter match",), ("filter match",)]
+        assert all(h.score == 0 for h in hits)
+
+
+class TestTopKSearch:
+    """Test limit/offset search against the full ranking."""
+
+    def registry(self):
+        import random
+
+        rng = random.Random(7)
+        words = ["file", "files", "search", "git", "web", "filer", "index", "fil"]
+        tools = []
+        for i in range(300):
+            w = rng.choice(words)
+            tools.append({
+                "id": f"{w}-{i:03d}" if i % 3 else f"{rng.choice(words)}{i}",
+                "name": rng.choice(words + [f"{w} tool"]),
+                "description": " ".join(rng.sample(words, 3)),
+                "tags": rng.sample(words, rng.randint(0, 3)),
+            })
+        tools.append({"id": "file", "name": "File", "description": "the file", "tags": ["file"]})
+        return {"tools": tools}
+
+    def test_pages_match_full_ranking(self):
+        registry = self.registry()
+        with patch("mcpt.registry.client.get_registry", return_value=registry), \
+             patch("mcpt.registry.client.load_cached_artifact", return_value=None):
+            for query in ["file", "fil", "search", "git-1", "", "zzz", "fi"]:
+                for tag in [None, "web"]:
+                    full = [(h.id, h.score) for h in search_tools(query, tag=tag)]
+                    for limit, offset in [(1, 0), (5, 0), (10, 3), (500, 0), (3, 400)]:
+                        page = search_tools(query, tag=tag, limit=limit, offset=offset)
+                        assert [(h.id, h.score) for h in page] == full[offset:offset + limit], (query, tag, limit, offset)
+
+    def test_bm25_pages_match_full_ranking(self):
+        registry = self.registry()
+        with patch("mcpt.registry.client.get_registry", return_value=registry), \
+             patch("mcpt.registry.client.load_cached_artifact", return_value=None):
+            for query in ["file", "file search", "git web index", "fil", "zzz"]:
+                full = [(h.id, h.score) for h in search_tools(query, ranking="bm25")]
+                for limit, offset in [(1, 0), (5, 0), (10, 3), (500, 0), (3, 400)]:
+                    page = search_tools(query, ranking="bm25", limit=limit, offset=offset)
+                    assert [(h.id, h.score) for h in page] == full[offset:offset + limit], (query, limit, offset)
+
+    def test_bm25_stops_early(self):
+        """Tools holding only low-bound words are skipped once the page is full."""
+        from mcpt.registry import client
+
+        tools = [
+            {"id": f"common-{i}", "name": "Common", "description": "common tool"} for i in range(50)
+        ] + [{"id": "rare-tool", "name": "Rare", "description": "rare common"}]
+        calls = []
+        real = client.score_bm25
+
+        def counting(*args):
+            calls.append(args[1])
+            return real(*args)
+
+        with patch("mcpt.registry.client.get_registry", return_value={"tools": tools}), \
+             patch("mcpt.registry.client.load_cached_artifact", return_value=None), \
+             patch("mcpt.registry.client.score_bm25", side_effect=counting):
+            hits = search_tools("rare common", ranking="bm25", limit=1)
+
+        assert [h.id for h in hits] == ["rare-tool"]
+        assert len(calls) < len(tools)
+
+    def test_exact_id_stops_early(self):
+        """A top hit beating the index bound skips scoring the other candidates."""
+        from mcpt.registry import client
+
+        registry = self.registry()
+        calls = []
+        real = client.score_fields
+
+        def counting(*args):
+            calls.append(args[0])
+            return real(*args)
+
+        with patch("mcpt.registry.client.get_registry", return_value=registry), \
+             patch("mcpt.registry.client.load_cached_artifact", return_value=None), \
+             patch("mcpt.registry.client.score_fields", side_effect=counting):
+            hits = search_tools("file", limit=1)
+
+        matching = [t for t in registry["tools"] if "file" in repr(t).lower()]
+        assert hits[0].id == "file"
+        assert len(calls) < len(matching)
+
+
+class TestBM25Ranking:
+    """Test the per-word BM25 ranking mode."""
+
+    REGISTRY = {
+        "tools": [
+            {"id": "file-compass", "name": "File Compass", "description": "Semantic file search", "tags": ["search"]},
+            {"id": "grep-tool", "name": "Grep", "description": "Search text in a file tree"},
+            {"id": "web-fetch", "name": "Fetch", "description": "Download web pages", "tags": ["web"]},
+            {"id": "file-list", "name": "Lister", "description": "List a directory"},
+        ]
+    }
+
+    def search(self, query, **kwargs):
+        with patch("mcpt.registry.client.get_registry", return_value=self.REGISTRY), \
+             patch("mcpt.registry.client.load_cached_artifact", return_value=None):
+            return search_tools(query, ranking="bm25", **kwargs)
+
+    def test_multi_word_query(self):
+        with patch("mcpt.registry.client.get_registry", return_value=self.REGISTRY), \
+             patch("mcpt.registry.client.load_cached_artifact", return_value=None):
+            assert [h.id for h in search_tools("file search")] == ["file-compass"]
+
+        ids = [h.id for h in self.search("file search")]
+        assert ids[:2] == ["file-compass", "grep-tool"]
+        assert "file-list" in ids
+        assert "web-fetch" not in ids
+
+    def test_reasons_show_term_contributions(self):
+        hit = self.search("file search")[0]
+
+        terms = [r for r in hit.reasons if r.startswith("term ")]
+        assert [t.split(":")[0] for t in terms] == ["term 'file'", "term 'search'"]
+        total = sum(float(t.split(": ")[1]) for t in terms)
+        assert abs(total - hit.score) < 0.01
+
+    def test_id_bonuses_on_top(self):
+        hits = self.search("file-list")
+
+        assert hits[0].id == "file-list"
+        assert "exact id match: +100" in hits[0].reasons
+        assert hits[0].score > 140
+
+    def test_limit_matches_full_ranking(self):
+        full = [h.id for h in self.search("file search web")]
+        assert [h.id for h in self.search("file search web", limit=2, offset=1)] == full[1:3]
+
+    def test_unknown_ranking(self):
+        with pytest.raises(ValueError):
+            search_tools("x", ranking="fuzzy")
+
+
+class TestQueryLanguage:
+    """Test structured queries compiled to posting-list set operations."""
+
+    REGISTRY = {
+        "tools": [
+            {"id": "fetcher", "description": "fetch files", "tags": ["agents"], "capabilities": ["network"]},
+            {"id": "runner", "description": "run files", "tags": ["agents"], "capabilities": ["network", "exec"]},
+            {"id": "reader", "description": "read files", "tags": ["Agents"], "capabilities": ["filesystem-read"]},
+            {"id": "old", "description": "old files", "tags": ["agents"], "deprecated": True},
+            {"id": "notes", "description": "take notes", "capabilities": []},
+        ]
+    }
+    ARTIFACTS = {
+        "registry.index.json": {"bundles": {"core": ["reader"], "ops": ["fetcher"]}},
+        "featured.json": {
+            "featured": ["notes"],
+            "collections": [{"id": "starter", "name": "Starter", "tools": ["reader", "runner"]}],
+        },
+    }
+
+    def search(self, query, **kwargs):
+        from mcpt.registry import clear_registry_memo
+
+        clear_registry_memo()
+        with patch("mcpt.registry.client.get_registry", return_value=self.REGISTRY), \
+             patch("mcpt.registry.featured.get_registry", return_value=self.REGISTRY), \
+             patch("mcpt.registry.client.load_cached_artifact", side_effect=lambda cfg, name: self.ARTIFACTS.get(name)), \
+             patch("mcpt.registry.featured.load_cached_artifact", side_effect=lambda cfg, name: self.ARTIFACTS.get(name)):
+            return [h.id for h in search_tools(query, **kwargs)]
+
+    def test_parse(self):
+        from mcpt.registry import parse_query
+        from mcpt.registry.query import Filter
+
+        q = parse_query('cap:network -cap:Exec tag:agents risk<high trust>=verified "file search" http://x')
+        assert q.text == "file search http://x"
+        assert q.filters == [
+            Filter("cap", ":", "network"),
+            Filter("cap", ":", "exec", negate=True),
+            Filter("tag", ":", "agents"),
+            Filter("risk", "<", "high"),
+            Filter("trust", ">=", "verified"),
+        ]
+        assert parse_query("-deprecated").filters == [Filter("is", ":", "deprecated", negate=True)]
+
+    @pytest.mark.parametrize("query", ["risk<huge", "tag>x", "is:shiny", "cap:"])
+    def test_parse_errors(self, query):
+        from mcpt.registry import QueryError, parse_query
+
+        with pytest.raises(QueryError):
+            parse_query(query)
+
+    def test_filters(self):
+        assert self.search("cap:network -cap:exec") == ["fetcher"]
+        assert self.search("tag:agents -deprecated") == ["fetcher", "reader", "runner"]
+        assert self.search("cap:filesystem_read") == ["reader"]
+        assert self.search("risk<high") == ["fetcher", "notes", "old", "reader"]
+        assert self.search("risk<medium") == ["notes", "old"]
+        assert self.search("risk>=extreme") == ["runner"]
+        assert self.search("bundle:core") == ["reader"]
+        assert self.search("trust>=verified") == ["fetcher", "reader"]
+        assert self.search("trust:deprecated") == ["old"]
+        assert self.search("collection:starter") == ["reader", "runner"]
+        assert self.search("is:featured") == ["notes"]
+        assert self.search("-is:featured -tag:agents") == []
+
+    def test_filters_with_text(self):
+        assert self.search("tag:agents files", limit=2) == ["fetcher", "old"]
+        assert self.search('-deprecated "run files"') == ["runner"]
+        assert self.search("read -cap:network", ranking="bm25") == ["reader"]
+
+    def test_filters_skip_scoring(self):
+        """Filter-only queries never score tools."""
+        with patch("mcpt.registry.client.score_fields", side_effect=AssertionError):
+            assert self.search("tag:agents cap:network") == ["fetcher", "runner"]
+
+
+class TestFieldBitmaps:
+    """Test the bitmap postings behind filters and facets."""
+
+    def test_bitmap_round_trip(self):
+        from mcpt.registry.query import bit_positions, bitmap
+
+        positions = [0, 1, 7, 8, 63, 64, 1000]
+        assert bit_positions(bitmap(positions, 1001)) == positions
+        assert bit_positions(0) == []
+
+    def test_facets_under_filter(self):
+        from mcpt.registry.client import field_postings
+        from mcpt.registry.query import parse_query, select
+
+        registry = TestQueryLanguage.REGISTRY
+        with patch("mcpt.registry.client.load_cached_artifact", return_value=None), \
+             patch("mcpt.registry.featured.load_cached_artifact", return_value=None):
+            postings = field_postings(registry)
+            everything = postings.facets()
+            networked = postings.facets(select(postings, parse_query("cap:network").filters))
+
+        assert everything["tag"] == {"agents": 4}
+        assert everything["is"] == {"deprecated": 1}
+        assert networked["cap"] == {"network": 2, "exec": 1}
+        assert networked["risk"] == {"extreme": 1, "medium": 1}
+        assert "filesystem_read" not in networked["cap"]
+
+    def test_postings_persisted_in_snapshot(self, tmp_path):
+        """A cached registry's bitmaps come from its snapshot."""
+        from mcpt.registry import clear_registry_memo
+        from mcpt.registry.client import _registry_postings, field_postings
+
+        source = TestQueryLanguage.REGISTRY
+        artifacts = TestQueryLanguage.ARTIFACTS
+        cfg = RegistryConfig(source="https://example.com", ref="bitmaps")
+        with patch("mcpt.registry.client.registry_cache_path", return_value=tmp_path / "registry.json"), \
+             patch("mcpt.registry.client.load_cached_artifact", side_effect=lambda cfg, name: artifacts.get(name)), \
+             patch("mcpt.registry.featured.load_cached_artifact", return_value=None):
+            expected = field_postings(source, cfg).facets()
+            save_cached_registry(cfg, source)
+            clear_registry_memo()
+            registry = load_cached_registry(cfg)
+            with patch("mcpt.registry.client._registry_postings", wraps=_registry_postings) as spy:
+                postings = field_postings(registry, cfg)
+            facets = postings.facets()
+
+        spy.assert_not_called()
+        assert facets == expected
+        assert facets["trust"] == {"neutral": 2, "deprecated": 1, "trusted": 1, "verified": 1}
+        assert facets["bundle"] == {"core": 1, "ops": 1}
@@ -1,7 +1,12 @@
 """Smoke tests for MCPT CLI."""
 
+import os
 import re
+import subprocess
+import sys
+from pathlib import Path
 
+import pytest
 from typer.testing import CliRunner
 
 from mcpt.cli import app
@@ -71,3 +76,78 @@ def test_run_help():
     result = runner.invoke(app, ["run", "--help"])
     assert result.exit_code == 0
     assert "--real" in strip_ansi(result.stdout)
+
+
+# Import-time budgets: `python -X importtime` self time summed over mcpt's
+# own modules, in microseconds. Generous enough for slow CI machines; the
+# module checks catch most regressions exactly.
+CLI_IMPORT_BUDGET_US = 150_000
+ENTRY_IMPORT_BUDGET_US = 25_000
+
+HEAVY_MODULES = ("typer", "click", "rich", "httpx", "yaml")
+
+
+def run_importtime(code: str, env: dict | None = None) -> tuple[str, dict[str, int]]:
+    """Run code under -X importtime; return its stdout and each module's self time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **(env or {})},
+        cwd=Path(__file__).resolve().parents[1],
+    )
+    assert result.returncode == 0, result.stderr
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_us, _, name = line[len("import time:"):].split("|")
+            if self_us.strip().isdigit():
+                times[name.strip()] = int(self_us)
+    return result.stdout, times
+
+
+def mcpt_self_time(times: dict[str, int]) -> int:
+    return sum(us for name, us in times.items() if name == "mcpt" or name.startswith("mcpt."))
+
+
+def test_version_entry_point_imports():
+    """Test mcpt --version is answered without loading the CLI."""
+    out, times = run_importtime(
+        "import sys; sys.argv = ['mcpt', '--version']\n"
+        "from mcpt.__main__ import main; main()"
+    )
+    assert out.strip().startswith("mcpt ")
+    assert not [m for m in HEAVY_MODULES if m in times]
+    assert "mcpt.cli" not in times
+    assert mcpt_self_time(times) < ENTRY_IMPORT_BUDGET_US
+
+
+def test_cli_import_budget():
+    """Test importing the CLI stays within budget and skips httpx and yaml."""
+    _, times = run_importtime("import mcpt.cli")
+    assert "httpx" not in times
+    assert "yaml" not in times
+    assert mcpt_self_time(times) < CLI_IMPORT_BUDGET_US
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="cache location set through XDG_CACHE_HOME")
+def test_cached_json_path_skips_httpx(tmp_path):
+    """Test list --json served from the cache never loads httpx."""
+    env = {"XDG_CACHE_HOME": str(tmp_path)}
+    run_importtime(
+        "from mcpt.registry import RegistryConfig, save_cached_registry\n"
+        "save_cached_registry(RegistryConfig(), {'tools': [{'id': 'cached-tool'}]})",
+        env,
+    )
+    out, times = run_importtime(
+        "import sys; sys.argv = ['mcpt', 'list', '--json']\n"
+        "from mcpt.__main__ import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass",
+        env,
+    )
+    assert '"cached-tool"' in out
+    assert "httpx" not in times
+    assert "yaml" not in times